@@ -1,30 +1,23 @@
 import streamlit as st
-import numpy as np
-import json
+import re
+import threading
 import time
-import os
+import json
 import random
+import uuid
 from pathlib import Path
-from utils.pose_estimation import extract_keypoints, create_annotated_video_opencv, detect_exercise_type_with_confidence, count_reps
-from utils.compare import compare_pose
+from utils.uploads import save_upload, touch, maybe_cleanup, remove_session
+from utils.analysis_cache import AnalysisCache
 from utils.feedback import FeedbackGenerator
-import plotly.graph_objects as go
-from PIL import Image
+from utils.job_queue import ACTIVE, JobQueue, default_workers
+from utils.reference_registry import ReferenceRegistry
+from config import CONFIG
 
-# ------------------------- CONFIG -------------------------
-CONFIG = {
-    "reference_dir": Path("reference_data"),
-    "uploads_dir": Path("uploads"),
-    "temp_dir": Path("temp"),
-    "keypoint_indices": [11, 12, 13, 14, 15, 16, 23, 24, 25, 26, 27, 28],
-    "exercise_thresholds": {
-        "squat": {"base": 0.15, "min_ratio": 0.3},
-        "press": {"base": 0.15, "min_ratio": 0.06},
-        "deadlift": {"base": 0.6, "min_ratio": 0.5},
-        "pushup": {"base": 0.5, "min_ratio": 0.6}
-    }
-}
+# MediaPipe, OpenCV and Plotly (utils.analysis, utils.streaming, utils.video_encoding,
+# plotly) are imported where they are used, so the first page paints without them;
+# warm_up() loads them in the background right after.
 
+# ------------------------- CONFIG -------------------------
 for d in [CONFIG["uploads_dir"], CONFIG["temp_dir"], CONFIG["reference_dir"]]:
     d.mkdir(exist_ok=True)
 
@@ -40,9 +33,92 @@ highlight_words = ["hard", "freedom", "disciplined", "champion", "motivated", "j
 bg_image_url = "https://images.unsplash.com/photo-1571019613454-1cb2f99b2d8b?q=80&w=2070&auto=format&fit=crop&ixlib=rb-4.1.0&ixid=M3wxMjA3fDB8MHxwaG90by1wYWdlfHx8fGVufDB8fHx8fA%3D%3D"
 logo_path = "logo.jpg"
 
+# ------------------------- UPLOADS -------------------------
+def session_dir() -> Path:
+    if "session_id" not in st.session_state:
+        st.session_state["session_id"] = uuid.uuid4().hex
+    return CONFIG["uploads_dir"] / "sessions" / st.session_state["session_id"]
+
+def spool_upload(uploaded_file):
+    # Stream each upload to a per-session file once; reruns reuse it
+    file_id = getattr(uploaded_file, "file_id", None) or uploaded_file.name
+    upload = st.session_state.get("upload")
+    if upload and upload["file_id"] == file_id and Path(upload["path"]).exists():
+        touch(upload["path"])
+        return Path(upload["path"]), upload["hash"]
+
+    suffix = Path(uploaded_file.name).suffix.lower() or ".mp4"
+    path, video_hash = save_upload(uploaded_file, session_dir() / f"{uuid.uuid4().hex}{suffix}",
+                                   CONFIG["uploads"]["chunk_bytes"])
+    if upload and Path(upload["path"]).exists():
+        Path(upload["path"]).unlink()
+    st.session_state["upload"] = {"file_id": file_id, "path": str(path), "hash": video_hash}
+    return path, video_hash
+
+def run_janitor():
+    cfg = CONFIG["uploads"]
+    # Uploads of every session's queued and running jobs are kept, whoever submitted them
+    ran = maybe_cleanup([CONFIG["uploads_dir"] / "sessions", CONFIG["temp_dir"] / "sessions"],
+                        cfg["max_age_hours"] * 3600, cfg["max_total_bytes"], cfg["janitor_interval_s"],
+                        lambda: [spec["video_path"] for spec in get_job_queue().active_specs()])
+    if ran is not None:
+        get_job_queue().prune(cfg["max_age_hours"] * 3600)
+
+# ------------------------- ANALYSIS -------------------------
+@st.cache_resource
+def get_analysis_cache():
+    return AnalysisCache(CONFIG["cache"]["dir"], CONFIG["cache"]["max_bytes"])
+
+@st.cache_resource
+def get_reference_registry():
+    # Normalised references shared by every session; reloaded when a file changes
+    return ReferenceRegistry(CONFIG)
+
+@st.cache_resource
+def get_background_renderer():
+    # Full-quality renders keep going across reruns and sessions
+    from utils.video_encoding import BackgroundRenderer
+    return BackgroundRenderer()
+
+@st.cache_resource
+def get_session_history():
+    from utils.session_history import SessionHistory
+    return SessionHistory(CONFIG["history"]["path"])
+
+@st.cache_resource
+def get_job_queue():
+    # Analysis runs in worker processes shared by every session, which caps
+    # concurrent MediaPipe jobs; results survive reruns and page reloads.
+    # Spawned workers re-import this script as __mp_main__, so the UI must stay
+    # under the __main__ guard at the bottom. The workers start (and load their
+    # Pose graphs) as soon as the queue exists, not on the first Analyze click.
+    cfg = CONFIG["jobs"]
+    queue = JobQueue(cfg["dir"], default_workers(cfg["workers"]), "utils.analysis:init_analysis_worker", (CONFIG["extraction"],))
+    queue.warm()
+    return queue
+
+@st.cache_resource
+def warm_up():
+    # Once per server process, after the first paint: start the analysis workers and
+    # import what showing results needs, while the user is still picking a file
+    get_job_queue()
+
+    def load():
+        import utils.analysis  # noqa: F401
+        import utils.video_encoding  # noqa: F401
+        import plotly.graph_objects as go
+        go.Figure()  # plotly loads its figure classes on first use
+
+    thread = threading.Thread(target=load, name="warm-up", daemon=True)
+    thread.start()
+    return thread
+
+@st.cache_resource
+def load_logo() -> bytes:
+    return Path(logo_path).read_bytes()
+
 # ------------------------- CSS THEME -------------------------
-def apply_theme():
-    css = """
+THEME_CSS = """
     <style>
         html, body, .stApp {
             font-family: 'Segoe UI', sans-serif;
@@ -199,28 +275,54 @@ def apply_theme():
         }
     </style>
     """
-    st.markdown(css, unsafe_allow_html=True)
+
+@st.cache_resource
+def theme_css() -> str:
+    # Comments and indentation stripped once per process; Streamlit needs the
+    # <style> block re-sent on every run, so it is kept small
+    css = re.sub(r"/\*.*?\*/", "", THEME_CSS, flags=re.S)
+    return re.sub(r"\s*\n\s*", "", css).strip()
+
+def apply_theme():
+    st.markdown(theme_css(), unsafe_allow_html=True)
 
 # ------------------------- SIDEBAR -------------------------
 def render_sidebar():
     with st.sidebar:
-        img = Image.open(logo_path)
-        st.image(img, width=100)
+        st.image(load_logo(), width=100)
         st.markdown("<h2 style='color:#ff6347;'>🎛️ Controls</h2>", unsafe_allow_html=True)
 
         if st.button("🔄 Reset"):
+            if "session_id" in st.session_state:
+                remove_session(session_dir())
             for k in st.session_state.keys():
                 del st.session_state[k]
+            st.query_params.clear()
             st.write("🔄 Resetting...")
             st.stop()
 
         st.markdown("<hr>", unsafe_allow_html=True)
         st.markdown("<h4 style='color:#1f77b4;'>✅ Supported Exercises</h4>", unsafe_allow_html=True)
-        for ex in CONFIG["exercise_thresholds"]:
-            status = "✅" if (CONFIG["reference_dir"] / f"{ex}_correct.json").exists() else "❌"
+        for ex, available in get_reference_registry().available().items():
+            status = "✅" if available else "❌"
             color = "green" if status == "✅" else "red"
             st.markdown(f"<span style='color:{color}'>• {ex.title()} {status}</span>", unsafe_allow_html=True)
 
+        st.markdown("<hr>", unsafe_allow_html=True)
+        if "history_user" not in st.session_state:
+            st.session_state["history_user"] = st.query_params.get("user", "")
+        st.text_input("👤 Your Name", key="history_user",
+                      help="Analyses are saved under this name so you can follow your progress")
+        # Kept in the URL too, so a bookmarked page remembers who is training
+        if st.session_state["history_user"].strip():
+            st.query_params["user"] = st.session_state["history_user"].strip()
+        else:
+            st.query_params.pop("user", None)
+
+        st.markdown("<hr>", unsafe_allow_html=True)
+        st.checkbox("🐞 Debug timings", key="debug_profiling",
+                    help="Record per-stage time, fps and memory for the next analysis")
+
         st.markdown("<hr>", unsafe_allow_html=True)
         st.markdown("<h4 style='color:#f8c518;'>📌 Rules</h4>", unsafe_allow_html=True)
         st.markdown("""
@@ -231,15 +333,352 @@ def render_sidebar():
         - Max upload size: 200MB  
         """)
 
+def render_debug_panel(summary: list, trace_json: str):
+    # summary: Trace.summary() rows; trace_json: Trace.dumps()
+    with st.sidebar:
+        st.markdown("<h4 style='color:#1f77b4;'>🐞 Stage Timings</h4>", unsafe_allow_html=True)
+        st.dataframe(summary, hide_index=True, use_container_width=True)
+        st.download_button("⬇️ Download Trace", trace_json, file_name="analysis_trace.json",
+                           mime="application/json", help="Chrome/Perfetto trace-event format")
+
+# ------------------------- RESULTS -------------------------
+def render_mismatch(detected: str, confidence: float, seconds: float):
+    feedback = FeedbackGenerator().generate_feedback([], 0, 0.0, [], True, detected)
+    st.markdown("### 📊 Feedback Summary")
+    st.markdown(f"### Performance Grade: ❌ `{feedback['performance_grade']}`")
+    for item in feedback["priority_feedback"]:
+        st.markdown(f"- **{item['message']}**")
+    st.info(f"ℹ️ Stopped after the first {seconds:.0f}s ({confidence:.0%} match). "
+            "Tick **Skip exercise check** to analyze anyway.")
+
+def deviation_figure(series: dict):
+    # series: result_views.deviation_series (a downsampled curve comes with its min/max band)
+    import plotly.graph_objects as go
+
+    band = series.get("band")
+    fig = go.Figure()
+    if band:
+        fig.add_trace(go.Scatter(x=band["x"], y=band["high"], mode='lines', line=dict(width=0),
+                                 hoverinfo='skip', showlegend=False))
+        fig.add_trace(go.Scatter(x=band["x"], y=band["low"], mode='lines', line=dict(width=0), fill='tonexty',
+                                 fillcolor='rgba(220, 20, 60, 0.2)', hoverinfo='skip', showlegend=False))
+    fig.add_trace(go.Scatter(x=series["frame"], y=series["error"], mode='lines' if band else 'lines+markers',
+                             marker=dict(color='crimson'), showlegend=False))
+    shown = f" ({len(series['frame'])} of {series['total']} frames)" if band else ""
+    fig.update_layout(title=f'📉 Frame-wise Form Deviation{shown}',
+                      xaxis_title='Frame Index',
+                      yaxis_title='Deviation Score')
+    return fig
+
+@st.fragment
+def render_frame_log(log: dict, key: str):
+    # One page of result_views.frame_log rows at a time; paging reruns only this fragment
+    from utils.result_views import log_page, page_count
+
+    page_size = CONFIG["results"]["log_page_size"]
+    pages = page_count(log, page_size)
+    page = st.number_input(f"Page (of {pages})", 1, pages, 1, key=f"frame_log_page_{key}") if pages > 1 else 1
+    st.dataframe(log_page(log, page - 1, page_size), hide_index=True, use_container_width=True,
+                 column_config={"Joint error": st.column_config.NumberColumn(format="%.2f"),
+                                "Total error": st.column_config.NumberColumn(format="%.2f")})
+    start = (page - 1) * page_size
+    st.caption(f"Frames {start + 1}–{min(start + page_size, len(log['Frame']))} of {len(log['Frame'])} deviating frames")
+
+def render_progress(progress_bar, stats_area, chart_area, state: dict, update: int, redraw_chart: bool = True):
+    # One partial result of run_analysis_job (an analyze_progressively snapshot, the
+    # deviations as a deviation_series)
+    fraction = state["progress"] if state["progress"] is not None else 0.0
+    progress_bar.progress(fraction, text=f"Analyzing your workout... 🔍 {state['seconds']:.0f}s of video processed")
+    with stats_area.container():
+        col1, col2, col3 = st.columns(3)
+        col1.metric("Running Grade", state["grade"])
+        col2.metric("Reps So Far", state["reps"][0])
+        detected = state["detected_type"] or "…"
+        col3.metric("Looks Like", f"{detected.title()} ({state['confidence']:.0%})" if state["detected_type"] else detected)
+        if state["mismatch"]:
+            st.warning(f"⚠️ This looks like **{state['detected_type'].title()}** so far.")
+    if redraw_chart and state["deviation"]["total"]:
+        chart_area.plotly_chart(deviation_figure(state["deviation"]), use_container_width=True,
+                                key=f"progress_chart_{update}")
+
+def submit_analysis(temp_path, video_hash: str, selected_exercise: str, check_exercise: bool = True,
+                    early_exit: bool = True, trace: bool = False) -> str:
+    # Queue the analysis (or attach to the same one already queued, running or done)
+    from utils.analysis import analysis_job_id, results_name, track_cache_key
+
+    registry = get_reference_registry()
+    reference = registry.get(selected_exercise)
+    cache = get_analysis_cache()
+    spec = {
+        "video_path": str(temp_path),
+        "video_hash": video_hash,
+        "exercise": selected_exercise,
+        "check_exercise": check_exercise,
+        "early_exit": early_exit,
+        "cache_key": track_cache_key(cache, video_hash, CONFIG),
+        "result_name": results_name(CONFIG, selected_exercise, reference, check_exercise),
+        "trace": trace,
+    }
+    return get_job_queue().submit(analysis_job_id(spec), "utils.analysis:run_analysis_job", spec)
+
+@st.fragment(run_every=CONFIG["jobs"]["poll_seconds"])
+def render_job_progress(job_id: str):
+    # Polls the job's status file; a full rerun shows the results once it finishes
+    status = get_job_queue().status(job_id)
+    if status is None or status["state"] not in ACTIVE:
+        st.rerun()
+    if status["state"] == "queued":
+        ahead = status.get("ahead", 0)
+        st.progress(0.0, text=f"⏳ Waiting for a free worker{f' ({ahead} ahead of you)' if ahead else ''}...")
+        return
+    partial = status.get("partial")
+    if partial is None:
+        st.progress(status.get("progress") or 0.0, text="Analyzing your workout... 🔍")
+        return
+    render_progress(st.progress(0.0), st.empty(), st.empty(), dict(partial, progress=status.get("progress")), 0)
+
+def render_job(job_id: str) -> bool:
+    # Progress while the job runs, then its results; False when the job is unknown
+    queue = get_job_queue()
+    status, spec = queue.status(job_id), queue.spec(job_id)
+    if status is None or spec is None:
+        return False
+    if status["state"] in ACTIVE:
+        render_job_progress(job_id)
+        return True
+    if status["state"] != "done":
+        st.error(f"❌ Analysis {status['state']}: {status.get('error', 'the server restarted')}. Click **Analyze Form** to retry.")
+        return True
+
+    summary = queue.result(job_id) or {}
+    if summary.get("trace"):
+        render_debug_panel(summary["trace"]["summary"], json.dumps(summary["trace"]["events"]))
+    if summary.get("stopped_early"):
+        render_mismatch(summary["detected_type"], summary["confidence"], summary["seconds"])
+        return True
+    if not summary.get("frames"):
+        st.error("❌ Failed to extract keypoints.")
+        return True
+
+    from utils.analysis import cached_track
+
+    cache = get_analysis_cache()
+    track = cached_track(cache, spec["cache_key"], CONFIG["extraction"])
+    results = cache.get_results(spec["cache_key"], spec["result_name"])
+    if track is None or results is None:
+        # Evicted from the cache since the job finished: run it again, once
+        rerun = st.session_state.setdefault("resubmitted", set())
+        if job_id in rerun:
+            st.error("❌ The analysis finished but its results are no longer in the cache "
+                     "(is `cache.max_bytes` too small?).")
+            return True
+        rerun.add(job_id)
+        queue.submit(job_id, "utils.analysis:run_analysis_job", spec, force=True)
+        st.rerun()
+    user = st.session_state.get("history_user", "").strip()
+    if user and (user, job_id) not in st.session_state.setdefault("recorded", set()):
+        get_session_history().record(user, spec["exercise"], job_id, results, CONFIG["keypoint_indices"], track.fps)
+        st.session_state["recorded"].add((user, job_id))
+    render_results(spec["video_path"], track, results, spec["cache_key"], spec["result_name"])
+    render_history(user, spec["exercise"])
+    return True
+
+def render_history(user: str, exercise: str):
+    # Trends over the user's latest sessions of this exercise, straight from the history store
+    import plotly.graph_objects as go
+    from datetime import datetime
+    from utils.session_history import GRADE_SCORES
+
+    st.markdown("### 📈 Your Progress")
+    if not user:
+        st.info("ℹ️ Enter your name in the sidebar to save your sessions and see your progress.")
+        return
+    history = get_session_history()
+    last = CONFIG["history"]["trend_sessions"]
+    sessions = history.recent(user, exercise, last)
+    totals = history.totals(user, exercise)
+    col1, col2, col3 = st.columns(3)
+    col1.metric(f"{exercise.title()} Sessions", totals["sessions"])
+    col2.metric("Total Reps", totals["reps"])
+    col3.metric("Average Grade Score", f"{sum(s['score'] for s in sessions) / len(sessions):.1f} / 4" if sessions else "–")
+    if len(sessions) < 2:
+        st.caption("Analyze more sessions to see your trends.")
+        return
+
+    chart1, chart2 = st.columns(2)
+    grades = go.Figure(go.Scatter(x=[datetime.fromtimestamp(s["created"]) for s in sessions],
+                                  y=[s["score"] for s in sessions], text=[s["grade"] for s in sessions],
+                                  mode='lines+markers', marker=dict(color='#1f77b4'),
+                                  hovertemplate='%{x|%d %b %H:%M}: %{text}<extra></extra>'))
+    grades.update_layout(title=f'🏅 Grade over the last {len(sessions)} sessions', xaxis_title='Session',
+                         yaxis=dict(title='Grade', tickvals=list(GRADE_SCORES.values()),
+                                    ticktext=list(GRADE_SCORES.keys()), range=[-0.2, 4.2]))
+    chart1.plotly_chart(grades, use_container_width=True)
+
+    joints = history.worst_joints(user, exercise, last)
+    worst = go.Figure(go.Bar(x=[j["error"] for j in joints][::-1], y=[j["joint"].title() for j in joints][::-1],
+                             orientation='h', marker=dict(color='crimson')))
+    worst.update_layout(title=f'🦴 Worst joints over the last {len(sessions)} sessions', xaxis_title='Mean Error')
+    chart2.plotly_chart(worst, use_container_width=True)
+
+def render_results(video_path: str, track, results: dict, cache_key: str, result_name: str):
+    from utils.analysis import cached_render, render_profile
+
+    diff_frames = results["diff_frames"]
+    joint_errors = results["joint_errors"]
+    feedback = results["feedback"]
+
+    st.markdown("### 📊 Feedback Summary")
+    grade = feedback['performance_grade']
+    grade_color = {
+        "A": "🟢", "B+": "🟡", "C": "🟠", "D": "🔴", "F": "❌"
+    }.get(grade, "❓")
+    st.markdown(f"### Performance Grade: {grade_color} `{grade}`")
+
+    if grade in ["A", "B+"]:
+        st.balloons()
+
+    for item in feedback["priority_feedback"]:
+        st.markdown(f"- **{item['message']}**")
+
+    if diff_frames:
+        from utils.features import landmark_names
+        from utils.result_views import deviation_arrays, deviation_series, frame_log
+
+        frames, errors, severity = deviation_arrays(diff_frames)
+        with st.expander("📋 Frame Deviation Log", expanded=False):
+            log = frame_log(frames, errors, severity, joint_errors, landmark_names(CONFIG["keypoint_indices"]))
+            render_frame_log(log, f"{cache_key}/{result_name}")
+
+        st.plotly_chart(deviation_figure(deviation_series(frames, errors, CONFIG["results"]["chart_points"])),
+                        use_container_width=True)
+
+    st.markdown("### 🎬 Annotated Video")
+    cache = get_analysis_cache()
+    full = cached_render(cache, cache_key, result_name, "full", CONFIG)
+    if full is not None:
+        show_annotated_video(full, "Full quality")
+        return
+    preview = cached_render(cache, cache_key, result_name, "preview", CONFIG)
+    if not Path(video_path).exists():
+        if preview is not None:
+            show_annotated_video(preview, "Preview")
+        else:
+            st.info("ℹ️ The uploaded video has expired; upload it again to render the annotated video.")
+        return
+    # A quick low-res preview now, the full-quality file on a background thread
+    if preview is None:
+        with st.spinner("Rendering preview... 🎞️"):
+            preview = render_profile(video_path, track, results, cache, cache_key, result_name, "preview", CONFIG)
+    # A render that failed is only retried from render_full_video's Retry button
+    if f"{cache_key}/{result_name}" not in st.session_state.get("render_errors", {}):
+        get_background_renderer().submit(f"{cache_key}/{result_name}", render_profile, video_path, track, results,
+                                         cache, cache_key, result_name, "full", CONFIG)
+    render_full_video(cache_key, result_name, preview)
+
+def show_annotated_video(stats: dict, label: str):
+    from utils.video_encoding import describe
+
+    out = stats["output"]
+    path = Path(out["path"])
+    st.video(str(path))
+    st.caption(f"{label}: {describe(stats)}")
+    # Read from disk only when clicked, and without a rerun that would clear the results
+    st.download_button(f"⬇️ Download Annotated Video ({label.lower()})", data=path.read_bytes,
+                       file_name=f"annotated_output{path.suffix}", mime=out["mime"], on_click="ignore")
+
+@st.fragment(run_every=CONFIG["encoding"]["poll_seconds"])
+def render_full_video(cache_key: str, result_name: str, preview: dict):
+    # Shows the preview until the background render lands in the cache
+    from utils.analysis import cached_render
+
+    full = cached_render(get_analysis_cache(), cache_key, result_name, "full", CONFIG)
+    if full is not None:
+        show_annotated_video(full, "Full quality")
+        return
+    key = f"{cache_key}/{result_name}"
+    renderer = get_background_renderer()
+    job = renderer.get(key)
+    if job is not None and job.done() and job.exception() is not None:
+        # Collected: the session keeps the message and the renderer drops the job
+        st.session_state.setdefault("render_errors", {})[key] = str(job.exception())
+        renderer.forget(key)
+    error = st.session_state.get("render_errors", {}).get(key)
+    if error is not None:
+        st.warning(f"⚠️ Full-quality render failed: {error}")
+        if st.button("🔁 Retry full-quality render", key=f"retry_render/{key}"):
+            st.session_state["render_errors"].pop(key, None)
+            st.rerun()
+    else:
+        st.info("⏳ Full-quality video is rendering in the background; it replaces the preview when done.")
+    show_annotated_video(preview, "Preview")
+
+# ------------------------- LIVE -------------------------
+def render_live(selected_exercise: str):
+    from utils.streaming import LatestFrameReader, LiveSession, coach_stream
+
+    source = st.text_input("🎥 Video Source", value="0",
+                           help="Camera index (0 = default webcam), RTSP/HTTP stream URL, or a video file path played at real-time rate")
+    reference = get_reference_registry().get(selected_exercise)
+    if reference is None:
+        st.error("❌ Reference data missing.")
+        return
+
+    start_col, stop_col = st.columns(2)
+    start = start_col.button("▶️ Start Live Coaching")
+    stop_col.button("⏹️ Stop")  # any rerun ends the loop below
+    if not start:
+        return
+
+    session = LiveSession(selected_exercise, reference, CONFIG)
+    try:
+        reader = LatestFrameReader(source.strip())
+    except IOError as e:
+        session.close()
+        st.error(f"❌ {e}")
+        return
+
+    frame_slot = st.empty()
+    reps_col, quality_col, form_col, latency_col = st.columns(4)
+    reps_slot, quality_slot, form_slot, latency_slot = reps_col.empty(), quality_col.empty(), form_col.empty(), latency_col.empty()
+    # Frames are processed as fast as they arrive; the page only refreshes at ui_fps
+    min_interval = 1.0 / CONFIG["live"]["ui_fps"]
+    last_paint = 0.0
+    state = None
+    try:
+        for frame, state in coach_stream(reader, session):
+            if time.perf_counter() - last_paint < min_interval and not state["rep_completed"]:
+                continue
+            last_paint = time.perf_counter()
+            frame_slot.image(frame, channels="BGR", use_container_width=True)
+            rep_num, quality = state["rep"]
+            reps_slot.metric("Reps", rep_num)
+            quality_slot.metric("Last Rep", quality or "–")
+            form_slot.metric("Form", {"high": "🔴 Off", "medium": "🟠 Check"}.get(state["severity"], "🟢 Good"))
+            latency_slot.metric("Latency", f"{state['latency_ms']:.0f} ms",
+                                help=f"{state['fps']:.1f} fps processed, {state['dropped']} frames dropped")
+        session.finish()
+    finally:
+        reader.close()
+        session.close()
+
+    if state is None:
+        st.warning("⚠️ No frames received from the source.")
+        return
+    st.markdown(f"### ✅ Session finished: {session.reps.count} reps")
+    if session.rep_log:
+        st.dataframe([{"frame": e["source_frame"], "rep": e["rep"], "quality": e["quality"],
+                       "duration": e["duration"], "ROM": round(e["rom"], 3)} for e in session.rep_log], hide_index=True)
+
 # ------------------------- MAIN -------------------------
 def main():
     st.set_page_config(page_title="Smart Form Coach", layout="wide")
-    render_sidebar()
     apply_theme()
+    render_sidebar()
+    run_janitor()
 
     st.markdown('<div class="top-logo">', unsafe_allow_html=True)
-    img = Image.open(logo_path)
-    st.image(img, width=130)
+    st.image(load_logo(), width=130)
     st.markdown('</div>', unsafe_allow_html=True)
 
     st.markdown("<h1 style='text-align:center;'>💪 Smart Form Coach</h1>", unsafe_allow_html=True)
@@ -267,107 +706,43 @@ def main():
 
 
     # VIDEO + ANALYSIS
+    mode = st.radio("Mode", ["📤 Upload Video", "🎥 Live Coaching"], horizontal=True, label_visibility="collapsed")
+    if mode == "🎥 Live Coaching":
+        selected_exercise = st.selectbox("🏋️ Select Exercise Type", list(CONFIG["exercise_thresholds"].keys()))
+        render_live(selected_exercise)
+        return
+
     uploaded_file = st.file_uploader("📤 Upload Your Workout Video", type=["mp4", "mov", "avi"])
     selected_exercise = st.selectbox("🏋️ Select Exercise Type", list(CONFIG["exercise_thresholds"].keys()))
 
+    # The job ID is kept in the URL too, so a reloaded page picks the analysis back up
+    job_id = st.session_state.get("job_id") or st.query_params.get("job")
     if uploaded_file:
-        temp_path = CONFIG["uploads_dir"] / f"temp_{int(time.time())}.mp4"
-        with open(temp_path, "wb") as f:
-            f.write(uploaded_file.read())
+        temp_path, video_hash = spool_upload(uploaded_file)
 
         st.video(str(temp_path))
 
+        skip_check = st.checkbox("Skip exercise check", help="Grade against the selected exercise even if the video looks like another one")
+        early_exit = st.checkbox("Stop early on a wrong exercise", value=CONFIG["progressive"]["early_exit"],
+                                 disabled=skip_check,
+                                 help="Stop processing as soon as the video confidently shows another exercise")
         if st.button("🚀 Analyze Form"):
-            loader_area = st.empty()
-            loader_area.markdown('<div class="loader"></div><p style="text-align:center;">Analyzing your workout... 🔍</p>', unsafe_allow_html=True)
-
-            keypoints = extract_keypoints(str(temp_path), warmup_trim=60)
-            loader_area.empty()
-
-            if not keypoints:
-                st.error("❌ Failed to extract keypoints.")
-                return
-
-            detected_type, confidence = detect_exercise_type_with_confidence(keypoints)
-            mismatch = detected_type != selected_exercise and confidence > 0.6
-
-            ref_path = CONFIG["reference_dir"] / f"{selected_exercise}_correct.json"
-            if not ref_path.exists():
+            if get_reference_registry().get(selected_exercise) is None:
                 st.error("❌ Reference data missing.")
                 return
-
-            with open(ref_path) as f:
-                ref_data = json.load(f)
-
-            diff_frames, joint_errors, threshold = compare_pose(
-                keypoints,
-                ref_data["keypoints"],
-                CONFIG["keypoint_indices"],
-                CONFIG["exercise_thresholds"][selected_exercise]["base"],
-                selected_exercise
-            )
-
-            if len(diff_frames) <= 2 and confidence > 0.95:
-                diff_frames = []
-
-            feedback = FeedbackGenerator().generate_feedback(
-                diff_frames,
-                len(keypoints),
-                CONFIG["exercise_thresholds"][selected_exercise]["min_ratio"],
-                joint_errors,
-                mismatch,
-                detected_type
-            )
-
-            reps = count_reps(keypoints, selected_exercise)
-
-            st.markdown("### 📊 Feedback Summary")
-            grade = feedback['performance_grade']
-            grade_color = {
-                "A": "🟢", "B+": "🟡", "C": "🟠", "D": "🔴", "F": "❌"
-            }.get(grade, "❓")
-            st.markdown(f"### Performance Grade: {grade_color} `{grade}`")
-
-            if grade in ["A", "B+"]:
-                st.balloons()
-
-            for item in feedback["priority_feedback"]:
-                st.markdown(f"- **{item['message']}**")
-
-            from utils.feedback import JOINT_NAMES
-
-            if diff_frames:
-                with st.expander("📋 Frame Deviation Log", expanded=False):
-                    scroll_log = ""
-                    for i, (frame_idx, total_error, _) in enumerate(diff_frames):
-                        if frame_idx < len(joint_errors):
-                            joint_error_arr = joint_errors[frame_idx]
-                            max_error_idx = int(np.argmax(joint_error_arr))
-                            joint_name = JOINT_NAMES[max_error_idx] if max_error_idx < len(JOINT_NAMES) else f"joint {max_error_idx}"
-                            max_error = joint_error_arr[max_error_idx]
-                            scroll_log += f"Frame {{{frame_idx}}} -- MAX Error at {joint_name} = {max_error:.2f} -- Total Error = {total_error:.2f}\n"
-                    st.code(scroll_log.strip(), language="markdown")
-
-
-                frame_ids = [f[0] for f in diff_frames]
-                errors = [f[1] for f in diff_frames]
-                fig = go.Figure()
-                fig.add_trace(go.Scatter(x=frame_ids, y=errors, mode='lines+markers',
-                                         marker=dict(color='crimson')))
-                fig.update_layout(title='📉 Frame-wise Form Deviation',
-                                  xaxis_title='Frame Index',
-                                  yaxis_title='Deviation Score')
-                st.plotly_chart(fig, use_container_width=True)
-
-            st.markdown("### 🎬 Annotated Video")
-            out_path = CONFIG["temp_dir"] / f"annotated_{int(time.time())}.mp4"
-            result = create_annotated_video_opencv(str(temp_path), str(out_path), diff_frames, reps)
-            if result and os.path.exists(out_path):
-                st.video(str(out_path))
-                with open(out_path, "rb") as f:
-                    st.download_button("⬇️ Download Annotated Video", f.read(), file_name="annotated_output.mp4", mime="video/mp4")
-            else:
-                st.warning("⚠️ Annotated video could not be generated.")
+            job_id = submit_analysis(temp_path, video_hash, selected_exercise, not skip_check, early_exit,
+                                     st.session_state.get("debug_profiling", False))
+        elif job_id and (get_job_queue().spec(job_id) or {}).get("video_hash") != video_hash:
+            job_id = None  # a different video was uploaded since
+
+    if job_id and render_job(job_id):
+        st.session_state["job_id"] = job_id
+        st.query_params["job"] = job_id
+    else:
+        st.session_state.pop("job_id", None)
+        st.query_params.pop("job", None)
+
+    warm_up()
 
 if __name__ == "__main__":
     main()
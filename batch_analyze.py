@@ -0,0 +1,181 @@
+import csv
+import glob
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from contextlib import nullcontext
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from config import CONFIG
+from utils import profiling
+from utils.analysis import (analyze_exercise, detect_exercise, init_analysis_worker, load_or_extract_track,
+                            reference_path, shard_count)
+from utils.analysis_cache import json_default
+from utils.features import landmark_names
+from utils.multi_person import extract_person_tracks
+
+VIDEO_EXTENSIONS = {".mp4", ".mov", ".avi"}
+
+def _init_worker():
+    # One MediaPipe graph per worker process, built up front and reused for every video
+    init_analysis_worker(CONFIG["extraction"])
+
+def collect_videos(inputs: List[str]) -> List[Path]:
+    videos = []
+    for item in inputs:
+        path = Path(item)
+        if path.is_dir():
+            candidates = sorted(p for p in path.rglob("*") if p.suffix.lower() in VIDEO_EXTENSIONS)
+        else:
+            candidates = sorted(Path(p) for p in glob.glob(item, recursive=True))
+        videos.extend(p for p in candidates if p.is_file() and p not in videos)
+    return videos
+
+def analyze_video(video_path: str, exercise: Optional[str], out_dir: str, trace: bool = False,
+                  multi_person: bool = False, segments: int = 1) -> List[Dict]:
+    # One summary per video, or one per person found in it with multi_person;
+    # segments > 1 splits a long video's extraction across that many processes
+    with (profiling.trace() if trace else nullcontext()) as t:
+        if multi_person:
+            summaries = _analyze_people(video_path, exercise, out_dir)
+        else:
+            summaries = [_analyze_video(video_path, exercise, out_dir, segments)]
+    if t is not None:
+        trace_file = Path(out_dir) / f"{_output_stem(video_path)}.trace.json"
+        t.dump(trace_file)
+        for summary in summaries:
+            summary["trace_file"] = str(trace_file)
+    return summaries
+
+def _analyze_video(video_path: str, exercise: Optional[str], out_dir: str, segments: int = 1) -> Dict:
+    start = time.perf_counter()
+    summary = {"video": video_path, "status": "ok"}
+    try:
+        track = load_or_extract_track(video_path, CONFIG,
+                                      segments=shard_count(video_path, CONFIG, segments) if segments > 1 else 1)
+        if not len(track):
+            summary["status"] = "no_keypoints"
+            return summary
+        _grade(track, exercise, summary, Path(out_dir) / f"{_output_stem(video_path)}.json")
+    except Exception as e:
+        summary.update(status="error", error=f"{type(e).__name__}: {e}")
+    finally:
+        summary["seconds"] = round(time.perf_counter() - start, 3)
+    return summary
+
+def _analyze_people(video_path: str, exercise: Optional[str], out_dir: str) -> List[Dict]:
+    # Every person is graded on their own track; results go to <stem>.person<id>.json
+    start = time.perf_counter()
+    try:
+        cfg = CONFIG["multi_person"]
+        tracks = extract_person_tracks(video_path, CONFIG["extraction"], cfg["max_people"], cfg["detect_every"],
+                                       cfg["min_seconds"], cfg["workers"])
+        summaries = []
+        for person, track in tracks.items():
+            summary = {"video": video_path, "person": person, "status": "ok"}
+            if not len(track):
+                summary["status"] = "no_keypoints"
+            else:
+                _grade(track, exercise, summary, Path(out_dir) / f"{_output_stem(video_path)}.person{person}.json")
+            summaries.append(summary)
+        if not summaries:
+            summaries = [{"video": video_path, "status": "no_keypoints"}]
+    except Exception as e:
+        summaries = [{"video": video_path, "status": "error", "error": f"{type(e).__name__}: {e}"}]
+    seconds = round(time.perf_counter() - start, 3)
+    for summary in summaries:
+        summary["seconds"] = seconds
+    return summaries
+
+def _grade(track, exercise: Optional[str], summary: Dict, out_file: Path) -> None:
+    # Fills `summary` and writes the per-frame details to out_file
+    chosen = exercise
+    if chosen is None:
+        # Grade against whatever the detector sees when no exercise is given
+        chosen, _ = detect_exercise(track.features, CONFIG)
+    ref_path = reference_path(CONFIG, chosen) if chosen in CONFIG["exercise_thresholds"] else None
+    if ref_path is None:
+        summary.update(status="no_reference", exercise=chosen)
+        return
+
+    results = analyze_exercise(track, chosen, ref_path, CONFIG)
+    joint_errors = results["joint_errors"]
+    reps = results["reps"]
+    mean_joint = joint_errors.mean(axis=0) if len(joint_errors) else np.zeros(0)
+    worst = int(np.argmax(mean_joint)) if len(mean_joint) else None
+    summary.update(
+        exercise=chosen,
+        detected_type=results["detected_type"],
+        detection_confidence=results["confidence"],
+        grade=results["feedback"]["performance_grade"],
+        frames=len(track),
+        deviating_frames=len(results["diff_frames"]),
+        reps=reps[-1][0] if reps else 0,
+        worst_joint=landmark_names([CONFIG["keypoint_indices"][worst]])[0] if worst is not None else None,
+    )
+
+    details = dict(summary, **{
+        "fps": track.fps,
+        "frame_indices": track.frame_indices,
+        "feedback": results["feedback"],
+        "diff_frames": results["diff_frames"],
+        "mean_joint_errors": mean_joint,
+        "joint_errors": joint_errors,
+        "reps_per_frame": reps,
+    })
+    with open(out_file, "w") as f:
+        json.dump(details, f, default=json_default)
+    summary["results_file"] = str(out_file)
+
+def _output_stem(video_path: str) -> str:
+    # Keep results from same-named files in different folders apart
+    parts = Path(video_path).with_suffix("").parts
+    return "__".join(p for p in parts if p not in ("", os.sep, ".."))
+
+def run_batch(inputs: List[str], out_dir: str, exercise: Optional[str] = None,
+              workers: Optional[int] = None, trace: bool = False, multi_person: bool = False,
+              segments: int = 1) -> List[Dict]:
+    videos = collect_videos(inputs)
+    Path(out_dir).mkdir(parents=True, exist_ok=True)
+    summaries = []
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count(), initializer=_init_worker) as pool:
+        futures = {pool.submit(analyze_video, str(v), exercise, out_dir, trace, multi_person, segments): v for v in videos}
+        for n, future in enumerate(as_completed(futures), 1):
+            for summary in future.result():
+                summaries.append(summary)
+                person = f" (person {summary['person']})" if "person" in summary else ""
+                print(f"[{n}/{len(videos)}] {summary['status']:<13} {summary.get('grade', '-'):<3} {summary['video']}{person}")
+
+    summaries.sort(key=lambda s: (s["video"], s.get("person", -1)))
+    with open(Path(out_dir) / "summary.json", "w") as f:
+        json.dump(summaries, f, indent=2, default=json_default)
+    fields = ["video", "person", "status", "exercise", "detected_type", "grade", "frames",
+              "deviating_frames", "reps", "worst_joint", "seconds", "results_file", "error"]
+    with open(Path(out_dir) / "summary.csv", "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=fields, extrasaction="ignore")
+        writer.writeheader()
+        writer.writerows(summaries)
+    return summaries
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Analyse a directory or glob of workout videos headlessly")
+    parser.add_argument("inputs", nargs="+", help="Video files, directories or glob patterns")
+    parser.add_argument("--exercise", choices=list(CONFIG["exercise_thresholds"]), help="Grade every video as this exercise (default: auto-detect)")
+    parser.add_argument("--out", default="batch_results", help="Directory for per-video results and summary files")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument("--trace", action="store_true", help="Write a per-stage timing trace next to each result")
+    parser.add_argument("--multi-person", action="store_true", help="Track and grade every person in frame separately")
+    parser.add_argument("--segments", type=int, default=1,
+                        help="Split each long video (sharding.min_seconds or more) into this many time slices "
+                             "extracted in parallel; use with --workers 1 for a single long video")
+    args = parser.parse_args()
+
+    results = run_batch(args.inputs, args.out, args.exercise, args.workers, args.trace, args.multi_person,
+                        args.segments)
+    ok = sum(1 for r in results if r["status"] == "ok")
+    print(f"✅ {ok}/{len(results)} videos analysed, summary written to {args.out}/summary.csv")
@@ -0,0 +1,38 @@
+# ✅ File: bench_classifier.py (reference-library classifier vs the motion heuristic)
+#
+# Run from the repo root:  python -m benchmarks.bench_classifier
+
+import time
+
+from config import CONFIG
+from utils.analysis import exercise_classifier
+from utils.pose_estimation import PoseTrack, detect_exercise_type_with_confidence, extract_pose_track
+
+# Several sample clips are byte-identical copies: user_pushup.mp4 is squat_perfect.mp4,
+# sqaut.mp4 is sh.mp4 and user_press.mp4 is press_perfect.mp4; labels reflect the content
+VIDEOS = [
+    ("reference_videos/squat_perfect.mp4", "squat"),
+    ("reference_videos/press_perfect.mp4", "press"),
+    ("reference_videos/deadlift_perfect.mp4", "deadlift"),
+    ("reference_videos/sh.mp4", "squat"),
+]
+
+def main():
+    classifier = exercise_classifier(CONFIG)
+    preview_seconds = CONFIG["classifier"]["preview_seconds"]
+    warmup = CONFIG["extraction"]["warmup_trim"]
+    print(f"library: {classifier.classes}, {len(classifier.features)} windows\n")
+    print(f"{'video':<38}{'truth':>9}{'heuristic':>18}{'knn full':>18}{'knn preview':>18}{'classify ms':>13}")
+    for video, truth in VIDEOS:
+        track = extract_pose_track(video, warmup_trim=warmup)
+        heuristic = detect_exercise_type_with_confidence(track.keypoints)
+        start = time.perf_counter()
+        full = classifier.classify(track.keypoints)
+        elapsed = (time.perf_counter() - start) * 1000
+        preview_frames = int(round((track.fps or 30.0) * preview_seconds))
+        preview = classifier.classify(PoseTrack(track.points[:preview_frames], track.visibility[:preview_frames], track.fps, warmup).keypoints)
+        cells = [f"{label} {conf:.2f}" for label, conf in (heuristic, full, preview)]
+        print(f"{video:<38}{truth:>9}{cells[0]:>18}{cells[1]:>18}{cells[2]:>18}{elapsed:>13.1f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+# ✅ File: bench_cold_start.py (app cold start: time to first paint and time to first result)
+#
+# Every measurement runs in a fresh interpreter, like a new replica after a scale-up:
+#   paint   import streamlit (the server has paid this before any page is served),
+#           then the first run of app.py and a rerun, via Streamlit's AppTest
+#   result  the app's first page load (get_job_queue), `--think` seconds for the user to
+#           pick a file, then Analyze: submit -> job done -> track and results loaded by
+#           the server for rendering. A second analysis shows the warm numbers.
+#   pose    building a Pose graph and its first inference vs taking one from the pool
+#
+# Run from the repo root:  python -m benchmarks.bench_cold_start [--think 5] [--runs 3]
+
+import argparse
+import importlib
+import json
+import os
+import shutil
+import subprocess
+import sys
+import threading
+import time
+import uuid
+
+import numpy as np
+
+def child_paint() -> dict:
+    # streamlit itself is timed, AppTest is the harness
+    start = time.perf_counter()
+    importlib.import_module("streamlit")
+    streamlit_s = time.perf_counter() - start
+    from streamlit.testing.v1 import AppTest
+
+    at = AppTest.from_file(os.path.abspath("app.py"), default_timeout=120)
+    start = time.perf_counter()
+    at.run()
+    first_s = time.perf_counter() - start
+    heavy = sorted(m for m in ("mediapipe", "cv2", "plotly.graph_objs", "PIL.Image") if m in sys.modules)
+    css = sum(len(m.value) for m in at.markdown if "<style>" in m.value)
+    # Let the app's background warm-up (if any) finish, as it would before a user's next click
+    start = time.perf_counter()
+    for thread in threading.enumerate():
+        if thread.name == "warm-up":
+            thread.join()
+    warm_s = time.perf_counter() - start
+    start = time.perf_counter()
+    at.run()
+    rerun_s = time.perf_counter() - start
+    return {"streamlit_s": streamlit_s, "first_run_s": first_s, "rerun_s": rerun_s, "warm_s": warm_s,
+            "heavy_at_paint": heavy, "css_bytes": css, "exceptions": len(at.exception)}
+
+def child_result(video: str, exercise: str, think: float) -> dict:
+    import app
+    from config import CONFIG
+    from utils.keypoint_store import hash_file
+
+    start = time.perf_counter()
+    # What the end of the first page load starts: warm_up() where the app has it
+    getattr(app, "warm_up", app.get_job_queue)()
+    queue = app.get_job_queue()
+    load_s = time.perf_counter() - start
+    time.sleep(think)
+
+    timings = []
+    digest = hash_file(video)
+    for _ in range(2):
+        click, click_wall = time.perf_counter(), time.time()
+        job_id = app.submit_analysis(video, f"{digest}-{uuid.uuid4().hex}", exercise, True, False)
+        while queue.status(job_id)["state"] in ("queued", "running"):
+            time.sleep(0.02)
+        done = time.perf_counter()
+        spec = queue.spec(job_id)
+        from utils.analysis import cached_track
+        track = cached_track(app.get_analysis_cache(), spec["cache_key"], CONFIG["extraction"])
+        results = app.get_analysis_cache().get_results(spec["cache_key"], spec["result_name"])
+        ready = time.perf_counter()
+        assert queue.status(job_id)["state"] == "done" and track is not None and results is not None
+        status = queue.status(job_id)
+        shutil.rmtree(queue.root / job_id, ignore_errors=True)
+        timings.append({"start_s": status["started"] - click_wall, "run_s": status["finished"] - status["started"],
+                        "done_s": done - click, "ready_s": ready - click})
+    queue.shutdown()
+    return {"load_s": load_s, "cold": timings[0], "warm": timings[1]}
+
+def child_pose() -> dict:
+    from utils.pose_estimation import mp_pose
+    frame = np.zeros((256, 256, 3), dtype=np.uint8)
+    start = time.perf_counter()
+    pose = mp_pose.Pose()
+    pose.process(frame)
+    build_s = time.perf_counter() - start
+    pose.close()
+    out = {"build_s": build_s}
+    try:
+        from utils.pose_estimation import pose_pool
+    except ImportError:
+        return out
+    pose_pool.warm(1)
+    start = time.perf_counter()
+    pose = pose_pool.get()
+    pose.process(frame)
+    out["pool_s"] = time.perf_counter() - start
+    pose_pool.put(pose)
+    return out
+
+def run_child(*args) -> dict:
+    out = subprocess.run([sys.executable, "-m", "benchmarks.bench_cold_start", "--child", *args],
+                         capture_output=True, text=True, timeout=900)
+    lines = [l for l in out.stdout.splitlines() if l.startswith("{")]
+    if out.returncode or not lines:
+        raise RuntimeError(out.stderr[-2000:])
+    return json.loads(lines[-1])
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--video", default="uploads/user_press.mp4")
+    parser.add_argument("--exercise", default="press")
+    parser.add_argument("--think", type=float, default=5.0, help="Seconds between page load and Analyze")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--child", nargs="+", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        kind = args.child[0]
+        if kind == "paint":
+            result = child_paint()
+        elif kind == "result":
+            result = child_result(args.child[1], args.child[2], float(args.child[3]))
+        else:
+            result = child_pose()
+        print(json.dumps(result))
+        return
+
+    paints = [run_child("paint") for _ in range(args.runs)]
+    med = lambda rows, key: float(np.median([r[key] for r in rows]))
+    print(f"first paint (median of {args.runs}): import streamlit {med(paints, 'streamlit_s'):.2f}s, "
+          f"first run of app.py {med(paints, 'first_run_s'):.2f}s, background warm-up {med(paints, 'warm_s'):.2f}s, "
+          f"rerun {med(paints, 'rerun_s'):.3f}s")
+    print(f"  loaded at first paint: {', '.join(paints[-1]['heavy_at_paint']) or 'none'}; "
+          f"theme CSS {paints[-1]['css_bytes']} bytes per run; exceptions {paints[-1]['exceptions']}")
+
+    for think in (0.0, args.think):
+        rows = [run_child("result", args.video, args.exercise, str(think)) for _ in range(args.runs)]
+        cold = [r["cold"] for r in rows]
+        warm = [r["warm"] for r in rows]
+        print(f"first result, Analyze {think:.0f}s after page load (median of {args.runs}): "
+              f"page load {med(rows, 'load_s'):.2f}s, job started {med(cold, 'start_s'):.2f}s, "
+              f"ran {med(cold, 'run_s'):.2f}s, job done {med(cold, 'done_s'):.2f}s, "
+              f"results loaded {med(cold, 'ready_s'):.2f}s; second analysis started {med(warm, 'start_s'):.2f}s, "
+              f"results loaded {med(warm, 'ready_s'):.2f}s")
+
+    pose = run_child("pose")
+    pool = f", from the warm pool {pose['pool_s'] * 1000:.0f} ms" if "pool_s" in pose else ""
+    print(f"Pose graph build + first inference {pose['build_s'] * 1000:.0f} ms{pool}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+# ✅ File: bench_compare.py (vectorised compare_pose vs the original per-frame loop)
+#
+# Run from the repo root:  python -m benchmarks.bench_compare [--frames 1000 10000 50000]
+
+import argparse
+import time
+
+import numpy as np
+
+from benchmarks.synthetic import synthetic_track
+from utils.compare import compare_pose, normalize_pose_proportional
+
+INDICES = [11, 12, 13, 14, 15, 16, 23, 24, 25, 26, 27, 28]
+
+def legacy_compare_pose(user_kps, ref_kps, indices, base_thresh, exercise, window=4):
+    # The pre-vectorisation implementation, kept here as the equivalence oracle
+    user = np.array([normalize_pose_proportional(f) for f in user_kps])[:, indices]
+    ref = np.array([normalize_pose_proportional(f) for f in ref_kps])[:, indices]
+    min_len = min(len(user), len(ref))
+    deviations, joint_errors = [], []
+    for i in range(min_len):
+        best_error, best_joints = float("inf"), None
+        for offset in range(-window, window + 1):
+            j = i + offset
+            if 0 <= j < len(ref):
+                diff = np.linalg.norm(user[i] - ref[j], axis=1)
+                avg_error = np.mean(diff)
+                if avg_error < best_error:
+                    best_error, best_joints = avg_error, diff
+        joint_errors.append(best_joints if best_joints is not None else np.zeros(len(indices)))
+        if i < 50 or best_error < 0.01:
+            continue
+        if best_error > base_thresh:
+            deviations.append((i, best_error, "high" if best_error > base_thresh * 1.5 else "medium"))
+    return deviations, joint_errors, base_thresh
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--frames", type=int, nargs="+", default=[1000, 10000, 50000])
+    parser.add_argument("--legacy-max", type=int, default=10000, help="Skip the slow loop above this length")
+    args = parser.parse_args()
+
+    print(f"{'frames':>8}{'legacy s':>11}{'vector s':>11}{'speedup':>9}  identical")
+    for frames in args.frames:
+        user = synthetic_track(frames, seed=1)
+        ref = synthetic_track(frames, rep_frames=64, seed=2)
+        start = time.perf_counter()
+        new = compare_pose(user, ref, INDICES, 0.15, "squat")
+        vec_t = time.perf_counter() - start
+        if frames > args.legacy_max:
+            print(f"{frames:>8}{'-':>11}{vec_t:>11.3f}{'-':>9}  -")
+            continue
+        start = time.perf_counter()
+        old = legacy_compare_pose(user, ref, INDICES, 0.15, "squat")
+        old_t = time.perf_counter() - start
+        same = old[0] == new[0] and np.array_equal(np.array(old[1]), new[1])
+        print(f"{frames:>8}{old_t:>11.3f}{vec_t:>11.3f}{old_t / vec_t:>8.0f}x  {same}")
+
+if __name__ == "__main__":
+    main()
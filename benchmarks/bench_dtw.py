@@ -0,0 +1,48 @@
+# ✅ File: bench_dtw.py (window vs banded-DTW alignment: time, peak memory, flagged frames)
+#
+# Run from the repo root:  python -m benchmarks.bench_dtw [--minutes 1 3 5] [--band 30]
+
+import argparse
+import time
+import tracemalloc
+
+from benchmarks.synthetic import synthetic_track
+from utils.compare import compare_pose
+
+INDICES = [11, 12, 13, 14, 15, 16, 23, 24, 25, 26, 27, 28]
+FPS = 30
+
+def run(user, ref, alignment, band):
+    # Timed and memory-traced separately: tracemalloc slows NumPy allocation down
+    start = time.perf_counter()
+    deviations, joint_errors, _ = compare_pose(user, ref, INDICES, 0.15, "squat", alignment=alignment, band=band)
+    elapsed = time.perf_counter() - start
+    tracemalloc.start()
+    compare_pose(user, ref, INDICES, 0.15, "squat", alignment=alignment, band=band)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak, len(deviations), len(joint_errors)
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--minutes", type=float, nargs="+", default=[1, 3, 5])
+    parser.add_argument("--band", type=int, default=30)
+    parser.add_argument("--tempo", type=float, default=1.5, help="User rep length relative to the reference")
+    args = parser.parse_args()
+
+    # "short": a ~2.5 rep reference like reference_data (window mode truncates to it).
+    # "full": a reference as long as the user clip but at the reference tempo.
+    print(f"{'minutes':>8}{'frames':>8}{'reference':>10}{'mode':>8}{'time s':>9}{'peak MB':>9}"
+          f"{'scored':>8}{'flagged %':>11}")
+    for minutes in args.minutes:
+        frames = int(minutes * 60 * FPS)
+        user = synthetic_track(frames, rep_frames=int(60 * args.tempo), seed=1)
+        for ref_name, ref_len in (("short", 150), ("full", frames)):
+            ref = synthetic_track(ref_len, rep_frames=60, seed=2)
+            for mode in ("window", "dtw"):
+                elapsed, peak, flagged, scored = run(user, ref, mode, args.band)
+                print(f"{minutes:>8g}{frames:>8}{ref_name:>10}{mode:>8}{elapsed:>9.3f}{peak / 1e6:>9.2f}"
+                      f"{scored:>8}{100 * flagged / max(scored, 1):>10.1f}%")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,36 @@
+# ✅ File: bench_encoding.py (output size and render time per encoding profile)
+#
+# Run from the repo root:  python -m benchmarks.bench_encoding [--videos ...] [--no-ffmpeg]
+
+import argparse
+import glob
+import os
+import tempfile
+
+from config import CONFIG
+from utils.pose_estimation import count_reps, create_annotated_video_opencv, extract_pose_track
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--videos", nargs="+", default=sorted(glob.glob("reference_videos/*.mp4")))
+    parser.add_argument("--no-ffmpeg", action="store_true", help="Only use OpenCV's writers")
+    args = parser.parse_args()
+
+    encoding = dict(CONFIG["encoding"], ffmpeg=False) if args.no_ffmpeg else CONFIG["encoding"]
+    profiles = dict(source=None, **encoding["profiles"])  # None: the pre-profile mp4v output
+    print(f"{'video':<22}{'profile':<9}{'encoder':<22}{'size':>10}{'frames':>8}{'MB':>7}{'render s':>10}{'fps':>8}")
+    for video in args.videos:
+        track = extract_pose_track(video, warmup_trim=60)
+        reps = count_reps(track.keypoints, "squat") if len(track) else None
+        for name, profile in profiles.items():
+            stats = {}
+            with tempfile.TemporaryDirectory() as tmp:
+                create_annotated_video_opencv(video, os.path.join(tmp, "out.mp4"), [], reps, track=track,
+                                              stats=stats, profile=profile, encoding=encoding)
+            out = stats["output"]
+            encoder = f"{out['backend']}:{out['encoder']}"
+            print(f"{os.path.basename(video):<22}{name:<9}{encoder:<22}{out['width']:>5}x{out['height']:<4}"
+                  f"{out['frames']:>8}{out['bytes'] / 1e6:>7.2f}{stats['total']['wall_s']:>10.2f}{stats['total']['fps']:>8.0f}")
+
+if __name__ == "__main__":
+    main()
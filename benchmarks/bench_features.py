@@ -0,0 +1,100 @@
+# ✅ File: bench_features.py (analysis steps reading one TrackFeatures vs converting the track each)
+#
+# Runs the analysis steps of analyze_exercise on synthetic tracks two ways: the
+# previous call pattern, where detection, comparison, the DTW rep signal and rep
+# counting each take raw keypoints and convert / normalise / smooth them again,
+# and analyze_exercise itself, where all of them read the track's TrackFeatures.
+# Each run starts from a fresh PoseTrack, so building the features is included.
+# The stage columns break the shared run down by profiled stage (milliseconds).
+#
+# Run from the repo root:  python -m benchmarks.bench_features [--frames 1000 10000 100000]
+
+import argparse
+import time
+
+import numpy as np
+
+from benchmarks.synthetic import synthetic_track
+from config import CONFIG
+from utils import profiling
+from utils.analysis import analyze_exercise, detect_exercise
+from utils.compare import compare_pose, rep_signal
+from utils.feedback import FeedbackGenerator
+from utils.pose_estimation import PoseTrack, count_reps
+from utils.reference_registry import get_registry
+
+def separate_steps(track: PoseTrack, exercise: str, reference) -> dict:
+    # analyze_exercise as it was before TrackFeatures
+    keypoints = track.keypoints
+    detected_type, confidence = detect_exercise(keypoints, CONFIG)
+    cfg = CONFIG["exercise_thresholds"][exercise]
+    diff_frames, joint_errors, _ = compare_pose(
+        keypoints, reference.keypoints, CONFIG["keypoint_indices"], cfg["base"], exercise,
+        alignment=cfg.get("alignment", "window"), band=cfg.get("dtw_band", 30),
+        ref_selected=reference.selected, ref_signal=reference.signal,
+        weights=track.joint_weights(CONFIG["keypoint_indices"]),
+        user_signal=rep_signal(keypoints, exercise, track.confidence, track.min_visibility))
+    feedback = FeedbackGenerator().generate_feedback(diff_frames, len(keypoints), cfg["min_ratio"], joint_errors,
+                                                     False, detected_type)
+    reps = count_reps(keypoints, exercise, track.confidence, track.min_visibility)
+    return {"detected_type": detected_type, "confidence": confidence, "diff_frames": diff_frames,
+            "joint_errors": np.asarray(joint_errors), "feedback": feedback, "reps": reps}
+
+def best_of(fn, repeats: int) -> float:
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+def stage_ms(fn, repeats: int) -> dict:
+    # Fastest time of each profiled stage over `repeats` runs
+    best = {}
+    for _ in range(repeats):
+        with profiling.trace(memory=False) as trace:
+            fn()
+        for row in trace.summary():
+            best[row["stage"]] = min(best.get(row["stage"], np.inf), row["total_s"] * 1000)
+    return best
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--frames", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--exercise", default="squat")
+    parser.add_argument("--alignment", default=None, help="Override the exercise's alignment (window / dtw)")
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+
+    reference = get_registry(CONFIG).get(args.exercise)
+    if args.alignment:
+        CONFIG["exercise_thresholds"][args.exercise]["alignment"] = args.alignment
+    params = CONFIG["extraction"]
+    print(f"{'frames':>8}{'separate ms':>13}{'features ms':>13}{'speedup':>9}"
+          f"{'classify':>10}{'normalize':>11}{'match':>9}{'count_reps':>12}{'same results':>14}")
+    for frames in args.frames:
+        points = synthetic_track(frames + params["warmup_trim"], args.exercise).astype(np.float32)
+        visibility = np.full(points.shape[:2], 0.9, dtype=np.float32)
+        visibility[::97, :] = 0.2  # some frames below min_visibility
+        make = lambda: PoseTrack(points, visibility, 30.0, params["warmup_trim"],
+                                 min_visibility=params["min_visibility"])
+        separate = lambda: separate_steps(make(), args.exercise, reference)
+        shared = lambda: analyze_exercise(make(), args.exercise, reference.path, CONFIG, reference)
+
+        old, new = separate(), shared()
+        same = (old["diff_frames"] == new["diff_frames"] and old["reps"] == new["reps"]
+                and np.array_equal(old["joint_errors"], new["joint_errors"])
+                and (old["detected_type"], old["confidence"]) == (new["detected_type"], new["confidence"]))
+        # Interleaved so both call patterns see the same machine noise
+        separate_s = shared_s = np.inf
+        for _ in range(args.repeats):
+            separate_s = min(separate_s, best_of(separate, 1))
+            shared_s = min(shared_s, best_of(shared, 1))
+        stages = stage_ms(shared, args.repeats)
+        match = stages.get("compare.window_match", stages.get("compare.dtw_match", 0.0))
+        print(f"{frames:>8}{separate_s * 1000:>13.1f}{shared_s * 1000:>13.1f}{separate_s / shared_s:>9.2f}"
+              f"{stages['classify_exercise']:>10.1f}{stages['normalize_poses']:>11.1f}{match:>9.1f}"
+              f"{stages['count_reps']:>12.1f}{str(same):>14}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+# ✅ File: bench_gaps.py (gap filling and joint masking under simulated detection dropouts)
+#
+# The sample videos track cleanly, so dropouts are simulated on their tracks: runs of
+# 1..max_run frames lose their detection and some frames get two joints thrown
+# off with low visibility (an occluded limb MediaPipe still guesses). Each damaged
+# track is analysed the old way (missing frames dropped, every joint trusted) and
+# with gap filling + visibility masking, and compared with the clean track.
+#
+# Run from the repo root:  python -m benchmarks.bench_gaps [--drop 0.1] [--occlude 0.1]
+
+import argparse
+import time
+import tracemalloc
+
+import numpy as np
+
+from config import CONFIG
+from utils.analysis import analyze_exercise, make_track
+from utils.pose_estimation import iter_pose_chunks
+from utils.reference_registry import get_registry
+
+VIDEOS = [
+    ("reference_videos/press_perfect.mp4", "press"),
+    ("reference_videos/squat_perfect.mp4", "squat"),
+    ("uploads/user_pushup.mp4", "pushup"),
+]
+
+def damage(points, visibility, drop: float, occlude: float, max_run: int, rng):
+    points, visibility = points.copy(), visibility.copy()
+    n = len(points)
+    lost = np.zeros(n, dtype=bool)
+    while lost.mean() < drop:
+        start = rng.integers(0, n)
+        lost[start:start + rng.integers(1, max_run + 1)] = True
+    points[lost] = np.nan
+    visibility[lost] = 0.0
+    hit = np.flatnonzero(~lost & (rng.random(n) < occlude))
+    joints = rng.choice(CONFIG["keypoint_indices"], size=(len(hit), 2))
+    for f, js in zip(hit, joints):
+        points[f, js, :2] += rng.normal(0, 0.15, size=(2, 2))
+        visibility[f, js] = rng.uniform(0.05, 0.4, size=2)
+    return points, visibility
+
+def rep_frames(track, reps):
+    # Source frames where the rep count goes up
+    counts = np.array([r[0] for r in reps])
+    ups = np.flatnonzero(np.diff(counts, prepend=0) > 0)
+    return track.frame_indices[ups]
+
+def flagged(track, results):
+    return {int(track.frame_indices[f[0]]) for f in results["diff_frames"]}
+
+def list_bytes(points) -> int:
+    # Peak allocation of the old nested-list representation of the same track
+    tracemalloc.start()
+    frames = [None if np.isnan(p[0, 0]) else p.tolist() for p in points]
+    size = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    del frames
+    return size
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--drop", type=float, default=0.1, help="Fraction of frames that lose their detection")
+    parser.add_argument("--occlude", type=float, default=0.1, help="Fraction of frames with two unreliable joints")
+    parser.add_argument("--max-run", type=int, default=6, help="Longest dropout run in frames")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    registry = get_registry(CONFIG)
+    params = CONFIG["extraction"]
+    legacy = dict(params, max_gap=0, min_visibility=0.0)
+    rng = np.random.default_rng(args.seed)
+    print(f"{'video':<20}{'mode':<8}{'analysed':>9}{'reps':>6}{'rep frame err':>15}"
+          f"{'flag precision':>16}{'flag recall':>13}{'analysis ms':>13}")
+    for video, exercise in VIDEOS:
+        chunks = list(iter_pose_chunks(video, params["min_detection_confidence"], params["min_tracking_confidence"]))
+        points = np.concatenate([c[0] for c in chunks])
+        visibility = np.concatenate([c[1] for c in chunks])
+        fps = chunks[0][2]
+        reference = registry.get(exercise)
+
+        clean = make_track(points, visibility, fps, legacy)
+        clean_results = analyze_exercise(clean, exercise, reference.path, CONFIG, reference)
+        clean_reps = rep_frames(clean, clean_results["reps"])
+        clean_flags = flagged(clean, clean_results)
+        damaged = damage(points, visibility, args.drop, args.occlude, args.max_run, rng)
+        print(f"{video.split('/')[-1]:<20}{'clean':<8}{len(clean):>9}{len(clean_reps):>6}{'-':>15}{'-':>16}{'-':>13}{'-':>13}")
+        for mode, mode_params in (("old", legacy), ("new", params)):
+            track = make_track(*damaged, fps, mode_params)
+            start = time.perf_counter()
+            results = analyze_exercise(track, exercise, reference.path, CONFIG, reference)
+            elapsed = (time.perf_counter() - start) * 1000
+            reps = rep_frames(track, results["reps"])
+            if len(reps) == len(clean_reps) and len(reps):
+                rep_err = f"{np.mean(np.abs(reps - clean_reps)):.1f}"
+            else:
+                rep_err = "count differs" if len(reps) != len(clean_reps) else "-"
+            flags = flagged(track, results)
+            precision = len(flags & clean_flags) / len(flags) if flags else float("nan")
+            recall = len(flags & clean_flags) / len(clean_flags) if clean_flags else float("nan")
+            print(f"{'':<20}{mode:<8}{len(track):>9}{len(reps):>6}{rep_err:>15}"
+                  f"{precision:>16.2f}{recall:>13.2f}{elapsed:>13.1f}")
+
+    print(f"\ntrack storage per 1000 frames: nested lists {list_bytes(points[:1000]) / 1e6 * 1000 / min(1000, len(points)):.2f} MB, "
+          f"dense arrays {(points[:1000].nbytes + visibility[:1000].nbytes) / 1e6 * 1000 / min(1000, len(points)):.2f} MB")
+
+if __name__ == "__main__":
+    main()
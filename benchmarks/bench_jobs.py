@@ -0,0 +1,92 @@
+# ✅ File: bench_jobs.py (job queue under load: submit latency, concurrency cap, reuse after a reload)
+#
+# Submits N analyses of a clip at once (each under a fresh cache key, so every
+# job really extracts) to a JobQueue with W workers, as N users clicking Analyze
+# together would. Reports how long submit() blocks the caller, the most jobs
+# seen running at once, queue wait and run time per job, and then opens a second
+# JobQueue on the same directory (a server restart / page reload) and resubmits
+# everything to show it is answered from disk without recomputation.
+#
+# Run from the repo root:  python -m benchmarks.bench_jobs [--jobs 4] [--workers 1]
+
+import argparse
+import shutil
+import tempfile
+import time
+import uuid
+
+import numpy as np
+
+from config import CONFIG
+from utils.analysis import analysis_job_id, init_analysis_worker, results_name, run_analysis_job, track_cache_key
+from utils.analysis_cache import AnalysisCache
+from utils.job_queue import ACTIVE, JobQueue
+from utils.reference_registry import get_registry
+
+def make_specs(video: str, exercise: str, count: int):
+    cache = AnalysisCache(CONFIG["cache"]["dir"], CONFIG["cache"]["max_bytes"])
+    reference = get_registry(CONFIG).get(exercise)
+    specs = []
+    for _ in range(count):
+        video_hash = uuid.uuid4().hex
+        specs.append({"video_path": video, "video_hash": video_hash, "exercise": exercise,
+                      "check_exercise": True, "early_exit": False,
+                      "cache_key": track_cache_key(cache, video_hash, CONFIG),
+                      "result_name": results_name(CONFIG, exercise, reference), "trace": False})
+    return specs
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--video", default="uploads/user_press.mp4")
+    parser.add_argument("--exercise", default="press")
+    parser.add_argument("--jobs", type=int, default=4, help="Analyses submitted at once")
+    parser.add_argument("--workers", type=int, default=1, help="Worker processes (the concurrency cap)")
+    args = parser.parse_args()
+
+    root = tempfile.mkdtemp(prefix="bench_jobs_")
+    specs = make_specs(args.video, args.exercise, args.jobs)
+    try:
+        queue = JobQueue(root, args.workers, init_analysis_worker, (CONFIG["extraction"],))
+        start = time.perf_counter()
+        submit_ms = []
+        ids = []
+        for spec in specs:
+            t = time.perf_counter()
+            ids.append(queue.submit(analysis_job_id(spec), run_analysis_job, spec))
+            submit_ms.append((time.perf_counter() - t) * 1000)
+
+        # Poll like the app does and record how many jobs run at the same time
+        peak = 0
+        while True:
+            states = [queue.status(i)["state"] for i in ids]
+            peak = max(peak, states.count("running"))
+            if not any(s in ACTIVE for s in states):
+                break
+            time.sleep(0.05)
+        wall = time.perf_counter() - start
+
+        statuses = [queue.status(i) for i in ids]
+        waits = [s["started"] - s["created"] for s in statuses]
+        runs = [s["finished"] - s["started"] for s in statuses]
+        failed = [s for s in statuses if s["state"] != "done"]
+        print(f"{args.jobs} jobs, {args.workers} worker(s): wall {wall:.1f}s, peak running {peak}, "
+              f"failed {len(failed)}")
+        print(f"submit() blocks the caller  median {np.median(submit_ms):.1f} ms, max {max(submit_ms):.1f} ms")
+        print(f"queue wait                  median {np.median(waits):.1f} s, max {max(waits):.1f} s")
+        print(f"run time                    median {np.median(runs):.1f} s, max {max(runs):.1f} s")
+        queue.shutdown()
+
+        # A new server process on the same job directory: finished jobs are reused
+        reloaded = JobQueue(root, args.workers, init_analysis_worker, (CONFIG["extraction"],))
+        t = time.perf_counter()
+        again = [reloaded.submit(analysis_job_id(spec), run_analysis_job, spec) for spec in specs]
+        reuse_ms = (time.perf_counter() - t) * 1000
+        done = sum(reloaded.status(i)["state"] == "done" for i in again)
+        print(f"after reload: {done}/{len(again)} answered from disk in {reuse_ms:.1f} ms total, "
+              f"{reloaded.active()} recomputed")
+        reloaded.shutdown()
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+# ✅ File: bench_keypoint_store.py (JSON vs .kps reference loading)
+#
+# Run from the repo root:  python -m benchmarks.bench_keypoint_store
+
+import json
+import time
+import tracemalloc
+from pathlib import Path
+
+import numpy as np
+
+from utils.keypoint_store import load_track
+
+REFERENCE_DIR = Path("reference_data")
+
+def _json_path(path: Path):
+    # What app.main did before the binary store: parse, then build the array
+    with open(path) as f:
+        data = json.load(f)
+    keypoints = data["keypoints"] if isinstance(data, dict) else data
+    return np.array(keypoints)
+
+def _kps_path(path: Path):
+    arr, _ = load_track(path)
+    return arr
+
+def measure(fn, path: Path, repeats: int = 20):
+    fn(path)  # warm the page cache
+    start = time.perf_counter()
+    for _ in range(repeats):
+        fn(path)
+    elapsed = (time.perf_counter() - start) / repeats
+    tracemalloc.start()
+    fn(path)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak
+
+def main():
+    print(f"{'reference':<22}{'json ms':>10}{'kps ms':>10}{'speedup':>9}{'json MB':>10}{'kps MB':>10}")
+    for json_path in sorted(REFERENCE_DIR.glob("*_correct.json")):
+        kps_path = json_path.with_suffix(".kps")
+        if not kps_path.exists():
+            print(f"{json_path.name:<22} (no .kps, run python -m utils.keypoint_store first)")
+            continue
+        json_t, json_mem = measure(_json_path, json_path)
+        kps_t, kps_mem = measure(_kps_path, kps_path)
+        print(f"{json_path.stem:<22}{json_t * 1e3:>10.2f}{kps_t * 1e3:>10.3f}{json_t / kps_t:>8.0f}x"
+              f"{json_mem / 1e6:>10.2f}{kps_mem / 1e6:>10.3f}")
+
+if __name__ == "__main__":
+    main()
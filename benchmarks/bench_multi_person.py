@@ -0,0 +1,122 @@
+# ✅ File: bench_multi_person.py (multi-person tracking on synthetic group clips)
+#
+# Builds clips with 1..4 people side by side from the sample videos, tracks them
+# with utils/multi_person.py and checks every person against a single-person pass
+# over their own source video.
+#
+# Run from the repo root:  python -m benchmarks.bench_multi_person [--people 1 2 3 4] [--frames 150]
+
+import argparse
+import os
+import tempfile
+import time
+from typing import List, Tuple
+
+import cv2
+import numpy as np
+
+from config import CONFIG
+from utils import profiling
+from utils.multi_person import analyze_people, extract_person_tracks
+from utils.pose_estimation import count_reps, extract_pose_track
+from utils.reference_registry import get_registry
+
+SOURCES = [
+    ("reference_videos/press_perfect.mp4", "press"),
+    ("reference_videos/squat_perfect.mp4", "squat"),
+    ("reference_videos/sh.mp4", "squat"),
+    ("reference_videos/deadlift_perfect.mp4", "deadlift"),
+]
+
+def tile_videos(videos: List[str], out_path: str, height: int, frames: int) -> List[Tuple[int, int]]:
+    # Side-by-side clip of the first `frames` frames of each video at a common
+    # height; returns each tile's (x offset, width) in pixels
+    caps = [cv2.VideoCapture(v) for v in videos]
+    sizes = [(int(c.get(cv2.CAP_PROP_FRAME_WIDTH)), int(c.get(cv2.CAP_PROP_FRAME_HEIGHT))) for c in caps]
+    widths = [int(round(w * height / h)) for w, h in sizes]
+    offsets = np.concatenate([[0], np.cumsum(widths)[:-1]]).astype(int).tolist()
+    fps = caps[0].get(cv2.CAP_PROP_FPS) or 30.0
+    out = cv2.VideoWriter(out_path, cv2.VideoWriter_fourcc(*"mp4v"), fps, (sum(widths), height))
+    for _ in range(frames):
+        tiles = []
+        for cap, w in zip(caps, widths):
+            ok, frame = cap.read()
+            tiles.append(cv2.resize(frame, (w, height), interpolation=cv2.INTER_AREA) if ok
+                         else np.zeros((height, w, 3), np.uint8))
+        out.write(np.hstack(tiles))
+    out.release()
+    for cap in caps:
+        cap.release()
+    return list(zip(offsets, widths))
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--people", type=int, nargs="+", default=[1, 2, 3, 4])
+    parser.add_argument("--frames", type=int, default=150)
+    parser.add_argument("--height", type=int, default=360)
+    parser.add_argument("--workers", type=int, default=1, help="Threads for per-person inference")
+    args = parser.parse_args()
+
+    params = CONFIG["extraction"]
+    truth = {}
+    for video, _ in SOURCES:
+        track = extract_pose_track(video, **dict(params, warmup_trim=0))
+        truth[video] = track
+
+    print(f"{'people':>6}{'width':>7}{'tracks':>8}{'seconds':>9}{'ms/frame':>10}{'infer/frame':>13}"
+          f"{'recall':>8}{'error':>8}{'id switches':>13}{'reps ok':>9}{'analysis s':>12}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in args.people:
+            sources = SOURCES[:n]
+            clip = os.path.join(tmp, f"group{n}.mp4")
+            tiles = tile_videos([v for v, _ in sources], clip, args.height, args.frames)
+            width = sum(w for _, w in tiles)
+            start = time.perf_counter()
+            with profiling.trace(memory=False) as t:
+                tracks = extract_person_tracks(clip, params, max_people=n, workers=args.workers)
+            seconds = time.perf_counter() - start
+            inferences = sum(r["frames"] for r in t.records if r["name"] == "extract_person_tracks.inference")
+
+            # Assign each track to the tile holding most of its detections
+            owner = {}
+            for i, track in tracks.items():
+                xs = track.points[track.detected, 0, 0] * width
+                centers = [off + w / 2 for off, w in tiles]
+                owner[i] = int(np.argmin([abs(np.median(xs) - c) for c in centers]))
+            recalls, errors, switches, reps_ok = [], [], 0, 0
+            analysed = {}
+            for t, ((video, exercise), (off, w)) in enumerate(zip(sources, tiles)):
+                mine = [i for i in tracks if owner[i] == t]
+                switches += max(0, len(mine) - 1)
+                gt = truth[video]
+                expected = gt.detected[:args.frames]
+                hits, errs = 0, []
+                for f in np.flatnonzero(expected):
+                    got = next((tracks[i].points[f] for i in mine if f < tracks[i].frames and tracks[i].detected[f]), None)
+                    if got is None:
+                        continue
+                    hits += 1
+                    # Both in tile-normalised x, frame-normalised y
+                    p = got[:, :2] * (width / w, 1) - (off / w, 0)
+                    errs.append(np.mean(np.linalg.norm(gt.points[f, :, :2] - p, axis=-1)))
+                recalls.append(hits / max(1, expected.sum()))
+                errors.append(np.mean(errs) if errs else np.nan)
+                if mine:
+                    single = extract_pose_track(video, **params)
+                    single_reps = count_reps(single.keypoints[:max(0, args.frames - params["warmup_trim"])], exercise)
+                    got_reps = count_reps(tracks[mine[0]].keypoints, exercise)
+                    reps_ok += int((got_reps[-1][0] if got_reps else 0) == (single_reps[-1][0] if single_reps else 0))
+                    if get_registry(CONFIG).get(exercise) is not None:
+                        analysed[mine[0]] = exercise
+            # Full per-person analysis (grouped by exercise, each group on threads)
+            start = time.perf_counter()
+            for exercise in set(analysed.values()):
+                analyze_people({i: tracks[i] for i, e in analysed.items() if e == exercise}, exercise, CONFIG)
+            analysis_seconds = time.perf_counter() - start
+            frames = args.frames
+            print(f"{n:>6}{width:>7}{len(tracks):>8}{seconds:>9.2f}{seconds / frames * 1000:>10.1f}"
+                  f"{inferences / frames:>13.2f}{np.mean(recalls):>8.2f}"
+                  f"{np.nanmean(errors):>8.3f}{switches:>13}{reps_ok:>7}/{n}{analysis_seconds:>12.2f}")
+
+if __name__ == "__main__":
+    main()
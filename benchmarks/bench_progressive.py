@@ -0,0 +1,48 @@
+# ✅ File: bench_progressive.py (time to first partial result and cost of chunked analysis)
+#
+# Run from the repo root:  python -m benchmarks.bench_progressive
+
+import time
+
+from config import CONFIG
+from utils.analysis import analyze_exercise, analyze_progressively
+from utils.pose_estimation import extract_pose_track
+from utils.reference_registry import get_registry
+
+# (video, selected exercise); the last two are deliberate mismatches
+CASES = [
+    ("reference_videos/press_perfect.mp4", "press"),
+    ("reference_videos/squat_perfect.mp4", "squat"),
+    ("reference_videos/sh.mp4", "squat"),
+    ("reference_videos/press_perfect.mp4", "squat"),
+    ("reference_videos/squat_perfect.mp4", "press"),
+]
+
+def main():
+    registry = get_registry(CONFIG)
+    print(f"{'video':<38}{'exercise':>9}{'batch s':>9}{'first s':>9}{'progr. s':>10}{'early-exit s':>14}{'grade':>7}")
+    for video, exercise in CASES:
+        reference = registry.get(exercise)
+        start = time.perf_counter()
+        track = extract_pose_track(video, **CONFIG["extraction"])
+        batch = analyze_exercise(track, exercise, reference.path, CONFIG, reference)
+        batch_s = time.perf_counter() - start
+
+        timings = {}
+        for early_exit in (False, True):
+            start = time.perf_counter()
+            first = None
+            for state in analyze_progressively(video, exercise, CONFIG, reference, early_exit=early_exit):
+                if first is None:
+                    first = time.perf_counter() - start
+                final = state
+            timings[early_exit] = (first, time.perf_counter() - start, final)
+        first_s, progressive_s, final = timings[False]
+        early_s, early = timings[True][1], timings[True][2]
+        assert final["results"]["feedback"]["performance_grade"] == batch["feedback"]["performance_grade"]
+        early_cell = f"{early_s:.2f}" + (" (stop)" if early["stopped_early"] else "")
+        print(f"{video:<38}{exercise:>9}{batch_s:>9.2f}{first_s:>9.2f}{progressive_s:>10.2f}"
+              f"{early_cell:>14}{batch['feedback']['performance_grade']:>7}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,31 @@
+# ✅ File: bench_render.py (per-stage throughput of the annotated-video pipeline)
+#
+# Run from the repo root:  python -m benchmarks.bench_render [--videos ...] [--queue-size 8]
+
+import argparse
+import glob
+import os
+import tempfile
+
+from utils.pose_estimation import count_reps, create_annotated_video_opencv, extract_pose_track
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--videos", nargs="+", default=sorted(glob.glob("reference_videos/*.mp4")))
+    parser.add_argument("--queue-size", type=int, default=8)
+    args = parser.parse_args()
+
+    print(f"{'video':<22}{'decode fps':>11}{'annot fps':>11}{'encode fps':>11}{'sum of stages s':>17}{'wall s':>8}")
+    for video in args.videos:
+        track = extract_pose_track(video, warmup_trim=60)
+        reps = count_reps(track.keypoints, "squat") if len(track) else None
+        stats = {}
+        with tempfile.TemporaryDirectory() as tmp:
+            create_annotated_video_opencv(video, os.path.join(tmp, "out.mp4"), [], reps, track=track,
+                                          queue_size=args.queue_size, stats=stats)
+        serial = sum(stats[s]["busy_s"] for s in ("decode", "process", "encode"))
+        print(f"{os.path.basename(video):<22}{stats['decode']['fps']:>11.1f}{stats['process']['fps']:>11.1f}"
+              f"{stats['encode']['fps']:>11.1f}{serial:>17.3f}{stats['total']['wall_s']:>8.3f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+# ✅ File: bench_rep_counter.py (streaming RepCounter vs batch count_reps: agreement and memory)
+#
+# Run from the repo root:  python -m benchmarks.bench_rep_counter [--skip-video]
+
+import argparse
+import time
+import tracemalloc
+
+from benchmarks.synthetic import synthetic_track
+from utils.pose_estimation import count_reps, extract_pose_track
+from utils.rep_counter import RepCounter, count_reps_streaming
+
+VIDEOS = [
+    ("reference_videos/squat_perfect.mp4", "squat"),
+    ("reference_videos/press_perfect.mp4", "press"),
+    ("reference_videos/deadlift_perfect.mp4", "deadlift"),
+    ("reference_videos/sh.mp4", "press"),
+    ("uploads/user_press.mp4", "press"),
+    ("uploads/sqaut.mp4", "squat"),
+    ("uploads/user_pushup.mp4", "pushup"),
+]
+
+def completion_frames(reps):
+    return [i for i in range(len(reps)) if reps[i][0] != (reps[i - 1][0] if i else 0)]
+
+def agreement(keypoints, exercise):
+    batch = count_reps(keypoints, exercise)
+    stream = count_reps_streaming(keypoints, exercise)
+    offsets = [s - b for b, s in zip(completion_frames(batch), completion_frames(stream))]
+    return batch[-1][0], stream[-1][0], max(map(abs, offsets), default=0)
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    fn(*args)
+    return time.perf_counter() - start
+
+def peak_memory(fn, *args):
+    tracemalloc.start()
+    fn(*args)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak / 1e6
+
+def run_counter(keypoints, exercise):
+    counter = RepCounter(exercise)
+    for kp in keypoints:
+        counter.update(kp)
+    counter.finish()
+    return counter.count
+
+def streaming_pass(frames, exercise):
+    # Generates frames in 1000-frame blocks, so only one block plus the counter state is ever held
+    counter = RepCounter(exercise)
+    for start in range(0, frames, 1000):
+        for kp in synthetic_track(1000, exercise, rep_frames=75, seed=start).tolist():
+            counter.update(kp)
+    counter.finish()
+    return counter.count
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--skip-video", action="store_true")
+    args = parser.parse_args()
+
+    if not args.skip_video:
+        print(f"{'video':<40}{'exercise':>10}{'batch':>7}{'stream':>8}{'max shift':>11}")
+        for video, exercise in VIDEOS:
+            track = extract_pose_track(video, warmup_trim=60)
+            batch, stream, shift = agreement(track.keypoints, exercise)
+            print(f"{video:<40}{exercise:>10}{batch:>7}{stream:>8}{shift:>11}")
+        print()
+
+    # Time on the same in-memory track; peak memory of the streaming side
+    # includes the 1000-frame block being generated
+    print(f"{'frames':>8}{'batch s':>10}{'stream s':>10}{'batch MB':>10}{'stream MB':>11}")
+    for frames in (1000, 10000, 100000):
+        keypoints = synthetic_track(frames, "squat", rep_frames=75, seed=1).tolist()
+        batch_s = timed(count_reps, keypoints, "squat")
+        stream_s = timed(run_counter, keypoints, "squat")
+        batch_mb = peak_memory(count_reps, keypoints, "squat")
+        del keypoints
+        stream_mb = peak_memory(streaming_pass, frames, "squat")
+        print(f"{frames:>8}{batch_s:>10.3f}{stream_s:>10.3f}{batch_mb:>10.2f}{stream_mb:>11.2f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+# ✅ File: bench_result_render.py (result page payload and build time vs number of deviating frames)
+#
+# Builds the results' frame deviation log and deviation chart for synthetic
+# long, badly performed sets two ways: the previous code (a string appended per
+# deviating frame with an argmax each, and every deviation as a Plotly point) and
+# result_views (one array operation for the log, one page of it sent as a table,
+# and an LTTB-downsampled curve with its min/max band). Payload is what the
+# server sends for the chart and the log (Plotly JSON + log text or the page's
+# Arrow table); "status" is the partial result a running job writes to its
+# status file every poll. Times include serialising the payload.
+#
+# Run from the repo root:  python -m benchmarks.bench_result_render [--frames 1000 10000 100000]
+
+import argparse
+import json
+import time
+
+import numpy as np
+import plotly.graph_objects as go
+import plotly.io
+from streamlit import dataframe_util
+
+from app import deviation_figure
+from config import CONFIG
+from utils.analysis_cache import json_default
+from utils.features import landmark_names
+from utils.result_views import deviation_arrays, deviation_series, frame_log, log_page
+
+JOINT_NAMES = landmark_names(CONFIG["keypoint_indices"])
+
+def synthetic_results(frames: int, flagged: float, seed: int = 0):
+    # compare_pose-shaped output: errors over a rep-like curve, `flagged` of the frames deviating
+    rng = np.random.default_rng(seed)
+    joint_errors = np.abs(np.sin(np.arange(frames) / 25.0))[:, None] * rng.uniform(0.1, 0.4, (frames, 12))
+    total = joint_errors.mean(axis=1) + rng.normal(0, 0.02, frames)
+    ids = np.sort(rng.choice(frames, int(frames * flagged), replace=False))
+    diff_frames = [(int(i), total[i], "high" if total[i] > 0.2 else "medium") for i in ids]
+    return diff_frames, joint_errors
+
+def previous_view(diff_frames, joint_errors) -> int:
+    # The log and chart as app.render_results built them before result_views
+    scroll_log = ""
+    for i, (frame_idx, total_error, _) in enumerate(diff_frames):
+        if frame_idx < len(joint_errors):
+            joint_error_arr = joint_errors[frame_idx]
+            max_error_idx = int(np.argmax(joint_error_arr))
+            joint_name = JOINT_NAMES[max_error_idx] if max_error_idx < len(JOINT_NAMES) else f"joint {max_error_idx}"
+            max_error = joint_error_arr[max_error_idx]
+            scroll_log += f"Frame {{{frame_idx}}} -- MAX Error at {joint_name} = {max_error:.2f} -- Total Error = {total_error:.2f}\n"
+    fig = go.Figure()
+    fig.add_trace(go.Scatter(x=[f[0] for f in diff_frames], y=[f[1] for f in diff_frames], mode='lines+markers',
+                             marker=dict(color='crimson')))
+    fig.update_layout(title='📉 Frame-wise Form Deviation', xaxis_title='Frame Index', yaxis_title='Deviation Score')
+    return len(plotly.io.to_json(fig, validate=False)) + len(scroll_log.strip().encode())
+
+def current_view(diff_frames, joint_errors, page: int = 0) -> int:
+    frames, errors, severity = deviation_arrays(diff_frames)
+    log = frame_log(frames, errors, severity, joint_errors, JOINT_NAMES)
+    table = dataframe_util.convert_anything_to_arrow_bytes(log_page(log, page, CONFIG["results"]["log_page_size"]))
+    fig = deviation_figure(deviation_series(frames, errors, CONFIG["results"]["chart_points"]))
+    return len(plotly.io.to_json(fig, validate=False)) + len(table)
+
+def status_bytes(diff_frames, downsampled: bool) -> int:
+    if not downsampled:
+        return len(json.dumps({"diff_frames": diff_frames}, default=json_default))
+    frames, errors, _ = deviation_arrays(diff_frames)
+    return len(json.dumps({"deviation": deviation_series(frames, errors, CONFIG["results"]["chart_points"])}))
+
+def best_of(fn, repeats: int):
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        out = fn()
+        times.append(time.perf_counter() - start)
+    return min(times), out
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--frames", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--flagged", type=float, default=0.8, help="Share of frames flagged as deviating")
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'frames':>8}{'deviations':>12}{'before KB':>11}{'after KB':>10}{'before ms':>11}{'after ms':>10}"
+          f"{'last page ms':>14}{'status before KB':>18}{'status after KB':>17}")
+    for frames in args.frames:
+        diff_frames, joint_errors = synthetic_results(frames, args.flagged)
+        before_s, before = best_of(lambda: previous_view(diff_frames, joint_errors), args.repeats)
+        after_s, after = best_of(lambda: current_view(diff_frames, joint_errors), args.repeats)
+        # Turning to the last page: only the page's rows are sliced and serialised
+        frames_, errors, severity = deviation_arrays(diff_frames)
+        log = frame_log(frames_, errors, severity, joint_errors, JOINT_NAMES)
+        last = (len(log["Frame"]) - 1) // CONFIG["results"]["log_page_size"]
+        page_s, _ = best_of(lambda: dataframe_util.convert_anything_to_arrow_bytes(
+            log_page(log, last, CONFIG["results"]["log_page_size"])), args.repeats)
+        print(f"{frames:>8}{len(diff_frames):>12}{before / 1024:>11.0f}{after / 1024:>10.0f}"
+              f"{before_s * 1000:>11.1f}{after_s * 1000:>10.1f}{page_s * 1000:>14.2f}"
+              f"{status_bytes(diff_frames, False) / 1024:>18.0f}{status_bytes(diff_frames, True) / 1024:>17.0f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+# ✅ File: bench_session_history.py (session history load test: inserts and trend-query latency at volume)
+#
+# Fills a fresh SessionHistory with synthetic sessions (12 joint errors and 5-15
+# reps each) spread over two years and `--users` users, plus one heavy user (a
+# shared gym kiosk account) holding `--heavy` of them. It then times the queries
+# behind the app's trend charts for random users and for the heavy one. The
+# same queries run again with the sessions indexes dropped, to show what the
+# indexes buy. Latencies are the median and 95th percentile in milliseconds.
+#
+# Run from the repo root:  python -m benchmarks.bench_session_history [--sessions 300000] [--users 1000]
+
+import argparse
+import os
+import sqlite3
+import tempfile
+import time
+
+import numpy as np
+
+from config import CONFIG
+from utils.session_history import GRADE_SCORES, SessionHistory
+
+EXERCISES = list(CONFIG["exercise_thresholds"])
+GRADES = list(GRADE_SCORES)
+
+def synthetic_summary(rng: np.random.Generator) -> dict:
+    grade = GRADES[rng.integers(len(GRADES))]
+    frames = int(rng.integers(300, 3000))
+    reps = [{"rep": r + 1, "start_frame": r * 60, "end_frame": r * 60 + 60, "seconds": 2.0,
+             "quality": "Good" if rng.random() < 0.7 else "Partial", "mean_error": float(rng.random()),
+             "deviations": int(rng.integers(0, 30))} for r in range(int(rng.integers(5, 16)))]
+    session = {"grade": grade, "score": GRADE_SCORES[grade], "frames": frames, "deviations": int(frames * rng.random()),
+               "mean_error": float(rng.random()), "reps": len(reps),
+               "good_reps": sum(r["quality"] == "Good" for r in reps), "rom": float(rng.uniform(60, 160)),
+               "detected": None, "confidence": float(rng.random())}
+    joints = [(landmark, float(rng.random())) for landmark in CONFIG["keypoint_indices"]]
+    return {"session": session, "joints": joints, "reps": reps}
+
+def fill(history: SessionHistory, sessions: int, users: int, heavy: int, batch: int = 5000) -> float:
+    rng = np.random.default_rng(0)
+    now = time.time()
+    start = time.perf_counter()
+    for first in range(0, sessions, batch):
+        entries = []
+        for i in range(first, min(first + batch, sessions)):
+            user = "kiosk" if i < heavy else f"user{rng.integers(users):05d}"
+            entries.append((user, EXERCISES[rng.integers(len(EXERCISES))], f"job{i}", synthetic_summary(rng),
+                            now - rng.uniform(0, 730 * 86400)))
+        history.add_many(entries)
+    return time.perf_counter() - start
+
+def latency(fn, args_list) -> tuple:
+    times = []
+    for args in args_list:
+        start = time.perf_counter()
+        fn(*args)
+        times.append((time.perf_counter() - start) * 1000)
+    return float(np.median(times)), float(np.percentile(times, 95))
+
+def query_table(history: SessionHistory, users: int, samples: int) -> dict:
+    rng = np.random.default_rng(1)
+    last = CONFIG["history"]["trend_sessions"]
+    picks = [(f"user{rng.integers(users):05d}", EXERCISES[rng.integers(len(EXERCISES))]) for _ in range(samples)]
+    heavy = [("kiosk", EXERCISES[i % len(EXERCISES)]) for i in range(samples)]
+    session_ids = [(int(i),) for i in rng.integers(1, 1000, samples)]
+    queries = {
+        "recent": lambda u, e: history.recent(u, e, last),
+        "worst_joints": lambda u, e: history.worst_joints(u, e, last),
+        "daily (90 days)": lambda u, e: history.daily(u, e, 90),
+        "totals": lambda u, e: history.totals(u, e),
+    }
+    table = {name: (latency(fn, picks), latency(fn, heavy)) for name, fn in queries.items()}
+    table["reps of a session"] = (latency(history.reps, session_ids), (float("nan"), float("nan")))
+    return table
+
+def print_table(title: str, table: dict) -> None:
+    print(title)
+    print(f"{'query':>20}{'user p50':>11}{'p95':>9}{'heavy p50':>12}{'p95':>9}")
+    for name, ((p50, p95), (h50, h95)) in table.items():
+        print(f"{name:>20}{p50:>11.2f}{p95:>9.2f}{h50:>12.2f}{h95:>9.2f}")
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sessions", type=int, default=300000)
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--heavy", type=int, default=50000, help="Sessions of the one heavy (kiosk) user")
+    parser.add_argument("--samples", type=int, default=200, help="Queries timed per row")
+    parser.add_argument("--db", default=None, help="SQLite file to use (default: a temporary one)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = args.db or os.path.join(tmp, "sessions.db")
+        history = SessionHistory(path)
+        insert_s = fill(history, args.sessions, args.users, args.heavy)
+        with sqlite3.connect(path) as conn:
+            conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+            rows = {t: conn.execute(f"SELECT COUNT(*) FROM {t}").fetchone()[0]
+                    for t in ("sessions", "session_joints", "reps")}
+        size = os.path.getsize(path)
+        print(f"inserted {rows['sessions']} sessions ({rows['session_joints']} joint rows, {rows['reps']} reps) "
+              f"in {insert_s:.1f}s ({rows['sessions'] / insert_s:.0f} sessions/s); "
+              f"{size / 1e6:.0f} MB, {size / rows['sessions']:.0f} bytes per session")
+        print_table("\nwith indexes (ms)", query_table(history, args.users, args.samples))
+
+        with sqlite3.connect(path) as conn:
+            for index in ("sessions_user_exercise_created", "sessions_user_created", "sessions_created"):
+                conn.execute(f"DROP INDEX {index}")
+        print_table("\nwithout the sessions indexes (ms; UNIQUE (user, source) still narrows by user)",
+                    query_table(history, args.users, max(10, args.samples // 10)))
+
+if __name__ == "__main__":
+    main()
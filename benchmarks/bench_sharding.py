@@ -0,0 +1,103 @@
+# ✅ File: bench_sharding.py (one long video extracted sequentially vs split into time segments)
+#
+# Builds a long clip by looping a sample video, extracts it in one pass and then
+# with 2/4/8 segments (one worker process per segment), and compares wall time and
+# the stitched track with the sequential one. Each worker reports the CPU time its
+# segment took, so besides the measured speedup (bounded by the cores this box
+# has) the table shows the critical path: the most expensive segment plus process
+# start-up, which is the wall time with at least one free core per segment.
+#
+# Run from the repo root:  python -m benchmarks.bench_sharding [--seconds 120] [--segments 2 4 8]
+
+import argparse
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+
+import cv2
+import numpy as np
+
+from config import CONFIG
+from utils import profiling
+from utils.pose_estimation import count_reps, extract_pose_track
+from utils.sharded_extraction import extract_pose_track_sharded
+
+JOINTS = CONFIG["keypoint_indices"]
+
+def loop_video(source: str, seconds: float, out_path: str) -> int:
+    # Repeat `source` until the clip is `seconds` long; returns the frame count
+    frames = []
+    cap = cv2.VideoCapture(source)
+    fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
+    while True:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        frames.append(frame)
+    cap.release()
+    height, width = frames[0].shape[:2]
+    writer = cv2.VideoWriter(out_path, cv2.VideoWriter_fourcc(*"mp4v"), fps, (width, height))
+    total = int(seconds * fps)
+    for i in range(total):
+        writer.write(frames[i % len(frames)])
+    writer.release()
+    return total
+
+def _ready() -> int:
+    return os.getpid()
+
+def startup_seconds() -> float:
+    # A fresh spawned worker importing the extraction stack (MediaPipe, OpenCV)
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=1, mp_context=get_context("spawn")) as pool:
+        pool.submit(_ready).result()
+    return time.perf_counter() - start
+
+def compare(seq, other):
+    same_frames = seq.frames == other.frames and np.array_equal(seq.detected, other.detected)
+    both = seq.detected & other.detected if seq.frames == other.frames else np.zeros(0, dtype=bool)
+    err = np.linalg.norm(seq.points[both][:, JOINTS, :2] - other.points[both][:, JOINTS, :2], axis=-1)
+    return same_frames, float(err.mean()) if err.size else float("nan"), float(err.max()) if err.size else float("nan")
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--video", default="uploads/user_press.mp4")
+    parser.add_argument("--exercise", default="press")
+    parser.add_argument("--seconds", type=float, default=120.0, help="Length of the looped clip")
+    parser.add_argument("--segments", type=int, nargs="+", default=[2, 4, 8])
+    parser.add_argument("--overlap", type=float, default=CONFIG["sharding"]["overlap_seconds"],
+                        help="Warm-up seconds decoded before each segment")
+    args = parser.parse_args()
+
+    params = CONFIG["extraction"]
+    with tempfile.TemporaryDirectory() as tmp:
+        video = os.path.join(tmp, "long.mp4")
+        total = loop_video(args.video, args.seconds, video)
+        startup = startup_seconds()
+        print(f"{total} frames ({args.seconds:.0f}s), {os.cpu_count()} CPU(s), worker start-up {startup:.1f}s")
+
+        start, cpu = time.perf_counter(), time.process_time()
+        seq = extract_pose_track(video, **params)
+        seq_s, seq_cpu = time.perf_counter() - start, time.process_time() - cpu
+        seq_reps = count_reps(seq.keypoints, args.exercise)[-1][0]
+        print(f"{'segments':>8}{'wall s':>9}{'speedup':>9}{'critical s':>12}{'speedup (≥1 core/seg)':>23}"
+              f"{'decoded/owned':>15}{'same frames':>13}{'mean xy err':>13}{'max xy err':>12}{'reps':>7}")
+        print(f"{1:>8}{seq_s:>9.1f}{1.0:>9.2f}{seq_cpu:>12.1f}{1.0:>23.2f}{1.0:>15.2f}{'-':>13}{'-':>13}{'-':>12}"
+              f"{seq_reps:>7}")
+        for segments in args.segments:
+            with profiling.trace(memory=False) as trace:
+                start = time.perf_counter()
+                track = extract_pose_track_sharded(video, params, segments, args.overlap, workers=segments)
+                wall = time.perf_counter() - start
+            records = [r for r in trace.records if r["name"] == "extract_sharded.segment"]
+            critical = max(r["cpu_s"] for r in records) + startup
+            decoded = sum(r["frames"] + r["warmup"] for r in records) / max(1, sum(r["frames"] for r in records))
+            same, mean_err, max_err = compare(seq, track)
+            reps = count_reps(track.keypoints, args.exercise)[-1][0]
+            print(f"{segments:>8}{wall:>9.1f}{seq_s / wall:>9.2f}{critical:>12.1f}{seq_cpu / critical:>23.2f}"
+                  f"{decoded:>15.2f}{str(same):>13}{mean_err:>13.4f}{max_err:>12.4f}{reps:>7}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+# ✅ File: bench_stride.py (accuracy vs speed of strided / downscaled extraction)
+#
+# Run from the repo root:  python -m benchmarks.bench_stride [--videos reference_videos/*.mp4]
+
+import argparse
+import glob
+import time
+
+import numpy as np
+
+from utils.pose_estimation import count_reps, extract_pose_track
+
+JOINTS = [11, 12, 13, 14, 15, 16, 23, 24, 25, 26, 27, 28]
+SETTINGS = [(1, None), (2, None), (3, None), (1, 360), (2, 360), (3, 256)]
+EXERCISES = {"squat": "squat", "press": "press", "deadlift": "deadlift", "sh": "press"}
+
+def landmark_error(full, other):
+    # Mean xy distance (normalised image units) over frames detected in both runs
+    n = min(full.frames, other.frames)
+    both = full.detected[:n] & other.detected[:n]
+    if not both.any():
+        return float("nan")
+    a, b = full.points[:n][both][:, JOINTS, :2], other.points[:n][both][:, JOINTS, :2]
+    return float(np.linalg.norm(a - b, axis=-1).mean())
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--videos", nargs="+", default=sorted(glob.glob("reference_videos/*.mp4")))
+    args = parser.parse_args()
+
+    print(f"{'video':<22}{'stride':>7}{'height':>7}{'time s':>9}{'speedup':>9}{'xy err':>9}{'reps':>6}{'detected':>10}")
+    for video in args.videos:
+        exercise = next((v for k, v in EXERCISES.items() if k in video), "squat")
+        baseline = None
+        for stride, height in SETTINGS:
+            start = time.perf_counter()
+            track = extract_pose_track(video, warmup_trim=60, stride=stride, target_height=height)
+            elapsed = time.perf_counter() - start
+            reps = count_reps(track.keypoints, exercise)[-1][0] if len(track) else 0
+            if baseline is None:
+                baseline = (track, elapsed)
+            err = landmark_error(baseline[0], track)
+            print(f"{video.split('/')[-1]:<22}{stride:>7}{height or '-':>7}{elapsed:>9.2f}"
+                  f"{baseline[1] / elapsed:>8.1f}x{err:>9.4f}{reps:>6}{len(track):>10}")
+
+if __name__ == "__main__":
+    main()
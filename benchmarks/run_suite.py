@@ -0,0 +1,167 @@
+# ✅ File: run_suite.py (benchmark suite with stored-baseline regression check)
+#
+# Run from the repo root (CPU only, offline):
+#   python -m benchmarks.run_suite                          # full suite, compare to baseline
+#   python -m benchmarks.run_suite --frames 1000 10000      # smaller synthetic sizes
+#   python -m benchmarks.run_suite --skip-video             # synthetic cases only
+#   python -m benchmarks.run_suite --save-baseline          # record a new baseline
+#   python -m benchmarks.run_suite --fail-on-regression     # exit 1 on regressions (CI)
+
+import argparse
+import glob
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Callable, Dict, List
+
+import numpy as np
+
+from benchmarks.synthetic import synthetic_track
+from utils.compare import compare_pose, normalize_pose_proportional, normalize_poses
+from utils.feedback import FeedbackGenerator
+
+BASELINE_PATH = Path(__file__).with_name("baseline.json")
+INDICES = [11, 12, 13, 14, 15, 16, 23, 24, 25, 26, 27, 28]
+
+def measure(fn: Callable, repeats: int) -> Dict:
+    # Best-of-N wall time, then one traced run for peak memory (tracemalloc
+    # slows allocation down, so it is kept out of the timed runs)
+    fn()
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"seconds": best, "peak_mb": peak / 1e6}
+
+def synthetic_cases(frames: int) -> Dict[str, Callable]:
+    user = synthetic_track(frames, rep_frames=75, seed=1)
+    ref = synthetic_track(min(frames, 300), rep_frames=60, seed=2)
+    user_list = user.tolist()  # the app passes keypoints as nested lists
+    deviations, joint_errors, _ = compare_pose(user, ref, INDICES, 0.15, "squat")
+
+    # Imported lazily so the synthetic cases also run where MediaPipe is missing
+    from utils.pose_estimation import count_reps, detect_exercise_type_with_confidence
+
+    return {
+        "normalize_pose_proportional": lambda: [normalize_pose_proportional(f) for f in user_list],
+        "normalize_poses": lambda: normalize_poses(user),
+        "compare_pose.window": lambda: compare_pose(user, ref, INDICES, 0.15, "squat"),
+        "compare_pose.dtw": lambda: compare_pose(user, ref, INDICES, 0.15, "squat", alignment="dtw"),
+        "count_reps": lambda: count_reps(user_list, "squat"),
+        "detect_exercise_type": lambda: detect_exercise_type_with_confidence(user_list),
+        "generate_feedback": lambda: FeedbackGenerator().generate_feedback(
+            deviations, frames, 0.3, joint_errors),
+    }
+
+def video_cases(videos: List[str]) -> Dict[str, Callable]:
+    from utils.pose_estimation import count_reps, create_annotated_video_opencv, extract_pose_track
+
+    cases = {}
+    for video in videos:
+        name = Path(video).stem
+
+        def extract(video=video):
+            return extract_pose_track(video, warmup_trim=60)
+
+        track = extract()
+        reps = count_reps(track.keypoints, "squat") if len(track) else None
+
+        def render(video=video, track=track, reps=reps):
+            with tempfile.TemporaryDirectory() as tmp:
+                create_annotated_video_opencv(video, os.path.join(tmp, "out.mp4"), [], reps, track=track)
+
+        cases[f"extract_pose_track[{name}]"] = (extract, track.frames)
+        cases[f"render[{name}]"] = (render, track.frames)
+    return cases
+
+def machine_info() -> Dict:
+    return {"python": platform.python_version(), "numpy": np.__version__,
+            "machine": platform.machine(), "cpus": os.cpu_count()}
+
+def compare_to_baseline(results: Dict, baseline: Dict, tolerance: float,
+                        min_seconds: float = 0.02) -> List[str]:
+    regressions = []
+    for key, row in results.items():
+        base = baseline.get("results", {}).get(key)
+        if base is None:
+            row["vs_baseline"] = None
+            continue
+        ratio = row["seconds"] / base["seconds"] if base["seconds"] > 0 else 1.0
+        row["vs_baseline"] = ratio
+        # Very short cases are dominated by timer and scheduler noise; report the ratio but never flag them
+        if ratio > 1 + tolerance and row["seconds"] >= min_seconds:
+            regressions.append(f"{key}: {row['seconds']:.4f}s vs baseline {base['seconds']:.4f}s ({ratio:.2f}x)")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--frames", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--videos", nargs="*", default=sorted(glob.glob("reference_videos/*.mp4")))
+    parser.add_argument("--skip-video", action="store_true", help="Only run the synthetic cases")
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--baseline", type=Path, default=BASELINE_PATH)
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed slowdown before flagging (0.25 = 25%%)")
+    parser.add_argument("--min-seconds", type=float, default=0.02, help="Ignore regressions on cases faster than this")
+    parser.add_argument("--fail-on-regression", action="store_true")
+    parser.add_argument("--json", type=Path, help="Also write the results to this file")
+    args = parser.parse_args()
+
+    results = {}
+    for frames in args.frames:
+        for name, fn in synthetic_cases(frames).items():
+            key = f"{name}@{frames}"
+            row = measure(fn, args.repeats)
+            row["frames"] = frames
+            results[key] = row
+    if not args.skip_video:
+        for name, (fn, frames) in video_cases(args.videos).items():
+            row = measure(fn, 1)
+            row["frames"] = frames
+            results[name] = row
+    for row in results.values():
+        row["fps"] = row["frames"] / row["seconds"] if row["seconds"] > 0 else None
+
+    baseline = {}
+    if args.baseline.exists() and not args.save_baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if baseline.get("machine") != machine_info():
+            print(f"⚠️ Baseline was recorded on {baseline.get('machine')}; comparisons are indicative only.")
+    regressions = compare_to_baseline(results, baseline, args.tolerance, args.min_seconds)
+
+    print(f"{'case':<46}{'frames':>8}{'seconds':>10}{'frames/s':>12}{'peak MB':>9}{'vs base':>9}")
+    for key, row in results.items():
+        vs = f"{row['vs_baseline']:.2f}x" if row.get("vs_baseline") else "-"
+        print(f"{key:<46}{row['frames']:>8}{row['seconds']:>10.4f}{row['fps']:>12.0f}{row['peak_mb']:>9.2f}{vs:>9}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"machine": machine_info(), "results": results}, f, indent=2)
+    if args.save_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump({"machine": machine_info(), "recorded": time.strftime("%Y-%m-%d"),
+                       "results": {k: {"seconds": v["seconds"], "peak_mb": v["peak_mb"]} for k, v in results.items()}},
+                      f, indent=2)
+        print(f"✅ Baseline saved to {args.baseline}")
+    elif regressions:
+        print(f"\n❌ {len(regressions)} regression(s) beyond {args.tolerance:.0%}:")
+        for line in regressions:
+            print(f"   {line}")
+        if args.fail_on_regression:
+            sys.exit(1)
+    elif baseline:
+        print("\n✅ No regressions against baseline.")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+# ✅ File: config.py (shared settings for the Streamlit app and headless tools)
+
+from pathlib import Path
+
+CONFIG = {
+    "reference_dir": Path("reference_data"),
+    "uploads_dir": Path("uploads"),
+    "temp_dir": Path("temp"),
+    "keypoint_indices": [11, 12, 13, 14, 15, 16, 23, 24, 25, 26, 27, 28],
+    # stride: run pose inference on every Nth frame (skipped frames are interpolated)
+    # target_height: downscale frames to this height before inference (None = source size)
+    # max_gap: interpolate detection gaps of up to this many frames (0 = off)
+    # min_visibility: joints less visible than this are left out of comparison and rep counting
+    "extraction": {"warmup_trim": 60, "stride": 1, "target_height": None,
+                   "min_detection_confidence": 0.6, "min_tracking_confidence": 0.6,
+                   "max_gap": 6, "min_visibility": 0.5},
+    # Uploads are streamed to uploads/sessions/<session id>/; the janitor removes
+    # session files older than max_age_hours, then oldest-first above the quota
+    "uploads": {"chunk_bytes": 1 << 20, "max_age_hours": 6,
+                "max_total_bytes": 5 * 1024 ** 3, "janitor_interval_s": 300},
+    # Nearest-neighbour exercise classifier over reference windows (frames).
+    # Below min_confidence the label is "unknown"; once preview_seconds of an
+    # upload have been analysed, the app can stop early when another exercise is
+    # recognised with at least mismatch_confidence
+    "classifier": {"window": 45, "hop": 15, "k": 3, "min_confidence": 0.5,
+                   "preview_seconds": 4, "mismatch_confidence": 0.8},
+    # Progressive analysis: partial results every chunk_seconds of video;
+    # early_exit is the default of the app's "stop on a wrong exercise" option
+    "progressive": {"chunk_seconds": 1.0, "early_exit": True},
+    # Live coaching: reps are counted once rep_warmup smoothed samples have set the
+    # running thresholds; the UI refreshes at most ui_fps times a second
+    "live": {"rep_warmup": 20, "ui_fps": 10},
+    # Annotated-video output. A profile sets codec (h264, vp8, mp4v or mjpg), height
+    # (None = source), bitrate, preset and crf (ffmpeg only; with crf the bitrate is a
+    # cap) and frame_step (keep every Nth frame). H.264 is encoded by ffmpeg (the `ffmpeg` path, None = look on PATH, False = never;
+    # GPU encoders are tried first when hardware is on). Without it the first fallback codec OpenCV can
+    # write is used. The app shows "preview" first and renders "full" in the background,
+    # checking for it every poll_seconds.
+    "encoding": {
+        "ffmpeg": None, "hardware": True, "fallback": ["vp8", "mp4v"], "poll_seconds": 2,
+        "profiles": {
+            "preview": {"codec": "h264", "height": 360, "bitrate": "600k", "crf": 28, "preset": "veryfast",
+                        "frame_step": 2},
+            "full": {"codec": "h264", "height": None, "bitrate": "2500k", "crf": 23, "preset": "medium",
+                     "frame_step": 1},
+        },
+    },
+    # Multi-person mode: up to max_people tracked at once, searching for new people every
+    # detect_every frames; people seen for less than min_seconds are dropped. workers
+    # threads run the per-person inference.
+    "multi_person": {"max_people": 4, "detect_every": 15, "min_seconds": 2.0, "workers": 1},
+    # One long video split across processes by time segment: videos of at least
+    # min_seconds get `segments` slices (None = one per extraction process: the CPUs
+    # divided among the job workers in the app, all CPUs in batch runs), each warmed up on
+    # overlap_seconds of the previous slice. batch_analyze.py shards with --segments.
+    "sharding": {"segments": None, "overlap_seconds": 2.0, "min_seconds": 120.0},
+    # Background analysis jobs: at most `workers` run at once across all sessions
+    # (None = half the CPUs); status, progress and results live under dir, and
+    # finished jobs are removed after the uploads' max_age_hours
+    "jobs": {"dir": Path("jobs"), "workers": None, "poll_seconds": 1.0},
+    # Content-addressed cache of tracks, results and annotated videos (LRU by size)
+    "cache": {"dir": Path("cache"), "max_bytes": 2 * 1024 ** 3},
+    # Result page: the deviation chart keeps at most chart_points points (plus a
+    # min/max band) and the frame log shows log_page_size rows per page
+    "results": {"chart_points": 1000, "log_page_size": 100},
+    # Per-user session history (SQLite): trend charts cover the latest trend_sessions
+    "history": {"path": Path("history/sessions.db"), "trend_sessions": 30},
+    # alignment: "window" (±4 frames, truncates to the reference length) or
+    # "dtw" (tempo-invariant, per-rep banded DTW; dtw_band in reference frames)
+    "exercise_thresholds": {
+        "squat": {"base": 0.15, "min_ratio": 0.3, "alignment": "window", "dtw_band": 30},
+        "press": {"base": 0.15, "min_ratio": 0.06, "alignment": "window", "dtw_band": 30},
+        "deadlift": {"base": 0.6, "min_ratio": 0.5, "alignment": "window", "dtw_band": 30},
+        "pushup": {"base": 0.5, "min_ratio": 0.6, "alignment": "window", "dtw_band": 30}
+    }
+}
@@ -1,7 +1,8 @@
 import json
 import os
 from pathlib import Path
-from utils.pose_estimation import extract_keypoints
+from utils.pose_estimation import extract_pose_track
+from utils.keypoint_store import save_track
 
 # Define only major body joints (exclude face, eyes, ears, nose)
 KEYPOINT_INDICES = [
@@ -14,11 +15,19 @@ KEYPOINT_INDICES = [
 ]
 
 def generate_reference_json(video_path: str, output_path: str):
-    keypoints = extract_keypoints(video_path, warmup_trim=60)
-    if not keypoints:
+    track = extract_pose_track(video_path, warmup_trim=60)
+    keypoints = track.keypoints
+    if not len(keypoints):
         print("❌ No keypoints found.")
         return
 
+    if Path(output_path).suffix == ".kps":
+        # Binary store keeps every landmark so compare_pose can index it directly
+        save_track(output_path, keypoints, fps=track.fps, source_video=video_path,
+                   exercise=Path(video_path).stem.split("_")[0], frames=len(keypoints))
+        print(f"✅ Reference store saved to: {output_path}")
+        return
+
     trimmed_keypoints = [[frame[i] for i in KEYPOINT_INDICES] for frame in keypoints]
     data = {
         "keypoints": trimmed_keypoints,
@@ -32,7 +41,7 @@ if __name__ == "__main__":
     import argparse
     parser = argparse.ArgumentParser()
     parser.add_argument("--video", default="input.mp4", help="Path to reference video")
-    parser.add_argument("--out", default="reference.json", help="Path to save reference JSON")
+    parser.add_argument("--out", default="reference.json", help="Path to save reference JSON (use a .kps suffix for the binary store)")
     args = parser.parse_args()
 
     generate_reference_json(args.video, args.out)
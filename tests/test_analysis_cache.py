@@ -0,0 +1,38 @@
+# ✅ File: test_analysis_cache.py (size-bounded cache: running size total, the entry being written is kept)
+#
+# Run from the repo root:  python -m pytest -q tests
+
+import os
+
+import numpy as np
+
+from utils import analysis_cache
+from utils.analysis_cache import AnalysisCache
+
+def disk_size(root) -> int:
+    return sum(os.path.getsize(os.path.join(d, f)) for d, _, files in os.walk(root) for f in files)
+
+def test_entry_larger_than_cache_is_kept(tmp_path):
+    cache = AnalysisCache(tmp_path, max_bytes=1000)
+    points = np.zeros((50, 33, 3), dtype=np.float32)
+    cache.put_track("a", points, fps=30.0)
+    cache.put_results("a", "squat", {"joint_errors": np.ones((50, 12)), "grade": "A"})
+    assert cache.get_track("a") is not None
+    assert cache.get_results("a", "squat")["grade"] == "A"
+
+    # The next entry evicts the older one, never itself
+    cache.put_track("b", points, fps=30.0)
+    assert cache.get_track("a") is None
+    assert cache.get_track("b") is not None
+    assert cache.size() == disk_size(tmp_path)
+
+def test_writes_resize_only_their_entry(tmp_path, monkeypatch):
+    cache = AnalysisCache(tmp_path, max_bytes=10 ** 9)
+    for key in "abc":
+        cache.put_results(key, "squat", {"grade": "A"})
+    stats = []
+    real = analysis_cache._entry_stat
+    monkeypatch.setattr(analysis_cache, "_entry_stat", lambda entry: stats.append(entry.name) or real(entry))
+    cache.put_results("b", "press", {"grade": "C"})
+    assert stats == ["b"]
+    assert cache.size() == disk_size(tmp_path)
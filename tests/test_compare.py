@@ -0,0 +1,74 @@
+# ✅ File: test_compare.py (DTW follows tempo changes; frames with every joint masked are unscored, not deviations)
+#
+# Run from the repo root:  python -m pytest -q tests
+
+import numpy as np
+import pytest
+
+from benchmarks.synthetic import synthetic_track
+from config import CONFIG
+from utils.compare import _banded_dtw, compare_pose, compare_window_chunk, normalize_poses, unscored_frames
+from utils.feedback import FeedbackGenerator
+
+INDICES = CONFIG["keypoint_indices"]
+MASKED = np.arange(100, 110)
+
+def test_banded_dtw_recovers_time_warp():
+    ref = normalize_poses(synthetic_track(60, rep_frames=60, noise=0.0005, seed=2))[:, INDICES]
+    warp = np.round(60 * np.linspace(0, 1, 90) ** 1.5).clip(0, 59).astype(int)
+    path = _banded_dtw(ref[warp], ref, band=30)
+    assert np.all(np.diff(path) >= 0)
+    np.testing.assert_array_equal(path, warp)
+
+@pytest.mark.parametrize("rep_frames", [40, 90])
+def test_dtw_beats_window_on_tempo_shift(rep_frames):
+    # Same movement as the reference, performed faster or slower: the ±4 frame
+    # window drifts out of phase, DTW stays aligned
+    ref = synthetic_track(240, rep_frames=60, seed=2)
+    user = synthetic_track(360, rep_frames=rep_frames, seed=1)
+    window_flags, window_errors, _ = compare_pose(user, ref, INDICES, 0.15, "squat", alignment="window")
+    dtw_flags, dtw_errors, _ = compare_pose(user, ref, INDICES, 0.15, "squat", alignment="dtw", band=30)
+    assert dtw_errors.mean() < window_errors.mean() / 2
+    assert len(dtw_flags) <= 5 < len(window_flags)
+
+def masked_weights(frames: int) -> np.ndarray:
+    weights = np.ones((frames, len(INDICES)))
+    weights[MASKED] = 0.0
+    return weights
+
+@pytest.mark.parametrize("alignment", ["window", "dtw"])
+def test_masked_frames_are_not_flagged(alignment):
+    user = synthetic_track(300, seed=1)
+    ref = synthetic_track(300, rep_frames=45, seed=2)
+    weights = masked_weights(len(user))
+    diff_frames, joint_errors, _ = compare_pose(user, ref, INDICES, 0.0, "squat", alignment=alignment,
+                                                weights=weights)
+    flagged = {f[0] for f in diff_frames}
+    assert flagged.isdisjoint(MASKED.tolist())
+    assert all(np.isfinite(f[1]) for f in diff_frames)
+    assert not joint_errors[MASKED].any()
+
+def test_masked_frames_in_chunks():
+    user = synthetic_track(300, seed=1)
+    ref = normalize_poses(synthetic_track(300, rep_frames=45, seed=2))[:, INDICES]
+    weights = masked_weights(len(user))
+    deviations, _ = compare_window_chunk(user[80:160], ref, INDICES, 0.0, 80, weights=weights[80:160])
+    assert deviations and {f[0] for f in deviations}.isdisjoint(MASKED.tolist())
+
+def test_analysis_grades_scored_frames_only():
+    from utils.analysis import analyze_exercise
+    from utils.pose_estimation import PoseTrack
+    from utils.reference_registry import get_registry
+
+    reference = get_registry(CONFIG).get("squat")
+    points = synthetic_track(300, seed=1).astype(np.float32)
+    visibility = np.full(points.shape[:2], 0.9, dtype=np.float32)
+    visibility[MASKED] = 0.1  # every landmark below min_visibility
+    track = PoseTrack(points, visibility, 30.0, 0, min_visibility=0.5)
+    results = analyze_exercise(track, "squat", reference.path, CONFIG, reference, check_exercise=False)
+
+    assert unscored_frames(track.joint_weights(INDICES)) == len(MASKED)
+    assert {f[0] for f in results["diff_frames"]}.isdisjoint(MASKED.tolist())
+    expected = FeedbackGenerator().generate_feedback(results["diff_frames"], len(track) - len(MASKED),
+                                                     CONFIG["exercise_thresholds"]["squat"]["min_ratio"], [])
+    assert results["feedback"]["performance_grade"] == expected["performance_grade"]
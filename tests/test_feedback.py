@@ -0,0 +1,29 @@
+# ✅ File: test_feedback.py (joint_errors columns are named by their landmark everywhere)
+#
+# Run from the repo root:  python -m pytest -q tests
+
+import numpy as np
+
+from config import CONFIG
+from utils.features import landmark_names
+from utils.feedback import FeedbackGenerator
+from utils.result_views import frame_log
+
+INDICES = CONFIG["keypoint_indices"]
+
+def test_columns_named_by_landmark():
+    # Column 0 is landmark 11 (left shoulder), the last column landmark 28 (right ankle)
+    joint_errors = np.full((20, len(INDICES)), 0.01)
+    joint_errors[:, 0] = 0.9
+    joint_errors[:, -1] = 0.5
+    joint_errors[:, 6] = 0.3
+    diff_frames = [(i, 0.2, "medium") for i in range(20)]
+
+    feedback = FeedbackGenerator().generate_feedback(diff_frames, 20, 0.1, joint_errors, indices=INDICES)
+    assert "**left shoulder, right ankle, left hip**" in feedback["priority_feedback"][0]["message"]
+
+    frames = np.arange(20)
+    log = frame_log(frames, np.full(20, 0.2), np.full(20, "medium", dtype=object), joint_errors,
+                    landmark_names(INDICES))
+    assert set(log["Worst joint"]) == {"left shoulder"}
+    assert landmark_names([11, 28, 40]) == ["left shoulder", "right ankle", "landmark 40"]
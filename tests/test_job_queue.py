@@ -0,0 +1,50 @@
+# ✅ File: test_job_queue.py (jobs left running by a server that exited are marked interrupted and rerun)
+#
+# Run from the repo root:  python -m pytest -q tests
+
+import json
+import subprocess
+import sys
+import time
+
+from utils.job_queue import JobQueue
+
+def double_job(spec, report):
+    # Module-level so the spawned worker can import it
+    report(progress=0.5)
+    return {"value": spec["value"] * 2}
+
+def wait(queue: JobQueue, job_id: str, timeout: float = 120.0) -> dict:
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        status = queue.status(job_id)
+        if status["state"] not in ("queued", "running"):
+            return status
+        time.sleep(0.1)
+    raise TimeoutError(job_id)
+
+def test_interrupted_job_is_recovered_and_rerun(tmp_path):
+    # A server process that exited with one job running and one finished
+    dead = subprocess.Popen([sys.executable, "-c", "pass"])
+    dead.wait()
+    for job_id, state in (("running-job", "running"), ("done-job", "done")):
+        (tmp_path / job_id).mkdir()
+        (tmp_path / job_id / "spec.json").write_text(json.dumps({"value": 21}))
+        (tmp_path / job_id / "status.json").write_text(json.dumps(
+            {"id": job_id, "state": state, "progress": 0.3, "owner": dead.pid, "updated": time.time()}))
+
+    queue = JobQueue(tmp_path, workers=1)
+    try:
+        assert queue.status("running-job")["state"] == "interrupted"
+        assert queue.status("done-job")["state"] == "done"
+        assert queue.active_specs() == []
+
+        # Submitting again runs it; a finished job is not recomputed
+        queue.submit("running-job", "test_job_queue:double_job", queue.spec("running-job"))
+        queue.submit("done-job", "test_job_queue:double_job", queue.spec("done-job"))
+        assert queue.status("done-job")["state"] == "done" and queue.result("done-job") is None
+        status = wait(queue, "running-job")
+        assert status["state"] == "done", status.get("error")
+        assert queue.result("running-job") == {"value": 42}
+    finally:
+        queue.shutdown()
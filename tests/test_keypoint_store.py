@@ -0,0 +1,41 @@
+# ✅ File: test_keypoint_store.py (.kps tracks round-trip and match the JSON references they replace)
+#
+# Run from the repo root:  python -m pytest -q tests
+
+import json
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from utils.keypoint_store import convert_json, load_keypoints, load_track, read_header, save_track
+
+REFERENCES = sorted((Path(__file__).parents[1] / "reference_data").glob("*.json"))
+
+@pytest.mark.parametrize("json_path", REFERENCES, ids=lambda p: p.stem)
+def test_kps_round_trip_matches_json(json_path, tmp_path):
+    expected = load_keypoints(json_path)
+    out = convert_json(json_path, tmp_path / f"{json_path.stem}.kps")
+    for mmap in (True, False):
+        np.testing.assert_array_equal(load_keypoints(out, mmap=mmap), expected)
+    with open(json_path) as f:
+        data = json.load(f)
+    meta = data.get("metadata", {}) if isinstance(data, dict) else {}
+    _, stored = load_track(out)
+    assert stored["fps"] == meta.get("fps")
+    assert stored["converted_from"] == json_path.name
+    # The shipped .kps next to the JSON holds the same keypoints
+    shipped = json_path.with_suffix(".kps")
+    if shipped.exists():
+        np.testing.assert_array_equal(load_keypoints(shipped), expected)
+
+def test_subset_and_layout(tmp_path):
+    track = np.random.default_rng(0).normal(size=(7, 3, 3)).astype(np.float32)
+    path = save_track(tmp_path / "subset.kps", track, fps=30.0, joint_indices=[11, 12, 23], note="x")
+    header, offset = read_header(path)
+    assert offset % 64 == 0 and header["shape"] == [7, 3, 3]
+    full = load_keypoints(path)
+    assert full.shape == (7, 33, 3)
+    np.testing.assert_array_equal(full[:, [11, 12, 23]], track)
+    assert np.isnan(full[:, 0]).all()
+    assert load_track(save_track(tmp_path / "empty.kps", np.zeros((0, 33, 3))))[0].shape == (0, 33, 3)
@@ -0,0 +1,29 @@
+# ✅ File: test_progressive.py (per-chunk work of the progressive analysis stays bounded)
+#
+# Run from the repo root:  python -m pytest -q tests
+
+import numpy as np
+
+from benchmarks.synthetic import synthetic_track
+from config import CONFIG
+from utils import analysis
+from utils.reference_registry import get_registry
+
+def test_heuristic_detection_stops_after_preview(monkeypatch):
+    # Without a reference-library classifier the motion heuristic reads the whole
+    # clip so far; it must not run on every chunk of a long video
+    monkeypatch.setattr(analysis, "exercise_classifier", lambda config, registry=None: None)
+    calls = []
+    real = analysis.detect_exercise_type_with_confidence
+    monkeypatch.setattr(analysis, "detect_exercise_type_with_confidence",
+                        lambda keypoints: calls.append(len(keypoints)) or real(keypoints))
+
+    progress = analysis.ProgressiveAnalysis("squat", CONFIG, get_registry(CONFIG).get("squat"))
+    points = synthetic_track(1800, seed=2).astype(np.float32)
+    visibility = np.ones(points.shape[:2], dtype=np.float32)
+    for start in range(0, len(points), 30):
+        state = progress.update(points[start:start + 30], visibility[start:start + 30], 30.0)
+
+    preview_chunks = CONFIG["classifier"]["preview_seconds"]
+    assert len(calls) <= preview_chunks + 1
+    assert state["detected_type"] == progress.detected_type and state["analysed"] > 1700
@@ -0,0 +1,35 @@
+# ✅ File: test_rep_counter.py (P² quantile estimates and the streaming rep counter against the batch one)
+#
+# Run from the repo root:  python -m pytest -q tests
+
+import numpy as np
+import pytest
+
+from benchmarks.synthetic import synthetic_track
+from utils.pose_estimation import count_reps
+from utils.rep_counter import P2Quantile, count_reps_streaming
+
+@pytest.mark.parametrize("p", [0.1, 0.5, 0.9])
+@pytest.mark.parametrize("dist", ["normal", "uniform", "exponential"])
+def test_p2_quantile_close_to_percentile(p, dist):
+    rng = np.random.default_rng(3)
+    samples = getattr(rng, dist)(size=20000)
+    estimator = P2Quantile(p)
+    for x in samples:
+        estimator.add(float(x))
+    exact = np.percentile(samples, p * 100)
+    spread = np.percentile(samples, 95) - np.percentile(samples, 5)
+    assert abs(estimator.value() - exact) < 0.02 * spread
+
+def test_p2_quantile_first_samples_exact():
+    estimator = P2Quantile(0.3)
+    assert estimator.value() is None
+    samples = [4.0, 1.0, 3.0, 5.0, 2.0]
+    for count, x in enumerate(samples, 1):
+        estimator.add(x)
+        assert estimator.value() == pytest.approx(np.percentile(samples[:count], 30))
+
+def test_streaming_reps_match_batch():
+    # 20 rep cycles; the last one ends on the final frame
+    keypoints = synthetic_track(1500, "squat", rep_frames=75, seed=1).tolist()
+    assert count_reps_streaming(keypoints, "squat")[-1][0] == count_reps(keypoints, "squat")[-1][0] >= 19
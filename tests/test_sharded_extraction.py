@@ -0,0 +1,50 @@
+# ✅ File: test_sharded_extraction.py (segment plans tile the video; stitched tracks keep source frame indices)
+#
+# Run from the repo root:  python -m pytest -q tests
+
+import numpy as np
+import pytest
+
+from utils.pose_estimation import NUM_LANDMARKS
+from utils.sharded_extraction import plan_segments, stitch
+
+@pytest.mark.parametrize("total, segments, overlap, stride", [
+    (9000, 4, 60, 1), (9001, 3, 60, 2), (9000, 7, 60, 3), (100, 8, 60, 1), (5, 4, 0, 1), (1, 2, 60, 1),
+])
+def test_plan_segments_tile_the_video(total, segments, overlap, stride):
+    plan = plan_segments(total, segments, overlap, stride)
+    assert 1 <= len(plan) <= segments
+    assert plan[0][:2] == (0, 0) and plan[-1][2] == total
+    for (_, _, end), (_, start, _) in zip(plan, plan[1:]):
+        assert start == end  # owned ranges are contiguous, no gaps or overlaps
+    for warm, start, end in plan:
+        assert warm % stride == 0 and start % stride == 0
+        # At least `overlap` frames of warm-up (or all there are), less than a stride more
+        assert min(start, overlap) <= start - warm < overlap + stride
+        assert end > start
+
+def owned(start: int, end: int):
+    # A segment's output where every point holds its source frame index
+    frames = np.arange(start, end, dtype=np.float32)
+    points = np.repeat(frames[:, None, None], NUM_LANDMARKS, axis=1).repeat(3, axis=2)
+    return points, np.ones((end - start, NUM_LANDMARKS), dtype=np.float32)
+
+def test_stitch_keeps_source_indices():
+    plan = plan_segments(1000, 4, 60, 2)
+    parts = [owned(start, end) for _, start, end in plan]
+    points, visibility = stitch(parts, plan)
+    np.testing.assert_array_equal(points[:, 0, 0], np.arange(1000))
+
+    # A segment that comes back short is padded, so later segments keep their indices
+    _, start, end = plan[1]
+    parts[1] = owned(start, end - 10)
+    points, visibility = stitch(parts, plan)
+    assert len(points) == 1000
+    assert np.isnan(points[end - 10:end]).all() and not visibility[end - 10:end].any()
+    np.testing.assert_array_equal(points[end:, 0, 0], np.arange(end, 1000))
+
+    # Segments past the real end of the file (frame count too high) are dropped
+    parts[1] = owned(start, end)
+    parts[-1] = owned(0, 0)
+    points, _ = stitch(parts, plan)
+    assert len(points) == plan[-1][1]
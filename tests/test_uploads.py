@@ -0,0 +1,29 @@
+# ✅ File: test_uploads.py (the quota pass spares job inputs and recently touched uploads)
+#
+# Run from the repo root:  python -m pytest -q tests
+
+import os
+import time
+
+from utils.uploads import cleanup
+
+def write(path, size: int, age: float):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(b"x" * size)
+    stamp = time.time() - age
+    os.utime(path, (stamp, stamp))
+    return path
+
+def test_quota_spares_job_inputs_and_fresh_files(tmp_path):
+    queued = write(tmp_path / "a" / "queued.mp4", 1000, age=3000)    # another session's queued job
+    old = write(tmp_path / "b" / "old.mp4", 1000, age=2000)
+    fresh = write(tmp_path / "c" / "fresh.mp4", 1000, age=10)
+
+    removed, freed = cleanup([tmp_path], max_age_seconds=3600, max_total_bytes=1500,
+                             in_use=[queued], fresh_seconds=300)
+    assert (removed, freed) == (1, 1000)
+    assert queued.exists() and fresh.exists() and not old.exists()
+
+    # Expired files go regardless of freshness rules, job inputs never do
+    removed, _ = cleanup([tmp_path], max_age_seconds=1, max_total_bytes=10 ** 9, in_use=[queued])
+    assert removed == 1 and queued.exists() and not fresh.exists()
@@ -0,0 +1,424 @@
+# ✅ File: analysis.py (extract -> compare -> feedback -> reps chain shared by the app and batch tools)
+
+from contextlib import nullcontext
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional
+
+import os
+
+import numpy as np
+
+from utils import profiling
+from utils.analysis_cache import AnalysisCache, params_digest
+from utils.compare import compare_pose, compare_window_chunk, unscored_frames
+from utils.feedback import FeedbackGenerator
+from utils.job_queue import default_workers
+from utils.keypoint_store import hash_file
+from utils.pose_estimation import (MODEL_VERSION, NUM_LANDMARKS, GapFiller, PoseTrack, count_reps,
+                                   create_annotated_video_opencv, detect_exercise_type_with_confidence,
+                                   extract_pose_track, iter_pose_chunks, pose_pool)
+from utils.exercise_classifier import ExerciseClassifier, build_classifier
+from utils.reference_registry import ReferenceEntry, ReferenceRegistry, get_registry
+from utils.sharded_extraction import extract_pose_track_sharded, video_seconds
+from utils.rep_counter import RepCounter
+from utils.result_views import deviation_arrays, deviation_series
+from utils.video_encoding import encoder_for
+
+# Classifier built from the current reference library, keyed on the reference digests
+_classifier_cache: Dict[tuple, Optional[ExerciseClassifier]] = {}
+
+# One AnalysisCache per worker process, so its size index survives from job to job
+_job_caches: Dict[tuple, AnalysisCache] = {}
+
+def track_cache_key(cache: AnalysisCache, video_hash: str, config: Dict) -> str:
+    return cache.key(video_hash, dict(config["extraction"], model=MODEL_VERSION))
+
+# Bumped when the comparison or grading changes, so cached results are recomputed
+# (2: frames with every joint masked are no longer flagged or counted;
+#  3: joints in the feedback are named by their landmark, not their column)
+RESULTS_VERSION = 3
+
+def results_name(config: Dict, exercise: str, reference, check_exercise: bool = True) -> str:
+    # Per-exercise results are keyed on everything that can change them;
+    # `reference` is a ReferenceEntry (digest already known) or a path
+    digest = reference.digest if isinstance(reference, ReferenceEntry) else hash_file(reference)
+    return "{}-{}".format(exercise, params_digest({
+        "exercise": config["exercise_thresholds"][exercise],
+        "indices": config["keypoint_indices"],
+        "reference": digest,
+        "classifier": config["classifier"] if check_exercise else None,
+        "version": RESULTS_VERSION,
+    })[:16])
+
+def exercise_classifier(config: Dict, registry: Optional[ReferenceRegistry] = None) -> Optional[ExerciseClassifier]:
+    entries = (registry or get_registry(config)).entries()
+    key = tuple((e.exercise, e.digest) for e in entries) + (params_digest(config["classifier"]),)
+    if key not in _classifier_cache:
+        _classifier_cache.clear()
+        _classifier_cache[key] = build_classifier(entries, config)
+    return _classifier_cache[key]
+
+def detect_exercise(keypoints, config: Dict, registry: Optional[ReferenceRegistry] = None):
+    # Nearest-neighbour match against the reference library; the motion
+    # heuristic is the fallback when fewer than two references exist
+    classifier = exercise_classifier(config, registry)
+    if classifier is None:
+        return detect_exercise_type_with_confidence(keypoints)
+    return classifier.classify(keypoints)
+
+def resolve_reference(config: Dict, exercise: str, ref_path=None) -> Optional[ReferenceEntry]:
+    # The process-wide registry entry, unless the caller asked for a different file
+    reference = get_registry(config).get(exercise)
+    if ref_path is not None and (reference is None or reference.path != Path(ref_path)):
+        reference = ReferenceEntry(exercise, Path(ref_path), config["keypoint_indices"])
+    return reference
+
+def make_track(points, visibility, fps: float, params: Dict, stopped_early: bool = False) -> PoseTrack:
+    # PoseTrack with the trimming / gap filling / masking of CONFIG["extraction"]
+    return PoseTrack(points, visibility, fps, params["warmup_trim"], max(1, int(params["stride"])),
+                     params["target_height"], stopped_early, params["max_gap"], params["min_visibility"])
+
+def cached_track(cache: Optional[AnalysisCache], key: Optional[str], params: Dict) -> Optional[PoseTrack]:
+    if cache is None or key is None:
+        return None
+    cached = cache.get_track(key)
+    if not cached:
+        return None
+    return make_track(cached["points"], cached["visibility"], cached["metadata"].get("fps") or 0.0, params)
+
+def store_track(cache: Optional[AnalysisCache], key: Optional[str], track: PoseTrack) -> None:
+    if cache is not None and key is not None:
+        points, visibility = track.detections()
+        cache.put_track(key, points, visibility, fps=track.fps)
+
+def shard_count(video_path: str, config: Dict, segments: Optional[int] = None,
+                processes: Optional[int] = None) -> int:
+    # Segments to split this video's extraction into (1 = sequential): `segments`,
+    # else CONFIG["sharding"] (None = one per process), for videos of at least
+    # sharding.min_seconds. processes: how many extraction processes this video may
+    # use (default: the CPU count); below two there is nothing to run in parallel.
+    cfg = config["sharding"]
+    processes = processes or os.cpu_count() or 1
+    segments = segments or cfg["segments"] or processes
+    if segments < 2 or processes < 2 or video_seconds(video_path) < cfg["min_seconds"]:
+        return 1
+    return segments
+
+def job_shard_processes(config: Dict) -> int:
+    # Extraction processes one analysis job may start: the CPUs split between the
+    # job pool's workers, so concurrent jobs together stay within the CPU count
+    return max(1, (os.cpu_count() or 1) // default_workers(config["jobs"]["workers"]))
+
+def load_or_extract_track(video_path: str, config: Dict, cache: Optional[AnalysisCache] = None,
+                          key: Optional[str] = None, pose=None, segments: int = 1,
+                          on_segment: Optional[Callable[[int, int], None]] = None,
+                          processes: Optional[int] = None) -> PoseTrack:
+    # segments > 1 extracts time slices in parallel, on up to `processes` processes
+    # (default: one per segment, up to the CPU count; see sharded_extraction.py)
+    params = config["extraction"]
+    track = cached_track(cache, key, params)
+    if track is None:
+        if segments > 1:
+            track = extract_pose_track_sharded(video_path, params, segments, config["sharding"]["overlap_seconds"],
+                                               workers=processes, chunk_seconds=config["progressive"]["chunk_seconds"],
+                                               on_segment=on_segment)
+        else:
+            track = extract_pose_track(video_path, pose=pose, **params)
+        store_track(cache, key, track)
+    return track
+
+def render_file_name(config: Dict, result_name: str, profile_name: str) -> str:
+    ext = encoder_for(config["encoding"]["profiles"][profile_name], config["encoding"])["ext"]
+    return f"{result_name}.{profile_name}{ext}"
+
+def cached_render(cache: AnalysisCache, key: str, result_name: str, profile_name: str,
+                  config: Dict) -> Optional[Dict]:
+    # Render stats (with "path") for a profile that is already in the cache, else None
+    path = cache.get_file(key, render_file_name(config, result_name, profile_name))
+    stats = cache.get_results(key, f"{result_name}.{profile_name}.render")
+    if path is None or stats is None:
+        return None
+    stats["output"]["path"] = str(path)
+    return stats
+
+def render_profile(video_path: str, track: PoseTrack, results: Dict, cache: AnalysisCache, key: str,
+                   result_name: str, profile_name: str, config: Dict) -> Dict:
+    # Render one encoding profile into the cache entry (written under a .partial
+    # name and renamed, so readers never see half a file) and keep its stats next to it
+    path = cache.file_path(key, render_file_name(config, result_name, profile_name))
+    partial = path.with_name(f"{result_name}.{profile_name}.partial{path.suffix}")
+    stats = {}
+    create_annotated_video_opencv(video_path, str(partial), results["diff_frames"], results["reps"], track=track,
+                                  stats=stats, profile=config["encoding"]["profiles"][profile_name],
+                                  encoding=config["encoding"])
+    os.replace(partial, path)
+    stats["output"]["path"] = str(path)
+    stats["profile"] = profile_name
+    cache.put_results(key, f"{result_name}.{profile_name}.render", stats)
+    return stats
+
+def analyze_exercise(track: PoseTrack, exercise: str, ref_path, config: Dict,
+                     reference: Optional[ReferenceEntry] = None, check_exercise: bool = True) -> Dict:
+    # Every step reads the track's TrackFeatures, so the keypoints are converted,
+    # normalised and turned into a rep signal once
+    features = track.features
+    detected_type, confidence = detect_exercise(features, config)
+    mismatch = (check_exercise and detected_type not in (None, "unknown", exercise)
+                and confidence >= config["classifier"]["mismatch_confidence"])
+
+    if reference is None:
+        reference = resolve_reference(config, exercise, ref_path)
+
+    exercise_cfg = config["exercise_thresholds"][exercise]
+    weights = track.joint_weights(config["keypoint_indices"])
+    diff_frames, joint_errors, threshold = compare_pose(
+        features,
+        reference.keypoints,
+        config["keypoint_indices"],
+        exercise_cfg["base"],
+        exercise,
+        alignment=exercise_cfg.get("alignment", "window"),
+        band=exercise_cfg.get("dtw_band", 30),
+        ref_selected=reference.selected,
+        ref_signal=reference.signal,
+        weights=weights
+    )
+
+    if len(diff_frames) <= 2 and confidence > 0.95:
+        diff_frames = []
+
+    feedback = FeedbackGenerator().generate_feedback(
+        diff_frames,
+        len(features) - unscored_frames(weights),
+        exercise_cfg["min_ratio"],
+        joint_errors,
+        mismatch,
+        detected_type,
+        features,
+        exercise,
+        config["keypoint_indices"]
+    )
+
+    reps = count_reps(features, exercise)
+    return {
+        "detected_type": detected_type,
+        "confidence": confidence,
+        "diff_frames": diff_frames,
+        "joint_errors": np.asarray(joint_errors),
+        "feedback": feedback,
+        "reps": reps,
+    }
+
+class ProgressiveAnalysis:
+    # analyze_exercise fed one extraction chunk at a time, for partial results
+    # while a video is still being processed. Window-aligned deviations are exact
+    # (see compare_window_chunk); reps come from the streaming RepCounter and the
+    # exercise check averages classifier windows as they complete. DTW-aligned
+    # exercises show window-aligned deviations until the final pass.
+    def __init__(self, exercise: str, config: Dict, reference: ReferenceEntry,
+                 check_exercise: bool = True, registry: Optional[ReferenceRegistry] = None):
+        self.exercise = exercise
+        self.config = config
+        self.reference = reference
+        self.check_exercise = check_exercise
+        self.exercise_cfg = config["exercise_thresholds"][exercise]
+        self.warmup_trim = config["extraction"]["warmup_trim"]
+        self.min_visibility = config["extraction"]["min_visibility"]
+        self.indices = config["keypoint_indices"]
+        self.gaps = GapFiller(config["extraction"]["max_gap"])
+        self.classifier = exercise_classifier(config, registry)
+        self.reps = RepCounter(exercise, config["live"]["rep_warmup"])
+        self.keypoints: List = []
+        self.diff_frames: List[tuple] = []
+        self.unscored = 0  # analysed frames with every joint below min_visibility
+        self.frames = 0
+        self.fps = 0.0
+        self.detected_type: Optional[str] = None
+        self.confidence = 0.0
+        self._trimmed = 0
+        self._window_probs = None
+        self._windows = 0
+        self._next_window = 0
+        self._preview_done = False
+
+    def update(self, points: np.ndarray, visibility: np.ndarray, fps: float) -> Dict:
+        # The next source frames from iter_pose_chunks (NaN rows = no detection). Gaps
+        # are filled as in PoseTrack, so frames after the last detection wait for the next chunk.
+        self.frames += len(points)
+        self.fps = fps
+        points, visibility = self.gaps.push(points, visibility)
+        valid = np.flatnonzero(~np.isnan(points[:, 0, 0]))
+        skip = min(len(valid), self.warmup_trim - self._trimmed)
+        self._trimmed += skip
+        valid = valid[skip:]
+        if len(valid):
+            new = points[valid].astype(np.float64)
+            weights = (visibility[valid][:, self.indices] >= self.min_visibility).astype(np.float64)
+            first = len(self.keypoints)
+            self.keypoints.extend(new)
+            deviations, _ = compare_window_chunk(new, self.reference.selected, self.indices,
+                                                 self.exercise_cfg["base"], first, weights=weights)
+            self.diff_frames.extend(deviations)
+            self.unscored += unscored_frames(weights)
+            for lm in new:
+                self.reps.update(lm)
+            self._classify()
+        return self.snapshot()
+
+    def _classify(self) -> None:
+        n = len(self.keypoints)
+        if self.classifier is None:
+            # The motion heuristic reads every frame so far, so it only runs until the
+            # preview (all early exit needs) and then keeps its answer; the final
+            # results detect on the full track
+            if not self._preview_done:
+                self.detected_type, self.confidence = detect_exercise_type_with_confidence(self.keypoints)
+                self._preview_done = self.seconds >= self.config["classifier"]["preview_seconds"]
+            return
+        window, hop = self.classifier.window, self.classifier.hop
+        if n - self._next_window >= window:
+            count = (n - self._next_window - window) // hop + 1
+            stop = self._next_window + (count - 1) * hop + window
+            probs = self.classifier.window_probabilities(self.keypoints[self._next_window:stop]).sum(axis=0)
+            self._window_probs = probs if self._window_probs is None else self._window_probs + probs
+            self._windows += count
+            self._next_window += count * hop
+        if self._windows:
+            self.detected_type, self.confidence = self.classifier.label(self._window_probs / self._windows)
+        else:
+            # Shorter than one window: classify() treats the whole clip as one
+            self.detected_type, self.confidence = self.classifier.classify(self.keypoints)
+
+    @property
+    def seconds(self) -> float:
+        return self.frames / (self.fps or 30.0)
+
+    @property
+    def mismatch(self) -> bool:
+        return (self.check_exercise and self.detected_type not in (None, "unknown", self.exercise)
+                and self.confidence >= self.config["classifier"]["mismatch_confidence"])
+
+    def snapshot(self) -> Dict:
+        mismatch = self.mismatch
+        grade = FeedbackGenerator().generate_feedback(self.diff_frames, len(self.keypoints) - self.unscored,
+                                                      self.exercise_cfg["min_ratio"],
+                                                      [], mismatch, self.detected_type)["performance_grade"]
+        return {
+            "frames": self.frames,
+            "seconds": self.seconds,
+            "analysed": len(self.keypoints),
+            "reps": self.reps.current,
+            "diff_frames": self.diff_frames,
+            "grade": grade,
+            "detected_type": self.detected_type,
+            "confidence": self.confidence,
+            "mismatch": mismatch,
+        }
+
+def analyze_progressively(video_path: str, exercise: str, config: Dict, reference: ReferenceEntry,
+                          cache: Optional[AnalysisCache] = None, key: Optional[str] = None,
+                          check_exercise: bool = True, early_exit: bool = True,
+                          registry: Optional[ReferenceRegistry] = None, pose=None) -> Iterator[Dict]:
+    # Yields a ProgressiveAnalysis snapshot (plus "progress", 0..1 or None) per
+    # extraction chunk, then a final {"done", "stopped_early", "track", "results"}.
+    # With early_exit, extraction stops once preview_seconds have been seen and the
+    # clip confidently shows another exercise; results are then None. Otherwise the
+    # results are analyze_exercise's for the full track, cached like the batch path.
+    params = config["extraction"]
+    track = cached_track(cache, key, params)
+
+    if track is None:
+        progress = ProgressiveAnalysis(exercise, config, reference, check_exercise, registry)
+        chunks = iter_pose_chunks(video_path, params["min_detection_confidence"], params["min_tracking_confidence"],
+                                  params["stride"], params["target_height"], pose, config["progressive"]["chunk_seconds"])
+        points, visibility = [], []
+        fps = 0.0
+        for chunk, chunk_vis, fps, total in chunks:
+            points.append(chunk)
+            visibility.append(chunk_vis)
+            state = progress.update(chunk, chunk_vis, fps)
+            state["progress"] = min(1.0, progress.frames / total) if total else None
+            if early_exit and state["mismatch"] and state["seconds"] >= config["classifier"]["preview_seconds"]:
+                chunks.close()
+                track = make_track(np.concatenate(points), np.concatenate(visibility), fps, params, True)
+                yield dict(state, done=True, stopped_early=True, track=track, results=None)
+                return
+            yield state
+        if points:
+            track = make_track(np.concatenate(points), np.concatenate(visibility), fps, params)
+        else:
+            track = make_track(np.zeros((0, NUM_LANDMARKS, 3)), np.zeros((0, NUM_LANDMARKS)), fps, params)
+        store_track(cache, key, track)
+
+    results = None
+    if len(track):
+        name = results_name(config, exercise, reference, check_exercise)
+        results = cache.get_results(key, name) if cache is not None and key is not None else None
+        if results is None:
+            results = analyze_exercise(track, exercise, reference.path, config, reference, check_exercise)
+            if cache is not None and key is not None:
+                cache.put_results(key, name, results)
+    yield {"done": True, "stopped_early": False, "track": track, "results": results, "progress": 1.0}
+
+# ---- background analysis jobs (run by utils/job_queue.py worker processes) ----
+
+def init_analysis_worker(params: Dict) -> None:
+    # Build the worker's Pose graph before its first job arrives
+    pose_pool.warm(1, min_detection_confidence=params["min_detection_confidence"],
+                   min_tracking_confidence=params["min_tracking_confidence"])
+
+def analysis_job_id(spec: Dict) -> str:
+    # Same video, exercise, parameters and reference -> same job, so a resubmit
+    # (another session, a page reload) attaches to it instead of recomputing
+    return params_digest({k: spec[k] for k in ("cache_key", "result_name", "exercise",
+                                                "check_exercise", "early_exit")})[:24]
+
+def run_analysis_job(spec: Dict, report: Callable) -> Dict:
+    # analyze_progressively in a worker process. Every partial result goes to
+    # report(); the track and results land in the analysis cache under
+    # spec["cache_key"] / spec["result_name"], and the returned summary says
+    # where to find them (or why there are none).
+    from config import CONFIG
+
+    registry = get_registry(CONFIG)
+    reference = registry.get(spec["exercise"])
+    if reference is None:
+        raise FileNotFoundError(f"No reference data for {spec['exercise']}")
+    cache_key = (str(CONFIG["cache"]["dir"]), CONFIG["cache"]["max_bytes"])
+    if cache_key not in _job_caches:
+        _job_caches[cache_key] = AnalysisCache(*cache_key)
+    cache = _job_caches[cache_key]
+    final = None
+    with (profiling.trace() if spec.get("trace") else nullcontext()) as trace:
+        processes = job_shard_processes(CONFIG)
+        segments = shard_count(spec["video_path"], CONFIG, processes=processes)
+        if segments > 1:
+            # Long video: extract its time slices in parallel first; the progressive
+            # pass below then finds the track in the cache (no partials, no early exit)
+            load_or_extract_track(spec["video_path"], CONFIG, cache, spec["cache_key"], segments=segments,
+                                  on_segment=lambda done, total: report(progress=0.95 * done / total),
+                                  processes=processes)
+        for state in analyze_progressively(spec["video_path"], spec["exercise"], CONFIG, reference, cache,
+                                           spec["cache_key"], spec["check_exercise"], spec["early_exit"],
+                                           registry):
+            if state.get("done"):
+                final = state
+                break
+            # The chart's downsampled series rather than every deviation, so the status
+            # file stays the same size however long the clip is
+            partial = {k: v for k, v in state.items() if k not in ("progress", "diff_frames")}
+            frames, errors, _ = deviation_arrays(state["diff_frames"])
+            partial["deviation"] = deviation_series(frames, errors, CONFIG["results"]["chart_points"])
+            report(progress=state["progress"], partial=partial)
+    results = final["results"]
+    summary = {
+        "stopped_early": final["stopped_early"],
+        "frames": len(final["track"]),
+        "has_results": results is not None,
+        "detected_type": final.get("detected_type", results["detected_type"] if results else None),
+        "confidence": final.get("confidence", results["confidence"] if results else 0.0),
+        "seconds": final.get("seconds"),
+    }
+    if trace is not None:
+        summary["trace"] = {"summary": trace.summary(), "events": trace.to_chrome_trace()}
+    return summary
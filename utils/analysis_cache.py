@@ -0,0 +1,204 @@
+# ✅ File: analysis_cache.py (content-addressed, size-bounded LRU cache of analysis results)
+#
+# Layout:  <root>/<key>/track.kps              per-frame landmarks (NaN = no detection)
+#          <root>/<key>/track.visibility.npy   per-frame landmark visibility
+#          <root>/<key>/<name>.json            JSON results; ndarray fields go to <name>.<field>.npy
+#          <root>/<key>/<name>.<profile>.mp4   rendered videos (.webm etc. per codec),
+#                                              stats in <name>.<profile>.render.json
+#          <root>/<key>/.last_access           mtime drives LRU eviction
+#
+# <key> = sha256(video bytes hash + extraction parameters + CACHE_VERSION), so any
+# change to warm-up trimming, confidences, stride or the model version misses.
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Union
+
+import numpy as np
+
+from utils.keypoint_store import load_track, save_track
+
+CACHE_VERSION = 2
+
+def params_digest(params: Dict) -> str:
+    return hashlib.sha256(json.dumps(params, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+class AnalysisCache:
+    # Entry sizes are kept in memory: the root is scanned once (and again every
+    # `rescan_seconds`, to see entries other processes wrote), then only the entry
+    # just written is re-sized, so eviction does not walk the cache on every write.
+    def __init__(self, root: Union[str, Path], max_bytes: int = 2 * 1024 ** 3, rescan_seconds: float = 600.0):
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        self.rescan_seconds = rescan_seconds
+        self.root.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._entries: Optional[Dict[str, List[float]]] = None  # key -> [last access, bytes]
+        self._total = 0
+        self._scanned = 0.0
+
+    def key(self, video_hash: str, params: Dict) -> str:
+        return params_digest({"video": video_hash, "params": params, "cache_version": CACHE_VERSION})
+
+    def _entry(self, key: str) -> Path:
+        return self.root / key
+
+    def _touch(self, key: str) -> None:
+        marker = self._entry(key) / ".last_access"
+        marker.parent.mkdir(parents=True, exist_ok=True)
+        marker.touch()
+        os.utime(marker, None)
+        with self._lock:
+            if self._entries is not None and key in self._entries:
+                self._entries[key][0] = time.time()
+
+    def _atomic_write(self, path: Path, write) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=path.parent, suffix=path.suffix + ".tmp")
+        os.close(fd)
+        try:
+            write(tmp)
+            os.replace(tmp, path)
+        except BaseException:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            raise
+
+    # ---- keypoint tracks ----
+    def get_track(self, key: str) -> Optional[Dict]:
+        path = self._entry(key) / "track.kps"
+        if not path.exists():
+            return None
+        self._touch(key)
+        points, meta = load_track(path, mmap=False)
+        vis_path = self._entry(key) / "track.visibility.npy"
+        visibility = np.load(vis_path) if vis_path.exists() else None
+        return {"points": points, "visibility": visibility, "metadata": meta}
+
+    def put_track(self, key: str, points: np.ndarray, visibility: Optional[np.ndarray] = None,
+                  **metadata) -> None:
+        # points: (frames, 33, 3) with NaN rows for frames without a pose.
+        # track.kps is written last, so a complete track always has its visibility.
+        if visibility is not None:
+            self._atomic_write(self._entry(key) / "track.visibility.npy",
+                               lambda tmp: _write_npy(tmp, np.asarray(visibility, dtype=np.float32)))
+        self._atomic_write(self._entry(key) / "track.kps",
+                           lambda tmp: save_track(tmp, points, **metadata))
+        self._touch(key)
+        self._written(key)
+
+    # ---- JSON results (ndarray fields stored as .npy side files) ----
+    def get_results(self, key: str, name: str) -> Optional[Dict]:
+        path = self._entry(key) / f"{name}.json"
+        if not path.exists():
+            return None
+        self._touch(key)
+        with open(path) as f:
+            results = json.load(f)
+        for field in results.pop("__arrays__", []):
+            results[field] = np.load(self._entry(key) / f"{name}.{field}.npy")
+        return results
+
+    def put_results(self, key: str, name: str, results: Dict) -> None:
+        plain = {}
+        arrays = []
+        for field, value in results.items():
+            if isinstance(value, np.ndarray):
+                arrays.append(field)
+                self._atomic_write(self._entry(key) / f"{name}.{field}.npy",
+                                   lambda tmp, v=value: _write_npy(tmp, v))
+            else:
+                plain[field] = value
+        plain["__arrays__"] = arrays
+
+        def write(tmp):
+            with open(tmp, "w") as f:
+                json.dump(plain, f, default=json_default)
+        self._atomic_write(self._entry(key) / f"{name}.json", write)
+        self._touch(key)
+        self._written(key)
+
+    # ---- rendered files ----
+    def file_path(self, key: str, name: str) -> Path:
+        # Where a rendered artifact for this entry lives (may not exist yet)
+        self._entry(key).mkdir(parents=True, exist_ok=True)
+        return self._entry(key) / name
+
+    def get_file(self, key: str, name: str) -> Optional[Path]:
+        path = self._entry(key) / name
+        if not path.exists():
+            return None
+        self._touch(key)
+        return path
+
+    # ---- eviction ----
+    def _index(self) -> Dict[str, List[float]]:
+        # Caller holds self._lock
+        if self._entries is None or time.monotonic() - self._scanned > self.rescan_seconds:
+            self._entries = {entry.name: _entry_stat(entry) for entry in self.root.iterdir() if entry.is_dir()}
+            self._total = sum(size for _, size in self._entries.values())
+            self._scanned = time.monotonic()
+        return self._entries
+
+    def _written(self, key: str) -> None:
+        # Re-size the entry just written (rendered videos included), then evict around it
+        with self._lock:
+            entries = self._index()
+            self._total -= entries.get(key, [0, 0])[1]
+            entries[key] = _entry_stat(self._entry(key))
+            self._total += entries[key][1]
+        self.evict(keep=key)
+
+    def size(self) -> int:
+        with self._lock:
+            self._index()
+            return self._total
+
+    def evict(self, keep: Optional[str] = None) -> None:
+        # Least recently used entries go first until the cache fits; `keep` (the entry
+        # being written) never goes, even when it alone is larger than max_bytes
+        with self._lock:
+            entries = self._index()
+            if self._total <= self.max_bytes:
+                return
+            for key, (last, size) in sorted(entries.items(), key=lambda item: item[1][0]):
+                if self._total <= self.max_bytes:
+                    break
+                if key == keep:
+                    continue
+                shutil.rmtree(self._entry(key), ignore_errors=True)
+                del entries[key]
+                self._total -= size
+
+def _entry_stat(entry: Path) -> List[float]:
+    # [last access, bytes] of one cache entry (files may vanish under another process's eviction)
+    size = 0
+    for f in entry.rglob("*"):
+        try:
+            if f.is_file():
+                size += f.stat().st_size
+        except FileNotFoundError:
+            pass
+    marker = entry / ".last_access"
+    try:
+        last = marker.stat().st_mtime if marker.exists() else entry.stat().st_mtime
+    except FileNotFoundError:
+        last = 0.0
+    return [last, size]
+
+def _write_npy(path, value: np.ndarray) -> None:
+    with open(path, "wb") as f:
+        np.save(f, value)
+
+def json_default(value):
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
@@ -1,7 +1,13 @@
 # ✅ File: compare.py (Body-normalized, speed-tolerant, clean joints)
 
 import numpy as np
-from typing import List, Tuple
+from typing import List, Optional, Tuple
+from utils.features import as_features
+from utils.profiling import profiled
+
+# Frames per block when building the (frames, offsets, joints) distance tensor;
+# keeps peak memory flat for very long clips.
+COMPARE_CHUNK = 4096
 
 def normalize_pose_proportional(pose: List[List[float]]) -> List[List[float]]:
     pose = np.array(pose)
@@ -17,40 +23,226 @@ def normalize_pose_proportional(pose: List[List[float]]) -> List[List[float]]:
     scale = np.mean([shoulder_width, hip_width, torso, leg_length]) + 1e-5
     return (pose / scale).tolist()
 
-def compare_pose(user_kps: List, ref_kps: List, indices: List[int], base_thresh: float, exercise: str, window: int = 4) -> Tuple[List, List, float]:
-    user_norm = [normalize_pose_proportional(f) for f in user_kps]
-    ref_norm = [normalize_pose_proportional(f) for f in ref_kps]
-
-    user = np.array(user_norm)[:, indices]
-    ref = np.array(ref_norm)[:, indices]
-
-    min_len = min(len(user), len(ref))
-    deviations = []
-    joint_errors = []
-    early_ignore = 50
-
-    for i in range(min_len):
-        best_error = float('inf')
-        best_diff = None
-        best_joints = None
-
-        for offset in range(-window, window + 1):
-            j = i + offset
-            if 0 <= j < len(ref):
-                diff = np.linalg.norm(user[i] - ref[j], axis=1)
-                avg_error = np.mean(diff)
-                if avg_error < best_error:
-                    best_error = avg_error
-                    best_diff = (i, avg_error)
-                    best_joints = diff
-
-        joint_errors.append(best_joints if best_joints is not None else np.zeros(len(indices)))
-
-        if i < early_ignore:
-            continue
-        if best_error < 0.01:
-            continue
-        if best_error > base_thresh:
-            deviations.append((i, best_error, "high" if best_error > base_thresh * 1.5 else "medium"))
-
-    return deviations, joint_errors, base_thresh
+@profiled("normalize_poses", frames=lambda r, *a, **k: len(r))
+def normalize_poses(poses) -> np.ndarray:
+    # Batched normalize_pose_proportional over a (frames, joints, 3) track
+    return as_features(poses).normalized
+
+def _joint_mean(diff: np.ndarray, weights: Optional[np.ndarray]) -> np.ndarray:
+    # Mean over the last (joint) axis; `weights` broadcasts against diff
+    if weights is None:
+        return np.mean(diff, axis=-1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.sum(diff * weights, axis=-1) / np.sum(weights, axis=-1)
+
+@profiled("compare.window_match", frames=lambda r, *a, **k: len(r[0]))
+def _windowed_match(user: np.ndarray, ref: np.ndarray, window: int, first: int = 0,
+                    weights: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+    # For every user frame i pick the reference frame in [i-window, i+window]
+    # with the lowest mean joint distance. Returns (best_error, best_joints).
+    # `first` is the clip frame index of user[0], so a clip can be matched in chunks.
+    # weights (frames, joints): 0 masks a joint out of the mean (its joint error is 0);
+    # frames with no weighted joint are skipped and get an infinite error.
+    n = max(0, min(len(user), len(ref) - first))
+    offsets = np.arange(-window, window + 1)
+    best_error = np.full(n, np.inf)
+    best_joints = np.zeros((n, user.shape[1]))
+
+    for start in range(0, n, COMPARE_CHUNK):
+        stop = min(start + COMPARE_CHUNK, n)
+        rows = np.arange(start, stop)
+        if weights is not None:
+            rows = rows[weights[rows].any(axis=1)]
+        j = rows[:, None] + first + offsets[None, :]
+        valid = (j >= 0) & (j < len(ref))
+        diff = np.linalg.norm(user[rows][:, None] - ref[np.clip(j, 0, len(ref) - 1)], axis=-1)
+        w = weights[rows][:, None] if weights is not None else None
+        avg = _joint_mean(diff, w)
+        avg[~valid | np.isnan(avg)] = np.inf
+
+        best = np.argmin(avg, axis=1)
+        errors = avg[np.arange(len(rows)), best]
+        best_error[rows] = errors
+        found = np.isfinite(errors)
+        joints = diff[np.arange(len(rows)), best]
+        if w is not None:
+            joints = joints * w[:, 0]
+        best_joints[rows[found]] = joints[found]
+    return best_error, best_joints
+
+def rep_signal(kps, exercise: str, confidence: Optional[np.ndarray] = None,
+               min_visibility: float = 0.0) -> Optional[np.ndarray]:
+    # confidence (frames, 33): samples where the joint is below min_visibility are
+    # replaced by interpolation between the confident ones before smoothing.
+    # `kps` may be a TrackFeatures, whose signal is computed once and reused.
+    return as_features(kps, confidence, min_visibility).rep_signal(exercise)
+
+def segment_reps(signal: np.ndarray) -> List[int]:
+    # Frames where a rep completes, using the same hysteresis as count_reps
+    threshold_down = np.percentile(signal, 70)
+    threshold_up = np.percentile(signal, 30)
+    state = None
+    bounds = []
+    for i, y in enumerate(signal):
+        if state is None and y > threshold_down:
+            state = "down"
+            bounds.append(i)
+        elif state == "down" and y < threshold_up:
+            state = "up"
+        elif state == "up" and y > threshold_down:
+            state = "down"
+            bounds.append(i)
+    return bounds
+
+def _banded_dtw(user: np.ndarray, ref: np.ndarray, band: int, open_end: bool = False,
+                expected_len: Optional[int] = None, weights: Optional[np.ndarray] = None) -> np.ndarray:
+    # Asymmetric DTW: every user frame maps to exactly one reference frame and
+    # the reference advances 0..max_step frames per user frame, so a row only
+    # depends on the previous one. The search is limited to a Sakoe-Chiba band
+    # of +-band reference frames around the diagonal; memory is O(n * band).
+    n, m = len(user), len(ref)
+    if m == 1:
+        return np.zeros(n, dtype=int)
+    span = max((expected_len or n) - 1, 1)
+    slope = (m - 1) / span
+    max_step = min(max(2, int(np.ceil(2 * slope))), 127)
+    width = 2 * band + 1
+
+    centers = np.minimum(np.round(np.arange(n) * slope).astype(int), m - 1)
+    lo = np.clip(centers - band, 0, m - 1)
+    hi = np.clip(centers + band, 0, m - 1)
+    back = np.zeros((n, width), dtype=np.int8)
+
+    # Local costs inside the band, (n, width), computed in blocks like _windowed_match
+    cost = np.full((n, width), np.inf)
+    offsets = np.arange(width)
+    for start in range(0, n, COMPARE_CHUNK):
+        stop = min(start + COMPARE_CHUNK, n)
+        j = lo[start:stop, None] + offsets[None, :]
+        inside = j <= hi[start:stop, None]
+        diff = np.linalg.norm(user[start:stop, None] - ref[np.minimum(j, m - 1)], axis=-1)
+        block = _joint_mean(diff, weights[start:stop, None] if weights is not None else None)
+        block[~np.isfinite(block)] = 1e6
+        block[~inside] = np.inf
+        cost[start:stop] = block
+
+    prev = np.full(m + max_step, np.inf)  # max_step leading pads stay at inf
+    prev[max_step] = cost[0, 0] if lo[0] == 0 else 1e6
+    cur = np.empty_like(prev)
+
+    for i in range(1, n):
+        a, b = lo[i] + max_step, hi[i] + max_step + 1
+        cand = np.stack([prev[a - s:b - s] for s in range(max_step + 1)])
+        step = np.argmin(cand, axis=0)
+        cur.fill(np.inf)
+        cur[a:b] = cost[i, :b - a] + cand[step, np.arange(b - a)]
+        back[i, :b - a] = step
+        prev, cur = cur, prev
+
+    last = prev[max_step:]
+    j = int(np.argmin(last)) if open_end or not np.isfinite(last[m - 1]) else m - 1
+    if not np.isfinite(last[j]):
+        return centers
+    path = np.empty(n, dtype=int)
+    for i in range(n - 1, 0, -1):
+        path[i] = j
+        j -= int(back[i, j - lo[i]])
+    path[0] = j
+    return path
+
+@profiled("compare.dtw_match", frames=lambda r, *a, **k: len(r[0]))
+def _dtw_match(user: np.ndarray, ref: np.ndarray, user_signal: Optional[np.ndarray],
+               ref_signal: Optional[np.ndarray], band: int,
+               weights: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+    # Align each detected user rep against one reference rep so clips much
+    # longer (or slower/faster) than the reference still line up.
+    template = ref
+    if ref_signal is not None:
+        ref_bounds = segment_reps(ref_signal)
+        if len(ref_bounds) >= 2:
+            template = ref[ref_bounds[0]:ref_bounds[1]]
+
+    cuts = segment_reps(user_signal)[1:] if user_signal is not None else []
+    edges = [0] + [c for c in cuts if 0 < c < len(user)] + [len(user)]
+    lengths = np.diff(edges)
+    expected = int(np.median(lengths[:-1])) if len(lengths) > 1 else None
+
+    path = np.empty(len(user), dtype=int)
+    for k, (start, stop) in enumerate(zip(edges[:-1], edges[1:])):
+        last = k == len(edges) - 2
+        path[start:stop] = _banded_dtw(user[start:stop], template, band,
+                                       open_end=last and len(edges) > 2,
+                                       expected_len=expected if last else None,
+                                       weights=weights[start:stop] if weights is not None else None)
+
+    best_joints = np.linalg.norm(user - template[path], axis=-1)
+    best_error = _joint_mean(best_joints, weights)
+    if weights is not None:
+        best_joints = best_joints * weights
+    missing = ~np.isfinite(best_error)
+    best_error[missing] = np.inf
+    best_joints[missing] = 0
+    return best_error, best_joints
+
+@profiled("compare_pose", frames=lambda r, user_kps, *a, **k: len(user_kps))
+def compare_pose(user_kps: List, ref_kps: List, indices: List[int], base_thresh: float, exercise: str,
+                 window: int = 4, alignment: str = "window", band: int = 30,
+                 ref_selected: Optional[np.ndarray] = None,
+                 ref_signal: Optional[np.ndarray] = None,
+                 weights: Optional[np.ndarray] = None,
+                 user_signal: Optional[np.ndarray] = None) -> Tuple[List, np.ndarray, float]:
+    # ref_selected / ref_signal: the reference already normalised at `indices` and
+    # its rep signal (see utils/reference_registry.py); ref_kps is then not re-read.
+    # weights (frames, len(indices)): per-joint confidence mask (PoseTrack.joint_weights);
+    # user_signal replaces rep_signal(user_kps) for DTW rep segmentation. user_kps and
+    # ref_kps may be TrackFeatures (PoseTrack.features), so nothing is recomputed.
+    features = as_features(user_kps)
+    user = normalize_poses(features)
+    if ref_selected is None:
+        ref_kps = as_features(ref_kps)
+    ref = ref_selected if ref_selected is not None else normalize_poses(ref_kps)[:, indices]
+    if len(user) == 0 or len(ref) == 0:
+        return [], np.zeros((0, len(indices))), base_thresh
+
+    if alignment == "dtw":
+        if ref_signal is None and ref_selected is None:
+            ref_signal = rep_signal(ref_kps, exercise)
+        if user_signal is None:
+            user_signal = features.rep_signal(exercise)
+        best_error, joint_errors = _dtw_match(user[:, indices], ref, user_signal, ref_signal, band, weights)
+    elif alignment == "window":
+        best_error, joint_errors = _windowed_match(user[:, indices], ref, window, weights=weights)
+    else:
+        raise ValueError(f"Unknown alignment mode: {alignment}")
+
+    return _flag_deviations(best_error, base_thresh), joint_errors, base_thresh
+
+def _flag_deviations(best_error: np.ndarray, base_thresh: float, first: int = 0,
+                     early_ignore: int = 50) -> List[tuple]:
+    # Frames without a visible enough joint keep an infinite error: unscored, not deviating
+    flagged = np.flatnonzero(np.isfinite(best_error) & (best_error > base_thresh) & (best_error >= 0.01))
+    flagged = flagged[flagged + first >= early_ignore]
+    return [
+        (int(i) + first, best_error[i], "high" if best_error[i] > base_thresh * 1.5 else "medium")
+        for i in flagged
+    ]
+
+def unscored_frames(weights: Optional[np.ndarray]) -> int:
+    # Frames compare_pose cannot score because every joint is masked out by `weights`;
+    # they are left out of the frame count behind the error rate and grade
+    if weights is None:
+        return 0
+    return int(np.count_nonzero(~np.asarray(weights).any(axis=1)))
+
+def compare_window_chunk(user_kps: List, ref_selected: np.ndarray, indices: List[int], base_thresh: float,
+                         first: int, window: int = 4,
+                         weights: Optional[np.ndarray] = None) -> Tuple[List, np.ndarray]:
+    # compare_pose(alignment="window") for clip frames first..first+len(user_kps).
+    # A frame is only matched against reference frames near its own index, so
+    # comparing a clip chunk by chunk gives exactly the deviations of one call
+    # over the whole clip; returns (deviations, joint_errors) for the chunk.
+    user = normalize_poses(user_kps)
+    if len(user) == 0 or len(ref_selected) == 0:
+        return [], np.zeros((0, len(indices)))
+    best_error, joint_errors = _windowed_match(user[:, indices], ref_selected, window, first, weights)
+    return _flag_deviations(best_error, base_thresh, first), joint_errors
@@ -0,0 +1,119 @@
+# ✅ File: exercise_classifier.py (nearest-neighbour exercise recognition against the reference library)
+
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+from utils.features import as_features
+from utils.profiling import profiled
+
+# Smallest per-feature scale used for standardisation (radians / torso lengths)
+MIN_SCALE = 0.1
+
+def frame_channels(keypoints) -> np.ndarray:
+    # (frames, 6): TrackFeatures.channels (joint angles with left/right averaged so the
+    # descriptor does not depend on which side faces the camera, torso incline, wrist height)
+    return as_features(keypoints).channels
+
+def window_features(keypoints, window: int, hop: int) -> np.ndarray:
+    # (windows, 12): per-channel mean and range over each window; a clip
+    # shorter than one window gives a single window over all of it.
+    # `keypoints` may be a TrackFeatures.
+    channels = frame_channels(keypoints)
+    n = len(channels)
+    if n == 0:
+        return np.zeros((0, 2 * channels.shape[1]))
+    if n < window:
+        windows = channels[None]
+    else:
+        # (windows, window, channels) view, no copy
+        windows = sliding_window_view(channels, window, axis=0)[::hop].transpose(0, 2, 1)
+    feats = np.concatenate([np.nanmean(windows, axis=1),
+                            np.nanmax(windows, axis=1) - np.nanmin(windows, axis=1)], axis=1)
+    return np.nan_to_num(feats)
+
+class ExerciseClassifier:
+    # k-NN over window descriptors of every reference track. Class scores are
+    # the mean distance to the k nearest windows of each class, turned into
+    # probabilities with a softmax whose temperature is the typical
+    # within-class nearest-neighbour distance of the library. The result is then
+    # scaled down when the clip is further from every reference than
+    # reference windows usually are from each other (out-of-library motion).
+    # `references` maps each exercise to its keypoints or TrackFeatures.
+    def __init__(self, references: Dict[str, np.ndarray], window: int = 45, hop: int = 15, k: int = 3,
+                 min_confidence: float = 0.5):
+        self.window = window
+        self.hop = hop
+        self.k = k
+        self.min_confidence = min_confidence
+        feats, labels = [], []
+        for exercise, keypoints in references.items():
+            f = window_features(keypoints, window, hop)
+            feats.append(f)
+            labels += [exercise] * len(f)
+        self.classes = sorted(references)
+        features = np.concatenate(feats) if feats else np.zeros((0, 12))
+        self.mean = features.mean(axis=0) if len(features) else 0.0
+        # Floor the scale: with one clip per exercise some channels barely vary
+        # and would otherwise dominate the distance
+        self.scale = np.maximum(features.std(axis=0), MIN_SCALE) if len(features) else 1.0
+        self.features = (features - self.mean) / self.scale
+        self.labels = np.array(labels)
+        self.temperature, self.typical_distance = self._calibrate()
+
+    def _calibrate(self) -> Tuple[float, float]:
+        # Nearest same-class neighbour that does not overlap in time
+        overlap = max(1, int(np.ceil(self.window / self.hop)))
+        dists = []
+        for c in self.classes:
+            idx = np.flatnonzero(self.labels == c)
+            f = self.features[idx]
+            d = np.linalg.norm(f[:, None] - f[None], axis=-1)
+            gap = np.abs(np.arange(len(idx))[:, None] - np.arange(len(idx))[None])
+            d[gap < overlap] = np.inf
+            nearest = d.min(axis=1)
+            dists.extend(nearest[np.isfinite(nearest)])
+        if not dists:
+            return 1.0, 1.0
+        return float(np.median(dists)) + 1e-6, float(np.percentile(dists, 95)) + 1e-6
+
+    def window_probabilities(self, keypoints) -> np.ndarray:
+        # (windows, classes)
+        query = (window_features(keypoints, self.window, self.hop) - self.mean) / self.scale
+        if len(query) == 0 or len(self.features) == 0:
+            return np.zeros((0, len(self.classes)))
+        d = np.linalg.norm(query[:, None] - self.features[None], axis=-1)
+        scores = np.stack([np.sort(d[:, self.labels == c], axis=1)[:, :self.k].mean(axis=1)
+                           for c in self.classes], axis=1)
+        logits = -(scores - scores.min(axis=1, keepdims=True)) / self.temperature
+        probs = np.exp(logits)
+        probs /= probs.sum(axis=1, keepdims=True)
+        familiarity = np.minimum(1.0, self.typical_distance / scores.min(axis=1))
+        return probs * familiarity[:, None]
+
+    @profiled("classify_exercise", frames=lambda r, self, keypoints, *a, **k: len(keypoints))
+    def classify(self, keypoints) -> Tuple[Optional[str], float]:
+        # Same contract as detect_exercise_type_with_confidence: (label, confidence),
+        # "unknown" when no reference is a convincing match
+        if len(keypoints) < 10 or not self.classes:
+            return None, 0.0
+        probs = self.window_probabilities(keypoints)
+        if len(probs) == 0:
+            return None, 0.0
+        return self.label(probs.mean(axis=0))
+
+    def label(self, mean: np.ndarray) -> Tuple[str, float]:
+        # (label, confidence) from window probabilities averaged over a clip
+        best = int(np.argmax(mean))
+        if mean[best] < self.min_confidence:
+            return "unknown", float(mean[best])
+        return self.classes[best], float(mean[best])
+
+def build_classifier(entries: List, config: Dict) -> Optional[ExerciseClassifier]:
+    # From ReferenceRegistry entries; needs at least two exercises to tell apart
+    if len(entries) < 2:
+        return None
+    cfg = config["classifier"]
+    return ExerciseClassifier({e.exercise: e.features for e in entries},
+                              cfg["window"], cfg["hop"], cfg["k"], cfg["min_confidence"])
@@ -0,0 +1,171 @@
+# ✅ File: features.py (per-track biomechanics features: joint angles, segment lengths, velocities, rep signals)
+#
+# TrackFeatures converts a (frames, 33, 3) keypoint track to float64 once and
+# derives everything the analysis steps read from it: the body-normalised track,
+# segment lengths, joint angles, frame-to-frame velocities, the classifier's
+# channels and the smoothed rep signal of each exercise. Each feature is computed
+# in one vectorised pass over all frames the first time it is read, then kept.
+# compare_pose, count_reps, the exercise detectors and FeedbackGenerator accept
+# a TrackFeatures wherever they take keypoints (PoseTrack.features holds one).
+
+from functools import cached_property
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+# MediaPipe Pose landmark names by landmark index
+LANDMARK_NAMES = [
+    "nose", "left eye inner", "left eye", "left eye outer", "right eye inner", "right eye", "right eye outer",
+    "left ear", "right ear", "mouth left", "mouth right",
+    "left shoulder", "right shoulder", "left elbow", "right elbow", "left wrist", "right wrist",
+    "left pinky", "right pinky", "left index", "right index", "left thumb", "right thumb",
+    "left hip", "right hip", "left knee", "right knee", "left ankle", "right ankle",
+    "left heel", "right heel", "left foot index", "right foot index",
+]
+
+def landmark_names(indices: Sequence[int]) -> List[str]:
+    # Names of the given landmarks, e.g. of joint_errors' columns (CONFIG["keypoint_indices"])
+    return [LANDMARK_NAMES[i] if 0 <= i < len(LANDMARK_NAMES) else f"landmark {i}" for i in indices]
+
+# Landmark whose vertical position drives rep detection for each exercise
+REP_SIGNAL_JOINTS = {"squat": 24, "press": 15, "deadlift": 24, "pushup": 11}
+
+# Bone segments as (from, to) landmarks; the first four make up the body scale
+SEGMENTS = {
+    "shoulders": (11, 12), "hips": (23, 24), "left_torso": (11, 23), "left_hip_to_ankle": (23, 27),
+    "right_torso": (12, 24), "right_hip_to_ankle": (24, 28),
+    "left_upper_arm": (11, 13), "left_forearm": (13, 15), "right_upper_arm": (12, 14), "right_forearm": (14, 16),
+    "left_thigh": (23, 25), "left_shin": (25, 27), "right_thigh": (24, 26), "right_shin": (26, 28),
+}
+SCALE_SEGMENTS = 4
+
+# Angle at the middle landmark, left then right for each joint
+ANGLES = {
+    "left_elbow": (11, 13, 15), "right_elbow": (12, 14, 16),
+    "left_shoulder": (13, 11, 23), "right_shoulder": (14, 12, 24),
+    "left_hip": (11, 23, 25), "right_hip": (12, 24, 26),
+    "left_knee": (23, 25, 27), "right_knee": (24, 26, 28),
+}
+JOINT_ANGLES = ["elbow", "shoulder", "hip", "knee"]
+
+# Joint angle whose range of motion describes a rep of each exercise
+PRIMARY_ANGLE = {"squat": "knee", "press": "elbow", "deadlift": "hip", "pushup": "elbow"}
+
+def _lengths(x: np.ndarray, y: np.ndarray, pairs: np.ndarray) -> np.ndarray:
+    dx = x[:, pairs[:, 0]] - x[:, pairs[:, 1]]
+    dy = y[:, pairs[:, 0]] - y[:, pairs[:, 1]]
+    return np.sqrt(dx * dx + dy * dy)
+
+class TrackFeatures:
+    # confidence (frames, 33): per-landmark visibility; rep signals interpolate the
+    # signal joint through frames where it is below min_visibility
+    def __init__(self, keypoints, confidence: Optional[np.ndarray] = None, min_visibility: float = 0.0):
+        self.keypoints = np.asarray(keypoints, dtype=np.float64)
+        if len(self.keypoints) == 0:
+            self.keypoints = self.keypoints.reshape(0, 33, 3)
+        self.confidence = np.asarray(confidence) if confidence is not None else None
+        self.min_visibility = min_visibility
+        self._signals: Dict[str, Optional[np.ndarray]] = {}
+
+    def __len__(self) -> int:
+        return len(self.keypoints)
+
+    @cached_property
+    def x(self) -> np.ndarray:
+        # (frames, 33) image x; with `y`, contiguous per-axis copies the other features gather from
+        return np.ascontiguousarray(self.keypoints[:, :, 0])
+
+    @cached_property
+    def y(self) -> np.ndarray:
+        return np.ascontiguousarray(self.keypoints[:, :, 1])
+
+    @cached_property
+    def segments(self) -> np.ndarray:
+        # (frames, len(SEGMENTS)) image-plane bone lengths
+        return _lengths(self.x, self.y, np.array(list(SEGMENTS.values())))
+
+    @cached_property
+    def scale(self) -> np.ndarray:
+        # (frames,) mean of shoulder width, hip width, torso and hip-to-ankle length.
+        # matmul rather than the `segments` formula: the dot-product rounding that
+        # normalize_pose_proportional, the stored references and cached results use
+        pairs = np.array(list(SEGMENTS.values())[:SCALE_SEGMENTS])
+        d = self.keypoints[:, pairs[:, 0], :2] - self.keypoints[:, pairs[:, 1], :2]
+        return np.mean(np.sqrt(np.matmul(d[..., None, :], d[..., :, None])[..., 0, 0]), axis=-1) + 1e-5
+
+    @cached_property
+    def normalized(self) -> np.ndarray:
+        # Keypoints divided by the body scale, so comparison does not depend on
+        # how far the person stands from the camera
+        if len(self) == 0:
+            return self.keypoints
+        return self.keypoints / self.scale[:, None, None]
+
+    @cached_property
+    def angles(self) -> np.ndarray:
+        # (frames, len(ANGLES)) radians
+        a, b, c = np.array(list(ANGLES.values())).T
+        x, y = self.x, self.y
+        bax, bay = x[:, a] - x[:, b], y[:, a] - y[:, b]
+        bcx, bcy = x[:, c] - x[:, b], y[:, c] - y[:, b]
+        cos = (bax * bcx + bay * bcy) / (np.sqrt(bax * bax + bay * bay) * np.sqrt(bcx * bcx + bcy * bcy) + 1e-9)
+        return np.arccos(np.clip(cos, -1.0, 1.0))
+
+    def angle(self, joint: str) -> np.ndarray:
+        # Left/right average of one joint's angle (either side may face the camera)
+        i = JOINT_ANGLES.index(joint)
+        return self.channels[:, i]
+
+    @cached_property
+    def velocity(self) -> np.ndarray:
+        # (frames - 1, 33, 2) landmark displacement per frame
+        return np.diff(self.keypoints[:, :, :2], axis=0)
+
+    @cached_property
+    def channels(self) -> np.ndarray:
+        # (frames, 6): elbow, shoulder, hip and knee angles, torso incline from
+        # vertical (0 standing, pi/2 lying) and wrist height above the shoulders in torso lengths
+        left, right = self.angles[:, 0::2], self.angles[:, 1::2]
+        # nanmean of each left/right pair, without its per-call overhead
+        joints = np.where(np.isnan(left), right, np.where(np.isnan(right), left, (left + right) / 2))
+        x, y = self.x, self.y
+        shoulder_x, shoulder_y = (x[:, 11] + x[:, 12]) / 2, (y[:, 11] + y[:, 12]) / 2
+        torso_x, torso_y = (x[:, 23] + x[:, 24]) / 2 - shoulder_x, (y[:, 23] + y[:, 24]) / 2 - shoulder_y
+        torso_len = np.sqrt(torso_x * torso_x + torso_y * torso_y) + 1e-9
+        incline = np.arccos(np.clip(np.abs(torso_y) / torso_len, 0.0, 1.0))
+        wrists = (y[:, 15] + y[:, 16]) / 2
+        return np.stack([*joints.T, incline, (shoulder_y - wrists) / torso_len], axis=-1)
+
+    def rep_signal(self, exercise: str) -> Optional[np.ndarray]:
+        # Vertical position of the exercise's signal joint with a 3-frame moving
+        # average (None for an unknown exercise or an empty track)
+        if exercise not in self._signals:
+            joint = REP_SIGNAL_JOINTS.get(exercise)
+            if joint is None or len(self) == 0:
+                self._signals[exercise] = None
+            else:
+                values = self.keypoints[:, joint, 1]
+                if self.confidence is not None and self.min_visibility > 0:
+                    # Interpolate through frames where the joint is not visible enough
+                    ok = self.confidence[:, joint] >= self.min_visibility
+                    if ok.any() and not ok.all():
+                        frames = np.arange(len(values))
+                        values = np.interp(frames, frames[ok], values[ok])
+                self._signals[exercise] = np.convolve(values, np.ones(3)/3, mode='same')
+        return self._signals[exercise]
+
+    def range_of_motion(self, joint: str) -> Dict[str, float]:
+        # Extended / flexed angle in degrees (5th-95th percentile, robust to single
+        # bad frames) and the range between them
+        angle = np.degrees(self.angle(joint))
+        angle = angle[np.isfinite(angle)]
+        if len(angle) == 0:
+            return {"min": float("nan"), "max": float("nan"), "range": 0.0}
+        low, high = np.percentile(angle, [5, 95])
+        return {"min": float(low), "max": float(high), "range": float(high - low)}
+
+def as_features(keypoints, confidence: Optional[np.ndarray] = None, min_visibility: float = 0.0) -> TrackFeatures:
+    # A TrackFeatures is passed through (keeping its own confidence); anything else is wrapped
+    if isinstance(keypoints, TrackFeatures):
+        return keypoints
+    return TrackFeatures(keypoints, confidence, min_visibility)
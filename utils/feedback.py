@@ -2,18 +2,24 @@
 
 from typing import List, Optional, Dict
 import numpy as np
+from utils.features import LANDMARK_NAMES, PRIMARY_ANGLE, TrackFeatures, landmark_names
+from utils.profiling import profiled
 
-JOINT_NAMES = [
-    "nose", "left eye", "right eye", "left ear", "right ear",
-    "left shoulder", "right shoulder", "left elbow", "right elbow",
-    "left wrist", "right wrist", "left hip", "right hip",
-    "left knee", "right knee", "left ankle", "right ankle"
-]
+# Kept for callers of the old name: MediaPipe landmark names by landmark index.
+# Index it with a landmark (CONFIG["keypoint_indices"][column]), not a joint_errors column.
+JOINT_NAMES = LANDMARK_NAMES
 
 class FeedbackGenerator:
+    @profiled("generate_feedback", frames=lambda r, self, diff_frames, total_frames, *a, **k: total_frames)
     def generate_feedback(self, diff_frames: List[tuple], total_frames: int,
                           min_ratio: float, joint_errors: List[np.ndarray],
-                          mismatch: bool = False, detected_type: Optional[str] = None) -> Dict:
+                          mismatch: bool = False, detected_type: Optional[str] = None,
+                          features: Optional[TrackFeatures] = None, exercise: Optional[str] = None,
+                          indices: Optional[List[int]] = None) -> Dict:
+        # features / exercise: the clip's TrackFeatures and selected exercise add the
+        # range of motion of the exercise's main joint angle, which unlike the
+        # landmark errors does not depend on where the camera stands.
+        # indices: the landmarks behind joint_errors' columns (CONFIG["keypoint_indices"])
         if mismatch:
             return {
                 "priority_feedback": [{
@@ -33,7 +39,10 @@ class FeedbackGenerator:
             if joint_array.shape[0] > 5:
                 joint_deviation = np.mean(joint_array, axis=0)
                 top_joints = np.argsort(joint_deviation)[-3:][::-1]
-                joint_names = [JOINT_NAMES[i] if i < len(JOINT_NAMES) else f'joint {i}' for i in top_joints]
+                if indices is not None:
+                    joint_names = landmark_names([indices[i] for i in top_joints])
+                else:
+                    joint_names = [f'joint {i}' for i in top_joints]
                 joint_text = ', '.join(joint_names)
                 feedback.append({
                     "message": f"👁️ Most affected joints: **{joint_text}**",
@@ -41,6 +50,18 @@ class FeedbackGenerator:
                     "error_magnitude": float(np.mean(joint_deviation))
                 })
 
+        rom = None
+        joint = PRIMARY_ANGLE.get(exercise)
+        if features is not None and joint is not None and len(features) > 5:
+            rom = dict(features.range_of_motion(joint), joint=joint)
+            if rom["range"] > 0:
+                feedback.append({
+                    "message": f"📐 {joint.title()} range of motion: **{rom['range']:.0f}°** "
+                               f"({rom['max']:.0f}° to {rom['min']:.0f}°)",
+                    "severity": "low",
+                    "error_magnitude": 0.0
+                })
+
         #for f in diff_frames:
             #feedback.append({
                 #"message": f"Form deviation detected at frame {f[0]} (error = {f[1]:.2f})",
@@ -50,5 +71,6 @@ class FeedbackGenerator:
 
         return {
             "priority_feedback": feedback,
-            "performance_grade": grade
+            "performance_grade": grade,
+            "range_of_motion": rom
         }
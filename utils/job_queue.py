@@ -0,0 +1,232 @@
+# ✅ File: job_queue.py (local job queue: worker processes, job IDs, on-disk status and results)
+#
+# Layout:  <root>/<job id>/spec.json     what to run
+#          <root>/<job id>/status.json   state, progress and the latest partial result
+#          <root>/<job id>/result.json   the job's return value once it is done
+#
+# state: queued -> running -> done | failed; jobs whose server process went away
+# while queued/running are marked "interrupted" and run again on the next submit.
+
+import importlib
+import json
+import os
+import shutil
+import threading
+import time
+import traceback
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import get_context
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Union
+
+from utils.analysis_cache import json_default
+
+ACTIVE = ("queued", "running")
+
+def _write_json(path: Path, data: Dict) -> None:
+    # Write-then-rename so pollers in other processes never read half a file
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    with open(tmp, "w") as f:
+        json.dump(data, f, default=json_default)
+    os.replace(tmp, path)
+
+def _read_json(path: Path) -> Optional[Dict]:
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
+Target = Union[Callable, str]  # a module-level function, or "package.module:function"
+
+def _resolve(target: Target) -> Callable:
+    # Strings are imported in the worker, so the submitting process never loads the
+    # job's dependencies (e.g. MediaPipe in the Streamlit server)
+    if callable(target):
+        return target
+    module, _, name = target.partition(":")
+    return getattr(importlib.import_module(module), name)
+
+def _init_worker(initializer: Optional[Target], initargs: tuple) -> None:
+    if initializer is not None:
+        _resolve(initializer)(*initargs)
+
+def default_workers(workers: Optional[int] = None) -> int:
+    # Pool size for `workers` (None = half the CPUs, at least one)
+    return workers or max(1, (os.cpu_count() or 2) // 2)
+
+def _ready() -> int:
+    return os.getpid()
+
+def _alive(pid: Optional[int]) -> bool:
+    if not pid:
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+class JobStatus:
+    # Status writer used inside a job: report(progress=..., partial=...) merges the
+    # fields into status.json, at most every `min_interval` seconds unless forced
+    def __init__(self, job_dir: Path, status: Dict, min_interval: float = 0.25):
+        self.path = job_dir / "status.json"
+        self.status = status
+        self.min_interval = min_interval
+        self._written = 0.0
+
+    def report(self, force: bool = False, **fields) -> None:
+        self.status.update(fields)
+        now = time.time()
+        if force or now - self._written >= self.min_interval:
+            self.status["updated"] = now
+            _write_json(self.path, self.status)
+            self._written = now
+
+def _run_job(root: str, job_id: str, fn: Target, spec: Dict) -> None:
+    # Runs in a worker process; fn(spec, report) returns the JSON-able result
+    job_dir = Path(root) / job_id
+    status = JobStatus(job_dir, _read_json(job_dir / "status.json") or {"id": job_id})
+    status.report(force=True, state="running", started=time.time(), worker=os.getpid())
+    try:
+        result = _resolve(fn)(spec, status.report)
+        _write_json(job_dir / "result.json", result if result is not None else {})
+        status.report(force=True, state="done", progress=1.0, finished=time.time())
+    except Exception as e:
+        status.report(force=True, state="failed", finished=time.time(),
+                      error=f"{type(e).__name__}: {e}", traceback=traceback.format_exc())
+
+class JobQueue:
+    # Jobs run in a pool of `workers` processes, which caps how many run at once across
+    # every session of the server; the rest wait in the pool's queue. The caller picks the
+    # job ID (derived from the inputs), so submitting the same work again returns the job
+    # already queued, running or done instead of recomputing it, and any session can
+    # poll a job by ID after a page reload. `initializer(*initargs)` runs once per
+    # worker (e.g. to build a MediaPipe graph). Worker processes are spawned, not
+    # forked, so they never inherit the server's threads, and start on the first
+    # submit unless warm() starts them earlier.
+    def __init__(self, root: Union[str, Path], workers: int = 1, initializer: Optional[Target] = None,
+                 initargs: tuple = ()):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.workers = max(1, workers)
+        self.initializer = initializer
+        self.initargs = initargs
+        self._pool = self._new_pool()
+        self._futures: Dict[str, Future] = {}
+        self._order: List[str] = []
+        self._lock = threading.RLock()  # done-callbacks can fire inside submit()
+        self._recover()
+
+    def _new_pool(self) -> ProcessPoolExecutor:
+        return ProcessPoolExecutor(max_workers=self.workers, mp_context=get_context("spawn"),
+                                   initializer=_init_worker, initargs=(self.initializer, self.initargs))
+
+    def warm(self) -> None:
+        # Start every worker and run its initializer now, in the background, so the
+        # first job does not pay for process start-up, imports and model loading
+        with self._lock:
+            for _ in range(self.workers):
+                self._pool.submit(_ready)
+
+    def _recover(self) -> None:
+        # Jobs left queued/running by a server process that no longer exists
+        for path in self.root.glob("*/status.json"):
+            status = _read_json(path)
+            if status and status.get("state") in ACTIVE and not _alive(status.get("owner")):
+                status.update(state="interrupted", updated=time.time())
+                _write_json(path, status)
+
+    def submit(self, job_id: str, fn: Target, spec: Dict, force: bool = False) -> str:
+        # fn must be a module-level function (it is pickled into the worker) or its
+        # "module:function" path
+        with self._lock:
+            status = self.status(job_id)
+            if status is not None and not force:
+                if status["state"] == "done":
+                    return job_id
+                if status["state"] in ACTIVE and _alive(status.get("owner")):
+                    return job_id
+            job_dir = self.root / job_id
+            job_dir.mkdir(parents=True, exist_ok=True)
+            (job_dir / "result.json").unlink(missing_ok=True)
+            _write_json(job_dir / "spec.json", spec)
+            _write_json(job_dir / "status.json", {"id": job_id, "state": "queued", "progress": 0.0,
+                                                  "owner": os.getpid(), "created": time.time(),
+                                                  "updated": time.time()})
+            try:
+                future = self._pool.submit(_run_job, str(self.root), job_id, fn, spec)
+            except BrokenProcessPool:
+                # A worker died (e.g. a crash inside native code); start a fresh pool
+                self._pool = self._new_pool()
+                future = self._pool.submit(_run_job, str(self.root), job_id, fn, spec)
+            future.add_done_callback(lambda f, job_id=job_id: self._finished(job_id, f))
+            self._futures[job_id] = future
+            self._order = [j for j in self._order if j != job_id] + [job_id]
+            return job_id
+
+    def _finished(self, job_id: str, future: Future) -> None:
+        # _run_job records its own failures; this catches the worker process dying
+        error = future.exception() if not future.cancelled() else None
+        status = self.status(job_id)
+        if error is not None and status is not None and status["state"] in ACTIVE:
+            status.update(state="failed", error=f"{type(error).__name__}: {error}", finished=time.time())
+            _write_json(self.root / job_id / "status.json", status)
+        with self._lock:
+            self._futures.pop(job_id, None)
+            self._order = [j for j in self._order if j != job_id]
+
+    def status(self, job_id: str) -> Optional[Dict]:
+        status = _read_json(self.root / job_id / "status.json")
+        if status is not None and status.get("state") == "queued":
+            status["ahead"] = self.position(job_id)
+        return status
+
+    def result(self, job_id: str) -> Optional[Dict]:
+        return _read_json(self.root / job_id / "result.json")
+
+    def spec(self, job_id: str) -> Optional[Dict]:
+        return _read_json(self.root / job_id / "spec.json")
+
+    def position(self, job_id: str) -> int:
+        # Jobs submitted earlier that have not started yet
+        order = list(self._order)
+        if job_id not in order:
+            return 0
+        return sum(1 for j in order[:order.index(job_id)]
+                   if (_read_json(self.root / j / "status.json") or {}).get("state") == "queued")
+
+    def prune(self, max_age_seconds: float) -> int:
+        # Remove finished jobs not updated for max_age_seconds; returns how many
+        removed = 0
+        now = time.time()
+        for job_dir in self.root.iterdir():
+            status = _read_json(job_dir / "status.json")
+            if status is None or status.get("state") in ACTIVE or job_dir.name in self._futures:
+                continue
+            if now - status.get("updated", 0) > max_age_seconds:
+                shutil.rmtree(job_dir, ignore_errors=True)
+                removed += 1
+        return removed
+
+    def active(self) -> int:
+        return len(self._futures)
+
+    def active_specs(self) -> List[Dict]:
+        # Specs of the jobs queued or running in any live server process (e.g. so the
+        # upload janitor keeps their input videos)
+        specs = []
+        for path in self.root.glob("*/status.json"):
+            status = _read_json(path)
+            if status and status.get("state") in ACTIVE and _alive(status.get("owner")):
+                spec = _read_json(path.with_name("spec.json"))
+                if spec is not None:
+                    specs.append(spec)
+        return specs
+
+    def shutdown(self, wait: bool = True) -> None:
+        self._pool.shutdown(wait=wait, cancel_futures=True)
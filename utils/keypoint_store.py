@@ -0,0 +1,139 @@
+# ✅ File: keypoint_store.py (versioned binary keypoint tracks, memory-mappable)
+#
+# Layout of a .kps file:
+#   8 bytes   magic  b"SGTKPS\x00\x01"
+#   4 bytes   little-endian uint32 header length
+#   N bytes   UTF-8 JSON header (version, shape, dtype, metadata), space padded
+#   ...       float32 C-order array of shape (frames, joints, 3), 64-byte aligned
+
+import hashlib
+import json
+import struct
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple, Union
+
+import numpy as np
+
+MAGIC = b"SGTKPS\x00\x01"
+FORMAT_VERSION = 1
+DATA_ALIGNMENT = 64
+MEDIAPIPE_JOINTS = list(range(33))
+
+PathLike = Union[str, Path]
+
+def hash_file(path: PathLike, chunk_size: int = 1 << 20) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+def save_track(path: PathLike, keypoints, fps: Optional[float] = None,
+               joint_indices: Optional[List[int]] = None,
+               source_video: Optional[PathLike] = None, **metadata) -> Path:
+    arr = np.ascontiguousarray(np.asarray(keypoints, dtype=np.float32))
+    if arr.ndim != 3 or arr.shape[2] != 3:
+        raise ValueError(f"Expected keypoints of shape (frames, joints, 3), got {arr.shape}")
+    if joint_indices is None:
+        joint_indices = MEDIAPIPE_JOINTS[:arr.shape[1]]
+    if len(joint_indices) != arr.shape[1]:
+        raise ValueError("joint_indices must have one entry per joint column")
+
+    meta = dict(metadata)
+    meta["fps"] = fps
+    meta["joint_indices"] = [int(i) for i in joint_indices]
+    if source_video is not None:
+        meta["source_video"] = Path(source_video).name
+        if Path(source_video).is_file():
+            meta["source_sha256"] = hash_file(source_video)
+
+    header = {
+        "version": FORMAT_VERSION,
+        "dtype": "<f4",
+        "shape": list(arr.shape),
+        "metadata": meta,
+    }
+    header_bytes = json.dumps(header).encode("utf-8")
+    prefix = len(MAGIC) + 4
+    pad = (-(prefix + len(header_bytes))) % DATA_ALIGNMENT
+    header_bytes += b" " * pad
+
+    path = Path(path)
+    with open(path, "wb") as f:
+        f.write(MAGIC)
+        f.write(struct.pack("<I", len(header_bytes)))
+        f.write(header_bytes)
+        f.write(arr.astype("<f4", copy=False).tobytes())
+    return path
+
+def read_header(path: PathLike) -> Tuple[Dict, int]:
+    with open(path, "rb") as f:
+        magic = f.read(len(MAGIC))
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a keypoint store file")
+        (header_len,) = struct.unpack("<I", f.read(4))
+        header = json.loads(f.read(header_len).decode("utf-8"))
+    if header.get("version", 0) > FORMAT_VERSION:
+        raise ValueError(f"{path} uses keypoint store version {header['version']}, "
+                         f"this build reads up to {FORMAT_VERSION}")
+    return header, len(MAGIC) + 4 + header_len
+
+def load_track(path: PathLike, mmap: bool = True) -> Tuple[np.ndarray, Dict]:
+    header, offset = read_header(path)
+    shape = tuple(header["shape"])
+    if shape[0] == 0:
+        return np.zeros(shape, dtype=np.float32), header["metadata"]
+    if mmap:
+        arr = np.memmap(path, dtype=header["dtype"], mode="r", offset=offset, shape=shape)
+    else:
+        with open(path, "rb") as f:
+            f.seek(offset)
+            arr = np.fromfile(f, dtype=header["dtype"], count=int(np.prod(shape))).reshape(shape)
+    return arr, header["metadata"]
+
+def load_keypoints(path: PathLike, mmap: bool = True) -> np.ndarray:
+    # Accepts both .kps files and the legacy JSON references (dict or bare list).
+    # Tracks stored with a subset of joints are scattered back into MediaPipe's
+    # 33-landmark layout (NaN elsewhere) so indices match compare_pose's.
+    path = Path(path)
+    if path.suffix == ".kps":
+        arr, meta = load_track(path, mmap=mmap)
+        joints = meta.get("joint_indices", MEDIAPIPE_JOINTS[:arr.shape[1]])
+        if joints == MEDIAPIPE_JOINTS[:arr.shape[1]]:
+            return arr
+        full = np.full((arr.shape[0], len(MEDIAPIPE_JOINTS), 3), np.nan, dtype=np.float32)
+        full[:, joints] = arr
+        return full
+    with open(path) as f:
+        data = json.load(f)
+    keypoints = data["keypoints"] if isinstance(data, dict) else data
+    return np.asarray(keypoints, dtype=np.float32)
+
+def convert_json(json_path: PathLike, out_path: Optional[PathLike] = None,
+                 video_dir: Optional[PathLike] = None) -> Path:
+    json_path = Path(json_path)
+    with open(json_path) as f:
+        data = json.load(f)
+    if isinstance(data, dict):
+        keypoints = data["keypoints"]
+        metadata = dict(data.get("metadata", {}))
+    else:
+        keypoints, metadata = data, {}
+    metadata.setdefault("converted_from", json_path.name)
+    fps = metadata.pop("fps", None)
+    source_video = metadata.pop("source_video", None)
+    if source_video and video_dir is not None and (Path(video_dir) / source_video).is_file():
+        source_video = Path(video_dir) / source_video
+    out_path = Path(out_path) if out_path else json_path.with_suffix(".kps")
+    return save_track(out_path, keypoints, fps=fps, source_video=source_video, **metadata)
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Convert reference JSON keypoints to the .kps store")
+    parser.add_argument("inputs", nargs="+", help="JSON reference files to convert")
+    parser.add_argument("--video-dir", default="reference_videos", help="Where to look up source videos for hashing")
+    args = parser.parse_args()
+
+    for src in args.inputs:
+        out = convert_json(src, video_dir=args.video_dir)
+        print(f"✅ {src} -> {out}")
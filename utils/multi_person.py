@@ -0,0 +1,240 @@
+# ✅ File: multi_person.py (multi-person pose tracking with per-person tracks and analysis)
+#
+# MediaPipe's Pose finds one person per image. Several people are handled
+# top-down: every track runs its own Pose graph on a crop around where that person
+# was last seen, and people are discovered by running a detector Pose on the frame with
+# every tracked person blacked out, repeated until nobody else is found.
+# Detections are associated with tracks by bounding-box IoU, so IDs stay
+# stable while people move and are reused when someone is briefly lost.
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from utils import profiling
+from utils.pose_estimation import NUM_LANDMARKS, PoseTrack, pose_pool
+from utils.profiling import profiled
+
+Box = Tuple[float, float, float, float]  # x0, y0, x1, y1 in pixels
+
+def box_iou(a: Box, b: Box) -> float:
+    w = min(a[2], b[2]) - max(a[0], b[0])
+    h = min(a[3], b[3]) - max(a[1], b[1])
+    if w <= 0 or h <= 0:
+        return 0.0
+    inter = w * h
+    return inter / ((a[2] - a[0]) * (a[3] - a[1]) + (b[2] - b[0]) * (b[3] - b[1]) - inter)
+
+def landmark_box(points: np.ndarray, width: int, height: int) -> Box:
+    pts = np.asarray(points)[:, :2] * (width, height)
+    x0, y0 = pts.min(axis=0)
+    x1, y1 = pts.max(axis=0)
+    return float(x0), float(y0), float(x1), float(y1)
+
+def expand_box(box: Box, margin: float, width: int, height: int) -> Tuple[int, int, int, int]:
+    # Grow by `margin` of the longer side on every edge, clipped to the frame
+    x0, y0, x1, y1 = box
+    pad = margin * max(x1 - x0, y1 - y0)
+    return (int(max(0, x0 - pad)), int(max(0, y0 - pad)),
+            int(min(width, x1 + pad)), int(min(height, y1 + pad)))
+
+Pose = Tuple[np.ndarray, np.ndarray]  # (33, 3) full-frame normalised points, (33,) visibility
+
+def _landmarks(results, crop: Tuple[int, int, int, int], width: int, height: int) -> Optional[Pose]:
+    # Crop-normalised landmarks -> full-frame normalised (z scales with x, as in MediaPipe)
+    if not results.pose_landmarks:
+        return None
+    x0, y0, x1, y1 = crop
+    cw, ch = x1 - x0, y1 - y0
+    landmarks = results.pose_landmarks.landmark
+    points = np.array([[(p.x * cw + x0) / width, (p.y * ch + y0) / height, p.z * cw / width]
+                       for p in landmarks], dtype=np.float32)
+    return points, np.array([p.visibility for p in landmarks], dtype=np.float32)
+
+class PersonTrack:
+    def __init__(self, track_id: int, box: Box, params: Dict):
+        self.id = track_id
+        self.box = box
+        self.misses = 0
+        self.pose = pose_pool.get(min_detection_confidence=params["min_detection_confidence"],
+                                  min_tracking_confidence=params["min_tracking_confidence"])
+
+    def close(self):
+        pose_pool.put(self.pose)
+
+class MultiPoseTracker:
+    # process(frame) -> {track_id: (points, visibility)} for the people found in that frame.
+    # Cost per frame is one Pose inference per tracked person (on a crop, optionally
+    # on `workers` threads), plus detector runs every detect_every frames
+    # (or when someone is lost) until nobody new is found.
+    def __init__(self, params: Dict, max_people: int = 4, detect_every: int = 15, margin: float = 0.25,
+                 iou_match: float = 0.3, max_misses: int = 30, workers: int = 1):
+        self.params = params
+        self.max_people = max_people
+        self.detect_every = detect_every
+        self.margin = margin
+        self.iou_match = iou_match
+        self.max_misses = max_misses
+        self.tracks: List[PersonTrack] = []
+        self.next_id = 0
+        self.frames = 0
+        self.inferences = 0
+        self.detector = pose_pool.get(static_image_mode=True,
+                                      min_detection_confidence=params["min_detection_confidence"])
+        self._pool = ThreadPoolExecutor(max_workers=workers) if workers > 1 else None
+
+    def _follow(self, track: PersonTrack, rgb: np.ndarray) -> Optional[Pose]:
+        height, width = rgb.shape[:2]
+        crop = expand_box(track.box, self.margin, width, height)
+        if crop[2] - crop[0] < 8 or crop[3] - crop[1] < 8:
+            return None
+        return _landmarks(track.pose.process(np.ascontiguousarray(rgb[crop[1]:crop[3], crop[0]:crop[2]])),
+                          crop, width, height)
+
+    def _detect(self, masked: np.ndarray) -> Optional[Pose]:
+        # The detector sees a 256 px image, so people in a wide (or tall) frame can be
+        # too small to find; after the full frame, try overlapping square windows
+        height, width = masked.shape[:2]
+        side = min(width, height)
+        regions = [(0, 0, width, height)]
+        if max(width, height) > 1.5 * side:
+            starts = list(range(0, max(width, height) - side, side // 2)) + [max(width, height) - side]
+            regions += [(s, 0, s + side, height) if width > height else (0, s, width, s + side) for s in starts]
+        for x0, y0, x1, y1 in regions:
+            region = masked[y0:y1, x0:x1]
+            if not region.any():
+                continue
+            self.inferences += 1
+            landmarks = _landmarks(self.detector.process(np.ascontiguousarray(region)),
+                                   (x0, y0, x1, y1), width, height)
+            if landmarks is not None:
+                return landmarks
+        return None
+
+    def _discover(self, rgb: np.ndarray, found: Dict[int, Pose]) -> None:
+        # Black out everyone already located, look for one more person, repeat
+        height, width = rgb.shape[:2]
+        masked = rgb.copy()
+        located = [t for t in self.tracks if t.id in found]
+        for t in located:
+            x0, y0, x1, y1 = expand_box(t.box, 0.1, width, height)
+            masked[y0:y1, x0:x1] = 0
+        while len(found) < self.max_people:
+            landmarks = self._detect(masked)
+            if landmarks is None:
+                break
+            box = landmark_box(landmarks[0], width, height)
+            # Re-identify a recently lost person by where they were, else start a new track
+            missing = [t for t in self.tracks if t.id not in found]
+            best = max(missing, key=lambda t: box_iou(t.box, box), default=None)
+            if best is not None and box_iou(best.box, box) >= self.iou_match:
+                track = best
+                track.box = box
+            elif any(box_iou(t.box, box) >= self.iou_match for t in located):
+                break  # masking left enough of a tracked person to be found again
+            else:
+                track = PersonTrack(self.next_id, box, self.params)
+                self.next_id += 1
+                self.tracks.append(track)
+            track.misses = 0
+            found[track.id] = landmarks
+            located.append(track)
+            x0, y0, x1, y1 = expand_box(box, 0.1, width, height)
+            masked[y0:y1, x0:x1] = 0
+
+    def process(self, frame: np.ndarray) -> Dict[int, Pose]:
+        rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+        height, width = rgb.shape[:2]
+        found: Dict[int, Pose] = {}
+        active = [t for t in self.tracks if t.misses == 0]
+        if self._pool is not None and len(active) > 1:
+            results = list(self._pool.map(lambda t: self._follow(t, rgb), active))
+        else:
+            results = [self._follow(t, rgb) for t in active]
+        self.inferences += len(active)
+        for track, landmarks in zip(active, results):
+            if landmarks is not None:
+                track.box = landmark_box(landmarks[0], width, height)
+                found[track.id] = landmarks
+
+        # Two crops can lock onto the same person; keep the older track
+        for a in self.tracks:
+            for b in self.tracks:
+                if a.id < b.id and a.id in found and b.id in found and box_iou(a.box, b.box) > 0.6:
+                    del found[b.id]
+
+        if self.frames % self.detect_every == 0 or (active and len(found) < len(active)):
+            self._discover(rgb, found)
+
+        for track in list(self.tracks):
+            if track.id in found:
+                track.misses = 0
+                continue
+            track.misses += 1
+            if track.misses == 1:
+                # Lost: clear its graph once, so a re-found person is tracked from scratch
+                pose_pool.clear(track.pose)
+            if track.misses > self.max_misses:
+                track.close()
+                self.tracks.remove(track)
+        self.frames += 1
+        return found
+
+    def close(self):
+        for track in self.tracks:
+            track.close()
+        self.tracks = []
+        pose_pool.put(self.detector)
+        if self._pool is not None:
+            self._pool.shutdown()
+
+@profiled("extract_person_tracks", frames=lambda r, *a, **k: max((t.frames for t in r.values()), default=0))
+def extract_person_tracks(video_path: str, params: Dict, max_people: int = 4, detect_every: int = 15,
+                          min_seconds: float = 2.0, workers: int = 1) -> Dict[int, PoseTrack]:
+    # One PoseTrack per person (keyed by track ID, points normalised to the full
+    # frame, NaN where that person was not found); people seen for less than
+    # min_seconds in total are dropped as spurious
+    cap = cv2.VideoCapture(video_path)
+    fps = cap.get(cv2.CAP_PROP_FPS) or 0.0
+    tracker = MultiPoseTracker(params, max_people, detect_every, workers=workers)
+    per_frame = []
+    try:
+        while cap.isOpened():
+            ret, frame = cap.read()
+            if not ret:
+                break
+            per_frame.append(tracker.process(frame))
+    finally:
+        cap.release()
+        tracker.close()
+    profiling.record("extract_person_tracks.inference", 0.0, tracker.inferences)
+    ids = sorted({i for found in per_frame for i in found})
+    tracks = {}
+    for i in ids:
+        seen = [f for f, found in enumerate(per_frame) if i in found]
+        if len(seen) < min_seconds * (fps or 30.0):
+            continue
+        points = np.full((len(per_frame), NUM_LANDMARKS, 3), np.nan, dtype=np.float32)
+        visibility = np.zeros((len(per_frame), NUM_LANDMARKS), dtype=np.float32)
+        for f in seen:
+            points[f], visibility[f] = per_frame[f][i]
+        tracks[i] = PoseTrack(points, visibility, fps, params["warmup_trim"], max_gap=params.get("max_gap", 0),
+                              min_visibility=params.get("min_visibility", 0.0))
+    return tracks
+
+def analyze_people(tracks: Dict[int, PoseTrack], exercise: str, config: Dict,
+                   workers: Optional[int] = None) -> Dict[int, Dict]:
+    # analyze_exercise for every person, in parallel (NumPy releases the GIL in the heavy parts)
+    from utils.analysis import analyze_exercise, resolve_reference
+
+    reference = resolve_reference(config, exercise)
+    if reference is None:
+        raise FileNotFoundError(f"No reference data for {exercise}")
+    people = {i: t for i, t in tracks.items() if len(t)}
+    with ThreadPoolExecutor(max_workers=workers or min(len(people), os.cpu_count() or 1) or 1) as pool:
+        futures = {i: pool.submit(analyze_exercise, t, exercise, reference.path, config, reference)
+                   for i, t in people.items()}
+        return {i: f.result() for i, f in futures.items()}
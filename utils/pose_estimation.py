@@ -3,33 +3,377 @@
 import cv2
 import mediapipe as mp
 import numpy as np
-from typing import List, Optional, Tuple
+import os
+import threading
+import time
+from contextlib import contextmanager
+from functools import cached_property
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+from utils import profiling
+from utils.profiling import profiled
+from utils.features import TrackFeatures, as_features
+from utils.video_encoding import SOURCE_ENCODING, SOURCE_PROFILE, VideoEncoder, encoder_for, find_ffmpeg, output_size
+from utils.video_pipeline import run_frame_pipeline
 
 mp_pose = mp.solutions.pose
 mp_drawing = mp.solutions.drawing_utils
 
-def extract_keypoints(video_path: str, warmup_trim: int = 15) -> List[List[List[float]]]:
+# Part of the analysis cache key: landmarks change when the model does
+MODEL_VERSION = f"mediapipe-{mp.__version__}-pose-full"
+
+NUM_LANDMARKS = 33
+
+def as_points(landmarks) -> np.ndarray:
+    # (frames, 33, 3) float32 from a list of per-frame landmarks (None = no pose -> NaN rows)
+    if isinstance(landmarks, np.ndarray):
+        return landmarks.astype(np.float32, copy=False)
+    points = np.full((len(landmarks), NUM_LANDMARKS, 3), np.nan, dtype=np.float32)
+    for i, lm in enumerate(landmarks):
+        if lm is not None:
+            points[i] = lm
+    return points
+
+class PosePool:
+    # Process-wide Pose graphs reused across videos, requests and sessions instead of
+    # being built for each one (model load + graph start-up, ~150 ms). get() hands out
+    # an idle graph built with the same settings or builds a new one; put() returns it.
+    # Graphs are cleared with a blank frame rather than Pose.reset(): reset() restarts
+    # the graph, so the next frame pays the full start-up again, while a frame with no
+    # person drops the tracked ROI and the landmark smoothing history just the same.
+    # At most max_idle idle graphs are kept per setting.
+    def __init__(self, max_idle: int = 4):
+        self.max_idle = max_idle
+        self.built = 0
+        self._idle: Dict[tuple, List] = {}
+        self._keys: Dict[int, tuple] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def clear(pose) -> None:
+        # Forget the graph's tracked ROI and smoothing history without a restart
+        pose.process(np.zeros((256, 256, 3), dtype=np.uint8))
+
+    def get(self, **settings):
+        key = tuple(sorted(settings.items()))
+        with self._lock:
+            idle = self._idle.get(key)
+            pose = idle.pop() if idle else None
+        if pose is not None:
+            return pose
+        pose = mp_pose.Pose(**settings)
+        # The first process() call starts the graph; pay for it here, not on a user's first frame
+        self.clear(pose)
+        with self._lock:
+            self._keys[id(pose)] = key
+            self.built += 1
+        return pose
+
+    def put(self, pose) -> None:
+        with self._lock:
+            key = self._keys.get(id(pose))
+            keep = key is not None and len(self._idle.setdefault(key, [])) < self.max_idle
+            if not keep:
+                self._keys.pop(id(pose), None)
+        if not keep:
+            pose.close()
+            return
+        self.clear(pose)
+        with self._lock:
+            self._idle[key].append(pose)
+
+    @contextmanager
+    def acquire(self, **settings):
+        pose = self.get(**settings)
+        try:
+            yield pose
+        finally:
+            self.put(pose)
+
+    def warm(self, count: int = 1, **settings) -> None:
+        # Build `count` idle graphs now (e.g. in a worker initializer)
+        poses = [self.get(**settings) for _ in range(count)]
+        for pose in poses:
+            self.put(pose)
+
+pose_pool = PosePool()
+
+def fill_gaps(points: np.ndarray, visibility: np.ndarray, max_gap: int) -> np.ndarray:
+    # Linearly interpolate (in place) runs of up to max_gap missing frames between two
+    # detections, visibility included; returns the mask of filled frames. Leading and
+    # trailing runs, and longer gaps, stay missing.
+    filled = np.zeros(len(points), dtype=bool)
+    detected = np.flatnonzero(~np.isnan(points[:, 0, 0]))
+    if max_gap <= 0 or len(detected) < 2:
+        return filled
+    gaps = np.diff(detected) - 1
+    for a, gap in zip(detected[:-1][(gaps > 0) & (gaps <= max_gap)], gaps[(gaps > 0) & (gaps <= max_gap)]):
+        b = a + gap + 1
+        t = (np.arange(1, gap + 1, dtype=np.float32) / (gap + 1))[:, None]
+        points[a + 1:b] = (1 - t[:, :, None]) * points[a] + t[:, :, None] * points[b]
+        visibility[a + 1:b] = (1 - t) * visibility[a] + t * visibility[b]
+        filled[a + 1:b] = True
+    return filled
+
+class GapFiller:
+    # fill_gaps one chunk at a time. Frames after the last detection are held back
+    # until the next detection arrives or the run is longer than max_gap, so the
+    # frames released are exactly what fill_gaps over the whole track gives.
+    def __init__(self, max_gap: int):
+        self.max_gap = max_gap
+        self._anchor = None  # last released detection, (points, visibility)
+        self._points = np.zeros((0, NUM_LANDMARKS, 3), dtype=np.float32)
+        self._visibility = np.zeros((0, NUM_LANDMARKS), dtype=np.float32)
+
+    def push(self, points: np.ndarray, visibility: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        # Returns the (points, visibility) of frames that are now final
+        points = np.concatenate([self._points, points])
+        visibility = np.concatenate([self._visibility, visibility])
+        detected = np.flatnonzero(~np.isnan(points[:, 0, 0]))
+        tail = len(points) - (detected[-1] + 1 if len(detected) else 0)
+        ready = len(points) if tail > self.max_gap else len(points) - tail
+        out_points, out_vis = points[:ready].copy(), visibility[:ready].copy()
+        self._points, self._visibility = points[ready:], visibility[ready:]
+        if ready:
+            if self._anchor is not None:
+                # Re-run with the previous detection in front, for a gap spanning the boundary
+                p = np.concatenate([self._anchor[0][None], out_points])
+                v = np.concatenate([self._anchor[1][None], out_vis])
+                fill_gaps(p, v, self.max_gap)
+                out_points, out_vis = p[1:], v[1:]
+            else:
+                fill_gaps(out_points, out_vis, self.max_gap)
+            last = np.flatnonzero(~np.isnan(out_points[:, 0, 0]))
+            if tail > self.max_gap:
+                self._anchor = None  # released after a gap already too long to fill
+            elif len(last):
+                self._anchor = (out_points[last[-1]], out_vis[last[-1]])
+        return out_points, out_vis
+
+class PoseTrack:
+    # One decode+inference pass over a video as dense per-source-frame arrays:
+    # `points` (frames, 33, 3), NaN where no pose is available, and `visibility`
+    # (frames, 33), MediaPipe's per-landmark visibility (0 where missing). Detection
+    # gaps of up to max_gap frames are interpolated (`filled` marks them). `keypoints`
+    # are the frames used for analysis, `frame_indices[i]` the source frame of
+    # keypoints[i] and `confidence[i]` its visibility; joints below min_visibility
+    # are masked out of comparison and rep counting (see joint_weights). `features`
+    # holds the angles, velocities and rep signals every analysis step reads.
+    def __init__(self, points, visibility: Optional[np.ndarray] = None, fps: float = 0.0, warmup_trim: int = 0,
+                 stride: int = 1, target_height: Optional[int] = None, stopped_early: bool = False,
+                 max_gap: int = 0, min_visibility: float = 0.0):
+        self.points = as_points(points).copy()
+        self.detected = ~np.isnan(self.points[:, 0, 0])
+        if visibility is None:
+            # Tracks stored without visibility count every detected landmark as visible
+            visibility = self.detected[:, None].repeat(NUM_LANDMARKS, axis=1)
+        self.visibility = np.asarray(visibility, dtype=np.float32).copy()
+        self.filled = fill_gaps(self.points, self.visibility, max_gap)
+        self.stopped_early = stopped_early
+        self.fps = fps
+        self.warmup_trim = warmup_trim
+        self.stride = stride
+        self.target_height = target_height
+        self.max_gap = max_gap
+        self.min_visibility = min_visibility
+        valid = np.flatnonzero(self.detected | self.filled)
+        if len(valid) > warmup_trim:
+            valid = valid[warmup_trim:]
+        self.frame_indices = valid
+        self.keypoints = self.points[valid].astype(np.float64)
+        self.confidence = self.visibility[valid]
+
+    def __len__(self) -> int:
+        return len(self.keypoints)
+
+    @property
+    def frames(self) -> int:
+        return len(self.points)
+
+    @cached_property
+    def features(self) -> TrackFeatures:
+        return TrackFeatures(self.keypoints, self.confidence, self.min_visibility)
+
+    def joint_weights(self, indices: List[int]) -> np.ndarray:
+        # (analysis frames, len(indices)): 1 where a joint is confident enough to compare
+        return (self.confidence[:, indices] >= self.min_visibility).astype(np.float64)
+
+    def detections(self) -> Tuple[np.ndarray, np.ndarray]:
+        # (points, visibility) as extracted, before gap filling (what the cache stores)
+        points, visibility = self.points.copy(), self.visibility.copy()
+        points[self.filled] = np.nan
+        visibility[self.filled] = 0.0
+        return points, visibility
+
+    def landmarks_at(self, frame_id: int) -> Optional[np.ndarray]:
+        # Landmarks of one source frame (detected or filled), None when there is no pose
+        if frame_id >= len(self.points) or not (self.detected[frame_id] or self.filled[frame_id]):
+            return None
+        return self.points[frame_id]
+
+def _interpolate_skipped(points: np.ndarray, visibility: np.ndarray, processed: List[int], stride: int) -> None:
+    # Fill frames skipped by a strided pass from the nearest processed frames;
+    # gaps next to a missed detection stay missing, a trailing tail holds the last pose.
+    missing = np.isnan(points[:, 0, 0])
+    n = len(points)
+    for a, b in zip(processed, processed[1:] + [n]):
+        if missing[a] or b == a + 1:
+            continue
+        if b == n:
+            if b - a <= stride:
+                points[a + 1:b] = points[a]
+                visibility[a + 1:b] = visibility[a]
+            continue
+        if missing[b]:
+            continue
+        t = (np.arange(1, b - a, dtype=np.float32) / (b - a))[:, None]
+        points[a + 1:b] = (1 - t[:, :, None]) * points[a] + t[:, :, None] * points[b]
+        visibility[a + 1:b] = (1 - t) * visibility[a] + t * visibility[b]
+
+def iter_pose_chunks(video_path: str, min_detection_confidence: float = 0.6,
+                     min_tracking_confidence: float = 0.6, stride: int = 1,
+                     target_height: Optional[int] = None, pose=None,
+                     chunk_seconds: float = 1.0, start_frame: int = 0,
+                     end_frame: Optional[int] = None) -> Iterator[Tuple[np.ndarray, np.ndarray, float, int]]:
+    # Decode + inference as a generator: yields (points, visibility, fps, total_frames)
+    # for every chunk_seconds of video, where `points` (NaN = no detection) and
+    # `visibility` hold the chunk's source frames. Frames skipped by `stride` are already
+    # filled in: chunks end on an inferred frame, so each gap lies inside one chunk or
+    # right after the previous one. Closing the generator early stops decoding and
+    # releases the capture.
+    # start_frame / end_frame limit decoding to [start_frame, end_frame) of the source
+    # (seeking to start_frame); the stride grid stays on source frame numbers, so
+    # start_frame should be a multiple of stride. total_frames is the range's length.
+    stride = max(1, int(stride))
     cap = cv2.VideoCapture(video_path)
-    pose = mp_pose.Pose(min_detection_confidence=0.6, min_tracking_confidence=0.6)
-    keypoints = []
-    while cap.isOpened():
-        ret, frame = cap.read()
-        if not ret:
-            break
-        results = pose.process(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
-        if results.pose_landmarks:
-            keypoints.append([[p.x, p.y, p.z] for p in results.pose_landmarks.landmark])
-    cap.release()
-    pose.close()
-    return keypoints[warmup_trim:] if len(keypoints) > warmup_trim else keypoints
+    fps = cap.get(cv2.CAP_PROP_FPS) or 0.0
+    total = int(cap.get(cv2.CAP_PROP_FRAME_COUNT) or 0)
+    if start_frame:
+        cap.set(cv2.CAP_PROP_POS_FRAMES, start_frame)
+    if end_frame is not None:
+        total = min(total, end_frame) if total else end_frame
+    total = max(0, total - start_frame)
+    owns_pose = pose is None
+    if owns_pose:
+        pose = pose_pool.get(min_detection_confidence=min_detection_confidence,
+                             min_tracking_confidence=min_tracking_confidence)
+    else:
+        # Forget the previous video's tracking; reset() would restart the graph
+        pose_pool.clear(pose)
+    chunk_frames = max(1, round((fps or 30.0) * chunk_seconds))
+
+    def new_chunk():
+        # Room for the skipped frames between the chunk_frames-th frame and the next inferred one
+        rows = chunk_frames + stride - 1
+        return (np.full((rows, NUM_LANDMARKS, 3), np.nan, dtype=np.float32),
+                np.zeros((rows, NUM_LANDMARKS), dtype=np.float32))
+
+    points, visibility = new_chunk()
+    n = 0
+    previous = None
+    frame_id = start_frame
+    processed = 0
+    decode_s = infer_s = interp_s = 0.0
+
+    def filled(points, visibility):
+        nonlocal interp_s
+        if stride == 1:
+            return points, visibility
+        start = time.perf_counter()
+        if previous is not None:
+            points = np.concatenate([previous[0][None], points])
+            visibility = np.concatenate([previous[1][None], visibility])
+        _interpolate_skipped(points, visibility, list(range(0, len(points), stride)), stride)
+        interp_s += time.perf_counter() - start
+        if previous is not None:
+            points, visibility = points[1:], visibility[1:]
+        return points, visibility
+
+    try:
+        while cap.isOpened() and (end_frame is None or frame_id < end_frame):
+            start = time.perf_counter()
+            if frame_id % stride:
+                grabbed = cap.grab()
+                decode_s += time.perf_counter() - start
+                if not grabbed:
+                    break
+                n += 1
+                frame_id += 1
+                continue
+            ret, frame = cap.read()
+            if not ret:
+                break
+            h, w = frame.shape[:2]
+            if target_height and h > target_height:
+                frame = cv2.resize(frame, (max(1, round(w * target_height / h)), target_height),
+                                   interpolation=cv2.INTER_AREA)
+            mid = time.perf_counter()
+            decode_s += mid - start
+            results = pose.process(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
+            infer_s += time.perf_counter() - mid
+            if results.pose_landmarks:
+                landmarks = results.pose_landmarks.landmark
+                points[n] = [[p.x, p.y, p.z] for p in landmarks]
+                visibility[n] = [p.visibility for p in landmarks]
+            n += 1
+            frame_id += 1
+            processed += 1
+            # Chunks end on an inferred frame, so skipped frames always sit between two of them
+            if n >= chunk_frames:
+                out = filled(points[:n], visibility[:n])
+                previous = (out[0][-1], out[1][-1])
+                yield out[0], out[1], fps, total
+                points, visibility = new_chunk()
+                n = 0
+        if n:
+            out = filled(points[:n], visibility[:n])
+            yield out[0], out[1], fps, total
+    finally:
+        cap.release()
+        if owns_pose:
+            pose_pool.put(pose)
+        profiling.record("extract.decode", decode_s, frame_id - start_frame)
+        profiling.record("extract.inference", infer_s, processed)
+        if stride > 1:
+            profiling.record("extract.interpolate", interp_s, frame_id - start_frame - processed)
+
+@profiled("extract_pose_track", frames=lambda track, *a, **k: track.frames)
+def extract_pose_track(video_path: str, warmup_trim: int = 15,
+                       min_detection_confidence: float = 0.6,
+                       min_tracking_confidence: float = 0.6,
+                       stride: int = 1, target_height: Optional[int] = None,
+                       max_gap: int = 0, min_visibility: float = 0.0,
+                       pose=None, chunk_seconds: float = 1.0) -> PoseTrack:
+    # stride > 1 runs inference on every Nth frame and interpolates the rest;
+    # target_height downscales frames before inference (landmarks are normalised,
+    # so coordinates are unaffected). Frame indices always refer to the source video.
+    # max_gap / min_visibility: see PoseTrack.
+    # A caller-owned `pose` is cleared (PosePool.clear) and reused instead of building a new graph.
+    # Progressive callers iterate iter_pose_chunks themselves.
+    points, visibility = [], []
+    fps = 0.0
+    for chunk, chunk_vis, fps, _ in iter_pose_chunks(video_path, min_detection_confidence, min_tracking_confidence,
+                                                     stride, target_height, pose, chunk_seconds):
+        points.append(chunk)
+        visibility.append(chunk_vis)
+    points = np.concatenate(points) if points else np.zeros((0, NUM_LANDMARKS, 3), dtype=np.float32)
+    visibility = np.concatenate(visibility) if visibility else np.zeros((0, NUM_LANDMARKS), dtype=np.float32)
+    return PoseTrack(points, visibility, fps, warmup_trim, max(1, int(stride)), target_height, False,
+                     max_gap, min_visibility)
+
+def extract_keypoints(video_path: str, warmup_trim: int = 15, stride: int = 1,
+                      target_height: Optional[int] = None) -> np.ndarray:
+    return extract_pose_track(video_path, warmup_trim, stride=stride, target_height=target_height).keypoints
 
+@profiled("detect_exercise_type", frames=lambda r, keypoints, *a, **k: len(keypoints))
 def detect_exercise_type_with_confidence(keypoints: List[List[List[float]]]) -> Tuple[Optional[str], float]:
-    if not keypoints or len(keypoints) < 10:
+    # keypoints may be a TrackFeatures
+    if len(keypoints) < 10:
         return None, 0.0
-    kp = np.array(keypoints)
-    shoulder = np.mean(np.abs(np.diff(kp[:, 11:13, 1], axis=0)))
-    hip = np.mean(np.abs(np.diff(kp[:, 23:25, 1], axis=0)))
-    wrist = np.mean(np.abs(np.diff(kp[:, 15:17, 1], axis=0)))
+    velocity = as_features(keypoints).velocity
+    shoulder = np.mean(np.abs(velocity[:, 11:13, 1]))
+    hip = np.mean(np.abs(velocity[:, 23:25, 1]))
+    wrist = np.mean(np.abs(velocity[:, 15:17, 1]))
     if hip > 0.2:
         return "squat", 0.9
     elif shoulder > 0.15 and wrist > 0.1:
@@ -40,21 +384,19 @@ def detect_exercise_type_with_confidence(keypoints: List[List[List[float]]]) ->
         return "pushup", 0.75
     return "unknown", 0.4
 
-def count_reps(keypoints: List[List[List[float]]], exercise: str) -> List[Tuple[int, str]]:
+@profiled("count_reps", frames=lambda r, keypoints, *a, **k: len(keypoints))
+def count_reps(keypoints: List[List[List[float]]], exercise: str, confidence: Optional[np.ndarray] = None,
+               min_visibility: float = 0.0) -> List[Tuple[int, str]]:
+    # confidence: per-frame landmark visibility; the signal joint is interpolated
+    # through frames where it is below min_visibility. With a TrackFeatures as
+    # `keypoints` its own confidence applies and its rep signal is reused.
     reps = []
     state = None
     count = 0
     rep_start = None
-    kp = np.array(keypoints)
-    y_vals = {
-        "squat": kp[:, 24, 1],
-        "press": kp[:, 15, 1],
-        "deadlift": kp[:, 24, 1],
-        "pushup": kp[:, 11, 1]
-    }.get(exercise, None)
+    y_vals = as_features(keypoints, confidence, min_visibility).rep_signal(exercise)
     if y_vals is None:
         return [(0, "")] * len(keypoints)
-    y_vals = np.convolve(y_vals, np.ones(3)/3, mode='same')
     threshold_down = np.percentile(y_vals, 70)
     threshold_up = np.percentile(y_vals, 30)
     for i, y in enumerate(y_vals):
@@ -77,52 +419,109 @@ def count_reps(keypoints: List[List[List[float]]], exercise: str) -> List[Tuple[
         reps.append((count, quality if count > 0 else ""))
     return reps
 
-def create_annotated_video_opencv(input_path: str, output_path: str, diff_frames=None, reps: Optional[List[Tuple[int, str]]] = None):
+def _source_frame_lookup(track: PoseTrack, diff_frames, reps):
+    # Map analysis-frame indices (as used by compare_pose / count_reps) back to
+    # source video frames so the overlay marks the frames that were analysed.
+    diff_source = set()
+    for f in diff_frames or []:
+        if 0 <= f[0] < len(track.frame_indices):
+            diff_source.add(int(track.frame_indices[f[0]]))
+    rep_source = [None] * track.frames
+    if reps:
+        # Each source frame shows the rep state of the last analysis frame at or before it
+        known = track.frame_indices[:len(reps)]
+        last = np.searchsorted(known, np.arange(track.frames), side="right") - 1
+        rep_source = [reps[k] if k >= 0 else None for k in last]
+    return diff_source, rep_source
+
+VALID_JOINTS = {11, 12, 13, 14, 15, 16, 23, 24, 25, 26, 27, 28}
+
+def draw_pose_overlay(frame: np.ndarray, landmarks: Optional[List[List[float]]], form_error: bool,
+                      rep: Optional[Tuple[int, str]] = None) -> np.ndarray:
+    # Skeleton (red on a flagged frame) plus the rep counter; shared by the
+    # rendered video and the live coaching view
+    if landmarks is None:
+        return frame
+    h, w = frame.shape[:2]
+    color = (0, 0, 255) if form_error else (0, 255, 0)
+
+    for connection in mp_pose.POSE_CONNECTIONS:
+        start_idx, end_idx = connection
+        if start_idx in VALID_JOINTS and end_idx in VALID_JOINTS:
+            start = landmarks[start_idx]
+            end = landmarks[end_idx]
+            start_coords = int(start[0] * w), int(start[1] * h)
+            end_coords = int(end[0] * w), int(end[1] * h)
+            cv2.line(frame, start_coords, end_coords, color, 2)
+            cv2.circle(frame, start_coords, 4, color, -1)
+            cv2.circle(frame, end_coords, 4, color, -1)
+
+    if form_error:
+        cv2.putText(frame, "FormError", (30, 60), cv2.FONT_HERSHEY_SIMPLEX, 1.2, (0, 0, 255), 3)
+    if rep is not None:
+        rep_num, quality = rep
+        text_color = (0, 255, 0) if quality == "Good" else (0, 165, 255) if quality == "Partial" else (0, 0, 255)
+        cv2.putText(frame, f"Rep {rep_num}: {quality}", (30, 100), cv2.FONT_HERSHEY_SIMPLEX, 1.1, text_color, 3)
+    return frame
+
+def create_annotated_video_opencv(input_path: str, output_path: str, diff_frames=None,
+                                  reps: Optional[List[Tuple[int, str]]] = None,
+                                  track: Optional[PoseTrack] = None,
+                                  queue_size: int = 8, stats: Optional[Dict] = None,
+                                  profile: Optional[Dict] = None, encoding: Optional[Dict] = None) -> str:
+    # Decoding, annotation and encoding run as a threaded pipeline (see
+    # utils/video_pipeline.py); pass a dict as `stats` to get per-stage throughput
+    # and the output's size. `profile` (see CONFIG["encoding"]["profiles"]) picks
+    # codec, height, bitrate and frame_step; without one the source is re-encoded
+    # as mp4v. The container follows the codec, so the returned path's suffix may
+    # differ from output_path's.
+    if profile is None:
+        profile, encoding = SOURCE_PROFILE, SOURCE_ENCODING
+    choice = encoder_for(profile, encoding)
+    output_path = str(Path(output_path).with_suffix(choice["ext"]))
+    step = max(1, int(profile.get("frame_step", 1)))
     cap = cv2.VideoCapture(input_path)
-    out = cv2.VideoWriter(
-        output_path,
-        cv2.VideoWriter_fourcc(*"mp4v"),
-        cap.get(cv2.CAP_PROP_FPS),
-        (int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)), int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT)))
-    )
-    pose = mp_pose.Pose()
-    frame_id = 0
-    diff_frame_ids = set([f[0] for f in diff_frames]) if diff_frames else set()
-
-    valid_joints = {11,12,13,14,15,16,23,24,25,26,27,28}
-
-    while cap.isOpened():
-        ret, frame = cap.read()
-        if not ret:
-            break
-        results = pose.process(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
-        if results.pose_landmarks:
-            landmarks = results.pose_landmarks.landmark
-            h, w = frame.shape[:2]
-            color = (0, 0, 255) if frame_id in diff_frame_ids else (0, 255, 0)
-
-            for connection in mp_pose.POSE_CONNECTIONS:
-                start_idx, end_idx = connection
-                if start_idx in valid_joints and end_idx in valid_joints:
-                    start = landmarks[start_idx]
-                    end = landmarks[end_idx]
-                    start_coords = int(start.x * w), int(start.y * h)
-                    end_coords = int(end.x * w), int(end.y * h)
-                    cv2.line(frame, start_coords, end_coords, color, 2)
-                    cv2.circle(frame, start_coords, 4, color, -1)
-                    cv2.circle(frame, end_coords, 4, color, -1)
-
-            if frame_id in diff_frame_ids:
-                cv2.putText(frame, "FormError", (30, 60), cv2.FONT_HERSHEY_SIMPLEX, 1.2, (0, 0, 255), 3)
-            if reps and frame_id < len(reps):
-                rep_num, quality = reps[frame_id]
-                text_color = (0, 255, 0) if quality == "Good" else (0, 165, 255) if quality == "Partial" else (0, 0, 255)
-                cv2.putText(frame, f"Rep {rep_num}: {quality}", (30, 100), cv2.FONT_HERSHEY_SIMPLEX, 1.1, text_color, 3)
-
-        out.write(frame)
-        frame_id += 1
-    cap.release()
-    out.release()
-    pose.close()
-    return output_path
+    fps = (cap.get(cv2.CAP_PROP_FPS) or 30.0) / step
+    size = output_size(int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)), int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT)),
+                       profile.get("height"))
+    out = VideoEncoder(output_path, fps, size, choice, profile, find_ffmpeg((encoding or {}).get("ffmpeg")))
+    # With a track from extract_pose_track the landmarks are reused as-is;
+    # without one we fall back to running inference here (indices = source frames).
+    pose = pose_pool.get() if track is None else None
+    if track is not None:
+        diff_frame_ids, rep_by_frame = _source_frame_lookup(track, diff_frames, reps)
+    else:
+        diff_frame_ids = set([f[0] for f in diff_frames]) if diff_frames else set()
+        rep_by_frame = reps
 
+    def annotate(frame_id, frame):
+        if pose is not None:
+            results = pose.process(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
+            landmarks = [[p.x, p.y, p.z] for p in results.pose_landmarks.landmark] if results.pose_landmarks else None
+        else:
+            landmarks = track.landmarks_at(frame_id)
+        rep = None
+        if rep_by_frame and frame_id < len(rep_by_frame):
+            rep = rep_by_frame[frame_id]
+        # Draw at the output size: cheaper than drawing first, and the overlay stays sharp
+        if frame.shape[1] != size[0] or frame.shape[0] != size[1]:
+            frame = cv2.resize(frame, size, interpolation=cv2.INTER_AREA)
+        return draw_pose_overlay(frame, landmarks, frame_id in diff_frame_ids, rep)
+
+    try:
+        with profiling.stage("render") as info:
+            report = run_frame_pipeline(cap, annotate, out.write, queue_size=queue_size, frame_step=step)
+            info["frames"] = report["total"]["frames"]
+    finally:
+        cap.release()
+        out.close()
+        if pose is not None:
+            pose_pool.put(pose)
+    for name in ("decode", "process", "encode"):
+        profiling.record(f"render.{name}", report[name]["busy_s"], report[name]["frames"])
+    if stats is not None:
+        stats.update(report)
+        stats["output"] = dict(choice, path=output_path, width=size[0], height=size[1], fps=fps,
+                               frames=out.frames, bitrate=profile.get("bitrate") if choice["backend"] == "ffmpeg" else None,
+                               bytes=os.path.getsize(output_path) if os.path.exists(output_path) else 0)
+    return output_path
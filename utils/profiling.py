@@ -0,0 +1,172 @@
+# ✅ File: profiling.py (opt-in per-stage timing, throughput and memory tracing)
+#
+# Instrumented functions record into the Trace that is active in the current
+# context; with no active trace the wrappers cost one ContextVar lookup.
+#
+#     with profiling.trace() as t:
+#         track = extract_pose_track(path)
+#     t.summary()                   # per-stage totals, fps, peak memory
+#     t.dump("trace.json")          # Chrome/Perfetto trace-event JSON
+
+import functools
+import json
+import resource
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Dict, List, Optional, Union
+
+_active: ContextVar[Optional["Trace"]] = ContextVar("sgt_profiling_trace", default=None)
+
+FrameCount = Union[int, Callable, None]
+
+def _rss_peak_mb() -> float:
+    # ru_maxrss is KiB on Linux; covers native (MediaPipe/OpenCV) allocations too
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+class Trace:
+    def __init__(self, memory: bool = True):
+        self.memory = memory
+        self.records: List[Dict] = []
+        self.origin = time.perf_counter()
+        self._stack: List[Dict] = []
+        self._lock = threading.Lock()
+        self._owns_tracemalloc = False
+
+    # ---- recording ----
+    def _enter(self, name: str) -> Dict:
+        frame = {"name": name, "start": time.perf_counter(), "child_peak": 0}
+        if self.memory:
+            current, peak = tracemalloc.get_traced_memory()
+            if self._stack:
+                self._stack[-1]["child_peak"] = max(self._stack[-1]["child_peak"], peak)
+            frame["mem_start"] = current
+            tracemalloc.reset_peak()
+        self._stack.append(frame)
+        return frame
+
+    def _exit(self, frame: Dict, frames: Optional[int]) -> None:
+        elapsed = time.perf_counter() - frame["start"]
+        self._stack.pop()
+        peak_delta = None
+        if self.memory:
+            peak = max(frame["child_peak"], tracemalloc.get_traced_memory()[1])
+            peak_delta = max(0, peak - frame["mem_start"])
+            if self._stack:
+                self._stack[-1]["child_peak"] = max(self._stack[-1]["child_peak"], peak)
+        self.add(frame["name"], elapsed, frames, start=frame["start"], depth=len(self._stack),
+                 peak_bytes=peak_delta)
+
+    def add(self, name: str, seconds: float, frames: Optional[int] = None,
+            start: Optional[float] = None, depth: int = 0, **extra) -> None:
+        record = {
+            "name": name,
+            "start_s": (start if start is not None else time.perf_counter() - seconds) - self.origin,
+            "seconds": seconds,
+            "frames": frames,
+            "fps": frames / seconds if frames and seconds > 0 else None,
+            "depth": depth,
+            "thread": threading.current_thread().name,
+            "rss_peak_mb": _rss_peak_mb(),
+        }
+        record.update({k: v for k, v in extra.items() if v is not None})
+        with self._lock:
+            self.records.append(record)
+
+    # ---- reporting ----
+    def summary(self) -> List[Dict]:
+        stages: Dict[str, Dict] = {}
+        for r in self.records:
+            s = stages.setdefault(r["name"], {"stage": r["name"], "calls": 0, "total_s": 0.0,
+                                              "frames": 0, "peak_mb": 0.0})
+            s["calls"] += 1
+            s["total_s"] += r["seconds"]
+            s["frames"] += r["frames"] or 0
+            s["peak_mb"] = max(s["peak_mb"], (r.get("peak_bytes") or 0) / 1e6)
+        rows = []
+        for s in stages.values():
+            s["fps"] = round(s["frames"] / s["total_s"], 1) if s["frames"] and s["total_s"] > 0 else None
+            s["total_s"] = round(s["total_s"], 4)
+            s["peak_mb"] = round(s["peak_mb"], 2)
+            rows.append(s)
+        return rows
+
+    def to_chrome_trace(self) -> Dict:
+        events = []
+        for r in self.records:
+            args = {k: v for k, v in r.items() if k not in ("name", "start_s", "seconds", "thread")}
+            events.append({"name": r["name"], "ph": "X", "pid": 0, "tid": r["thread"],
+                           "ts": r["start_s"] * 1e6, "dur": r["seconds"] * 1e6, "args": args})
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def dumps(self) -> str:
+        return json.dumps(self.to_chrome_trace())
+
+    def dump(self, path) -> None:
+        with open(path, "w") as f:
+            f.write(self.dumps())
+
+@contextmanager
+def trace(memory: bool = True):
+    t = Trace(memory=memory)
+    if memory and not tracemalloc.is_tracing():
+        tracemalloc.start()
+        t._owns_tracemalloc = True
+    token = _active.set(t)
+    try:
+        yield t
+    finally:
+        _active.reset(token)
+        if t._owns_tracemalloc:
+            tracemalloc.stop()
+
+def active() -> Optional[Trace]:
+    return _active.get()
+
+def _count(frames: FrameCount, result, args, kwargs) -> Optional[int]:
+    if callable(frames):
+        try:
+            return frames(result, *args, **kwargs)
+        except Exception:
+            return None
+    return frames
+
+@contextmanager
+def stage(name: str, frames: Optional[int] = None):
+    # Yields a dict; set info["frames"] inside the block when the count is only known at the end
+    info = {"frames": frames}
+    t = _active.get()
+    if t is None:
+        yield info
+        return
+    frame = t._enter(name)
+    try:
+        yield info
+    finally:
+        t._exit(frame, info["frames"])
+
+def record(name: str, seconds: float, frames: Optional[int] = None, **extra) -> None:
+    # For stages timed elsewhere (per-frame accumulators, pipeline threads)
+    t = _active.get()
+    if t is not None:
+        t.add(name, seconds, frames, depth=len(t._stack), **extra)
+
+def profiled(name: str, frames: FrameCount = None):
+    # frames: an int, or a callable (result, *args, **kwargs) -> number of frames handled
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            t = _active.get()
+            if t is None:
+                return fn(*args, **kwargs)
+            frame = t._enter(name)
+            result = None
+            try:
+                result = fn(*args, **kwargs)
+                return result
+            finally:
+                t._exit(frame, _count(frames, result, args, kwargs))
+        return wrapper
+    return decorator
@@ -0,0 +1,119 @@
+# ✅ File: reference_registry.py (reference tracks loaded and pre-processed once per process)
+
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from utils.compare import segment_reps
+from utils.features import TrackFeatures
+from utils.keypoint_store import hash_file, load_keypoints
+from utils.profiling import profiled
+
+def reference_path(config: Dict, exercise: str) -> Optional[Path]:
+    # Prefer the memory-mapped binary store, fall back to the legacy JSON
+    for suffix in (".kps", ".json"):
+        path = Path(config["reference_dir"]) / f"{exercise}_correct{suffix}"
+        if path.exists():
+            return path
+    return None
+
+class ReferenceEntry:
+    # Everything derived from one reference file. `keypoints` is the raw
+    # (frames, 33, 3) track, `features` its TrackFeatures, `selected` the normalised
+    # track at the analysis joints and `template` one rep of it (or the whole track
+    # when no reps are found).
+    def __init__(self, exercise: str, path: Path, indices: List[int]):
+        stat = path.stat()
+        self.exercise = exercise
+        self.path = path
+        self.mtime_ns = stat.st_mtime_ns
+        self.size = stat.st_size
+        self.digest = hash_file(path)
+        self.keypoints = np.ascontiguousarray(load_keypoints(path, mmap=False), dtype=np.float64)
+        self.indices = list(indices)
+        self.features = TrackFeatures(self.keypoints)
+        self.normalized = self.features.normalized
+        self.selected = np.ascontiguousarray(self.normalized[:, self.indices])
+        self.signal = self.features.rep_signal(exercise)
+        self.rep_bounds = segment_reps(self.signal) if self.signal is not None else []
+        if len(self.rep_bounds) >= 2:
+            self.template = self.selected[self.rep_bounds[0]:self.rep_bounds[1]]
+        else:
+            self.template = self.selected
+        self.stats = self._stats()
+
+    def _stats(self) -> Dict:
+        rep_lengths = np.diff(self.rep_bounds)
+        return {
+            "frames": len(self.keypoints),
+            "reps": max(0, len(self.rep_bounds) - 1),
+            "rep_frames": float(np.mean(rep_lengths)) if len(rep_lengths) else None,
+            "rom": float(np.ptp(self.signal)) if self.signal is not None and len(self.signal) else None,
+            "joint_mean": np.nanmean(self.selected, axis=0) if len(self.selected) else None,
+            "joint_std": np.nanstd(self.selected, axis=0) if len(self.selected) else None,
+        }
+
+    def is_stale(self) -> bool:
+        try:
+            stat = self.path.stat()
+        except FileNotFoundError:
+            return True
+        return stat.st_mtime_ns != self.mtime_ns or stat.st_size != self.size
+
+class ReferenceRegistry:
+    # Loads every reference under config["reference_dir"] on first use and
+    # serves the pre-processed entries afterwards. Files are re-checked at most
+    # every `check_interval` seconds, so a rerun usually costs a dict lookup; an
+    # entry is rebuilt when its file's mtime/size change or a better format
+    # (.kps over .json) appears. Safe to share between threads / Streamlit sessions.
+    def __init__(self, config: Dict, check_interval: float = 2.0):
+        self.config = config
+        self.reference_dir = Path(config["reference_dir"])
+        self.exercises = list(config["exercise_thresholds"])
+        self.indices = list(config["keypoint_indices"])
+        self.check_interval = check_interval
+        self._entries: Dict[str, Optional[ReferenceEntry]] = {}
+        self._checked = 0.0
+        self._lock = threading.Lock()
+
+    @profiled("reference_registry.refresh")
+    def _refresh(self) -> None:
+        for exercise in self.exercises:
+            path = reference_path(self.config, exercise)
+            entry = self._entries.get(exercise)
+            if path is None:
+                self._entries[exercise] = None
+            elif entry is None or entry.path != path or entry.is_stale():
+                self._entries[exercise] = ReferenceEntry(exercise, path, self.indices)
+        self._checked = time.monotonic()
+
+    def _ensure_fresh(self) -> None:
+        with self._lock:
+            if not self._checked or time.monotonic() - self._checked >= self.check_interval:
+                self._refresh()
+
+    def get(self, exercise: str) -> Optional[ReferenceEntry]:
+        self._ensure_fresh()
+        return self._entries.get(exercise)
+
+    def available(self) -> Dict[str, bool]:
+        self._ensure_fresh()
+        return {exercise: self._entries.get(exercise) is not None for exercise in self.exercises}
+
+    def entries(self) -> List[ReferenceEntry]:
+        self._ensure_fresh()
+        return [e for e in self._entries.values() if e is not None]
+
+_process_registry: Optional[ReferenceRegistry] = None
+_process_lock = threading.Lock()
+
+def get_registry(config: Dict) -> ReferenceRegistry:
+    # One registry per process for code paths outside Streamlit (batch workers, CLI)
+    global _process_registry
+    with _process_lock:
+        if _process_registry is None or _process_registry.reference_dir != Path(config["reference_dir"]):
+            _process_registry = ReferenceRegistry(config)
+        return _process_registry
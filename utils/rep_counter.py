@@ -0,0 +1,158 @@
+# ✅ File: rep_counter.py (constant-memory streaming rep counter with online thresholds)
+
+import bisect
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from utils.features import REP_SIGNAL_JOINTS
+
+class P2Quantile:
+    # Jain & Chlamtac P² estimator: tracks one quantile with five markers, so
+    # memory and per-sample cost are constant. The first five samples are kept
+    # exactly and interpolated the same way as np.percentile.
+    def __init__(self, p: float):
+        self.p = p
+        self.count = 0
+        self.heights: List[float] = []
+        self.positions = [0, 1, 2, 3, 4]
+        self.desired = [0, 2 * p, 4 * p, 2 + 2 * p, 4]
+        self.increments = [0, p / 2, p, (1 + p) / 2, 1]
+
+    def add(self, x: float) -> None:
+        self.count += 1
+        q = self.heights
+        if self.count <= 5:
+            bisect.insort(q, x)
+            return
+
+        if x < q[0]:
+            q[0] = x
+            k = 0
+        elif x >= q[4]:
+            q[4] = x
+            k = 3
+        else:
+            k = bisect.bisect_right(q, x) - 1
+        n = self.positions
+        for i in range(k + 1, 5):
+            n[i] += 1
+        for i in range(5):
+            self.desired[i] += self.increments[i]
+
+        for i in (1, 2, 3):
+            d = self.desired[i] - n[i]
+            if (d >= 1 and n[i + 1] - n[i] > 1) or (d <= -1 and n[i - 1] - n[i] < -1):
+                d = 1 if d > 0 else -1
+                # Piecewise-parabolic prediction, linear if it would break marker order
+                qp = q[i] + d / (n[i + 1] - n[i - 1]) * (
+                    (n[i] - n[i - 1] + d) * (q[i + 1] - q[i]) / (n[i + 1] - n[i])
+                    + (n[i + 1] - n[i] - d) * (q[i] - q[i - 1]) / (n[i] - n[i - 1]))
+                if not q[i - 1] < qp < q[i + 1]:
+                    qp = q[i] + d * (q[i + d] - q[i]) / (n[i + d] - n[i])
+                q[i] = qp
+                n[i] += d
+
+    def value(self) -> Optional[float]:
+        if self.count == 0:
+            return None
+        if self.count <= 5:
+            return float(np.percentile(self.heights, self.p * 100))
+        return self.heights[2]
+
+class RepCounter:
+    # One-frame-at-a-time count_reps. The 3-frame centred moving average is
+    # emitted one frame late, and the 30th/70th percentile hysteresis thresholds
+    # are P² running quantiles over everything seen so far, so memory stays the same for any
+    # session length. Rep quality follows the batch ROM/duration rules. A rep event is a dict:
+    # {"rep", "quality", "frame", "duration", "rom"}. "frame" is the analysis-frame index at
+    # which the rep completed, matching the position in count_reps' output.
+    def __init__(self, exercise: str, warmup: int = 20):
+        self.joint = REP_SIGNAL_JOINTS.get(exercise)
+        self.warmup = warmup
+        self.count = 0
+        self.quality = ""
+        self.frames = 0
+        self._upper = P2Quantile(0.7)
+        self._lower = P2Quantile(0.3)
+        self._prev = None
+        self._last = None
+        self._state = None
+        self._rep_start = None
+        self._rep_min = self._rep_max = None
+
+    @property
+    def current(self) -> Tuple[int, str]:
+        return self.count, self.quality if self.count > 0 else ""
+
+    def update(self, landmarks: Optional[List[List[float]]]) -> Optional[Dict]:
+        # Feed one frame (None = no detection, skipped); returns a rep event when a rep completes
+        if self.joint is None or landmarks is None:
+            return None
+        y = landmarks[self.joint][1]
+        prev, last = self._prev, self._last
+        self._prev, self._last = last, y
+        if last is None:
+            return None
+        return self._step(((prev if prev is not None else 0.0) + last + y) / 3)
+
+    def finish(self) -> Optional[Dict]:
+        # Flush the last sample (zero-padded, like np.convolve(mode="same"))
+        if self._last is None:
+            return None
+        prev, last = self._prev, self._last
+        self._prev = self._last = None
+        return self._step(((prev if prev is not None else 0.0) + last) / 3)
+
+    def _step(self, y: float) -> Optional[Dict]:
+        i = self.frames
+        self.frames += 1
+        self._upper.add(y)
+        self._lower.add(y)
+        if self._rep_start is not None:
+            self._rep_min = min(self._rep_min, y)
+            self._rep_max = max(self._rep_max, y)
+        # No transitions until the running quantiles have settled a little
+        if self.frames <= self.warmup:
+            return None
+        threshold_down = self._upper.value()
+        threshold_up = self._lower.value()
+
+        if self._state is None and y > threshold_down:
+            self._state = "down"
+            self._rep_start = i
+            self._rep_min = self._rep_max = y
+        elif self._state == "down" and y < threshold_up:
+            self._state = "up"
+        elif self._state == "up" and y > threshold_down:
+            rep_duration = i - self._rep_start
+            rom = self._rep_max - self._rep_min
+            if rom < 0.05:
+                self.quality = "Bad"
+            elif rep_duration < 8:
+                self.quality = "Partial"
+            else:
+                self.quality = "Good"
+            self.count += 1
+            self._state = "down"
+            return {"rep": self.count, "quality": self.quality, "frame": i,
+                    "duration": rep_duration, "rom": float(rom)}
+        return None
+
+def count_reps_streaming(keypoints, exercise: str, warmup: int = 20) -> List[Tuple[int, str]]:
+    # Same per-frame (count, quality) output as count_reps, produced by RepCounter
+    counter = RepCounter(exercise, warmup)
+    if counter.joint is None or len(keypoints) == 0:
+        return [(0, "")] * len(keypoints)
+    events = [counter.update(kp) for kp in keypoints]
+    events.append(counter.finish())
+    reps = []
+    count, quality = 0, ""
+    done = iter(e for e in events if e)
+    event = next(done, None)
+    for i in range(len(keypoints)):
+        if event is not None and event["frame"] == i:
+            count, quality = event["rep"], event["quality"]
+            event = next(done, None)
+        reps.append((count, quality))
+    return reps
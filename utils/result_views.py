@@ -0,0 +1,94 @@
+# ✅ File: result_views.py (bounded-size views of long results: downsampled deviation chart, paged frame log)
+#
+# A badly performed long set can flag most of its frames, so neither the chart nor
+# the log may grow with the clip. deviation_series keeps at most `max_points` of the
+# deviation curve (Largest-Triangle-Three-Buckets, which keeps peaks and troughs)
+# plus the min/max of every bucket; frame_log builds the log's columns with one
+# array operation over joint_errors, and log_page slices one page of it.
+
+from operator import itemgetter
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+
+def deviation_arrays(diff_frames: Sequence[tuple]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    # (frame ids, total errors, severities) of compare_pose's deviations, one column at a time
+    n = len(diff_frames)
+    return (np.fromiter(map(itemgetter(0), diff_frames), np.int64, n),
+            np.fromiter(map(itemgetter(1), diff_frames), np.float64, n),
+            np.fromiter(map(itemgetter(2), diff_frames), object, n))
+
+def _buckets(n: int, count: int) -> np.ndarray:
+    # Start index of each of `count` buckets over points 1..n-2 (the first and last
+    # points are kept as they are), plus the end
+    return np.linspace(1, n - 1, count + 1).astype(np.int64)
+
+def lttb(x: np.ndarray, y: np.ndarray, max_points: int) -> np.ndarray:
+    # Indices of the points LTTB keeps: the first and last, and from each bucket the
+    # one forming the largest triangle with the point kept before it and the mean of
+    # the next bucket
+    n = len(x)
+    if n <= max_points or max_points < 3:
+        return np.arange(n)
+    edges = _buckets(n, max_points - 2)
+    keep = np.empty(max_points, dtype=np.int64)
+    keep[0], keep[-1] = 0, n - 1
+    # Mean of each bucket, then of the last point for the final bucket's neighbour
+    sizes = np.diff(edges)
+    next_x = np.append(np.add.reduceat(x[:n - 1], edges[:-1]) / sizes, x[-1])
+    next_y = np.append(np.add.reduceat(y[:n - 1], edges[:-1]) / sizes, y[-1])
+    a = 0
+    for i in range(max_points - 2):
+        lo, hi = edges[i], edges[i + 1]
+        bx, by = x[lo:hi], y[lo:hi]
+        cx, cy = next_x[i + 1], next_y[i + 1]
+        area = np.abs((x[a] - cx) * (by - y[a]) - (x[a] - bx) * (cy - y[a]))
+        a = lo + int(np.argmax(area))
+        keep[i + 1] = a
+    return keep
+
+def envelope(x: np.ndarray, y: np.ndarray, count: int) -> Dict[str, np.ndarray]:
+    # Min/max of y over `count` buckets of consecutive points, at the bucket's middle x
+    edges = np.linspace(0, len(x), count + 1).astype(np.int64)
+    starts = edges[:-1][np.diff(edges) > 0]
+    ends = np.append(starts[1:], len(x)) - 1
+    return {"x": (x[starts] + x[ends]) / 2, "low": np.minimum.reduceat(y, starts),
+            "high": np.maximum.reduceat(y, starts)}
+
+def deviation_series(frames: np.ndarray, errors: np.ndarray, max_points: int = 1000) -> Dict:
+    # JSON-able chart data: the (downsampled) curve, and for a downsampled curve the
+    # min/max envelope over the same number of buckets, so short spikes stay visible
+    keep = lttb(frames, errors, max_points)
+    series = {"frame": frames[keep].tolist(), "error": errors[keep].tolist(), "total": len(frames)}
+    if len(keep) < len(frames):
+        band = envelope(frames.astype(np.float64), errors, max_points)
+        series["band"] = {k: v.tolist() for k, v in band.items()}
+    return series
+
+def frame_log(frames: np.ndarray, errors: np.ndarray, severity: np.ndarray, joint_errors: np.ndarray,
+              joint_names: List[str]) -> Dict[str, np.ndarray]:
+    # One row per deviating frame that has joint errors (deviation_arrays columns): the
+    # joint with the largest error, that error and the frame's total error.
+    # joint_names: the name of each joint_errors column (features.landmark_names)
+    joint_errors = np.asarray(joint_errors)
+    rows = (frames < len(joint_errors)) & (frames >= 0)
+    frames, errors, severity = frames[rows], errors[rows], severity[rows]
+    if len(frames) == 0 or joint_errors.ndim != 2:
+        worst = np.zeros(0, dtype=np.int64)
+        worst_error = np.zeros(0)
+    else:
+        per_joint = joint_errors[frames]
+        worst = np.argmax(per_joint, axis=1)
+        worst_error = np.take_along_axis(per_joint, worst[:, None], axis=1)[:, 0]
+    width = joint_errors.shape[1] if joint_errors.ndim == 2 else 0
+    names = np.array([joint_names[i] if i < len(joint_names) else f"joint {i}" for i in range(width)], dtype=object)
+    return {"Frame": frames, "Worst joint": names[worst], "Joint error": worst_error,
+            "Total error": errors, "Severity": severity}
+
+def log_page(log: Dict[str, np.ndarray], page: int, page_size: int) -> Dict[str, list]:
+    # Rows of one page (0-based), as plain lists for st.dataframe
+    start = page * page_size
+    return {k: v[start:start + page_size].tolist() for k, v in log.items()}
+
+def page_count(log: Dict[str, np.ndarray], page_size: int) -> int:
+    return max(1, -(-len(log["Frame"]) // page_size))
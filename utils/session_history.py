@@ -0,0 +1,212 @@
+# ✅ File: session_history.py (SQLite store of per-session summaries and per-rep metrics, with trend queries)
+#
+# Tables:  sessions        one row per analysed video and user: grade, reps, errors
+#          session_joints  mean error of each analysis joint in a session
+#          reps            one row per counted rep: frames, duration, quality, error
+#
+# Only compact summaries are kept (a few hundred bytes per session), never tracks or
+# per-frame errors, so trend charts are answered by indexed aggregate queries over
+# the user's latest sessions instead of re-running any analysis.
+
+import sqlite3
+import threading
+import time
+from contextlib import closing, contextmanager
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+import numpy as np
+
+from utils.features import landmark_names
+
+# Grades as numbers, so they can be averaged and charted
+GRADE_SCORES = {"A": 4.0, "B+": 3.3, "C": 2.0, "D": 1.0, "F": 0.0}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    id INTEGER PRIMARY KEY,
+    user TEXT NOT NULL,
+    exercise TEXT NOT NULL,
+    created REAL NOT NULL,
+    source TEXT NOT NULL,
+    grade TEXT NOT NULL,
+    score REAL NOT NULL,
+    frames INTEGER NOT NULL,
+    deviations INTEGER NOT NULL,
+    mean_error REAL,
+    reps INTEGER NOT NULL,
+    good_reps INTEGER NOT NULL,
+    rom REAL,
+    detected TEXT,
+    confidence REAL,
+    UNIQUE (user, source)
+);
+-- score and reps make the per-exercise trend and totals queries index-only
+CREATE INDEX IF NOT EXISTS sessions_user_exercise_created ON sessions (user, exercise, created, score, reps);
+CREATE INDEX IF NOT EXISTS sessions_user_created ON sessions (user, created);
+CREATE INDEX IF NOT EXISTS sessions_created ON sessions (created);
+CREATE TABLE IF NOT EXISTS session_joints (
+    session_id INTEGER NOT NULL REFERENCES sessions (id) ON DELETE CASCADE,
+    landmark INTEGER NOT NULL,
+    error REAL NOT NULL,
+    PRIMARY KEY (session_id, landmark)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS reps (
+    session_id INTEGER NOT NULL REFERENCES sessions (id) ON DELETE CASCADE,
+    rep INTEGER NOT NULL,
+    start_frame INTEGER NOT NULL,
+    end_frame INTEGER NOT NULL,
+    seconds REAL NOT NULL,
+    quality TEXT,
+    mean_error REAL,
+    deviations INTEGER NOT NULL,
+    PRIMARY KEY (session_id, rep)
+) WITHOUT ROWID;
+"""
+
+SESSION_COLUMNS = ("grade", "score", "frames", "deviations", "mean_error", "reps", "good_reps", "rom",
+                   "detected", "confidence")
+REP_COLUMNS = ("rep", "start_frame", "end_frame", "seconds", "quality", "mean_error", "deviations")
+
+def summarize(results: Dict, indices: List[int], fps: float = 30.0) -> Dict:
+    # analyze_exercise results -> {"session": ..., "joints": [(landmark, error)], "reps": [...]}.
+    # indices: the landmarks behind joint_errors' columns (CONFIG["keypoint_indices"])
+    feedback = results["feedback"]
+    joint_errors = np.asarray(results["joint_errors"], dtype=np.float64)
+    if joint_errors.ndim != 2:
+        joint_errors = joint_errors.reshape(0, len(indices))
+    frame_error = joint_errors.mean(axis=1) if joint_errors.shape[1] else np.zeros(len(joint_errors))
+    deviating = np.sort(np.fromiter((f[0] for f in results["diff_frames"]), np.int64, len(results["diff_frames"])))
+
+    # count_reps gives (reps so far, quality of the last rep) per frame; a rep ends
+    # where the count goes up and starts where the previous one ended
+    counts = np.fromiter((r[0] for r in results["reps"]), np.int64, len(results["reps"]))
+    ends = np.flatnonzero(np.diff(counts, prepend=0) > 0)
+    starts = np.concatenate([[0], ends[:-1]]).astype(np.int64)
+    reps = []
+    for rep, (start, end) in enumerate(zip(starts, ends), 1):
+        span = frame_error[start:end + 1]
+        reps.append({
+            "rep": rep, "start_frame": int(start), "end_frame": int(end),
+            "seconds": float((end - start) / (fps or 30.0)), "quality": results["reps"][end][1],
+            "mean_error": float(span.mean()) if len(span) else None,
+            "deviations": int(np.searchsorted(deviating, end, "right") - np.searchsorted(deviating, start)),
+        })
+
+    rom = feedback.get("range_of_motion") or {}
+    grade = feedback["performance_grade"]
+    session = {
+        "grade": grade, "score": GRADE_SCORES.get(grade, 0.0), "frames": len(joint_errors),
+        "deviations": len(deviating), "mean_error": float(frame_error.mean()) if len(frame_error) else None,
+        "reps": len(reps), "good_reps": sum(r["quality"] == "Good" for r in reps),
+        "rom": rom.get("range"), "detected": results.get("detected_type"),
+        "confidence": float(results["confidence"]) if results.get("confidence") is not None else None,
+    }
+    joints = []
+    if len(joint_errors):
+        joints = [(int(landmark), float(error)) for landmark, error in zip(indices, joint_errors.mean(axis=0))]
+    return {"session": session, "joints": joints, "reps": reps}
+
+class SessionHistory:
+    # One SQLite file shared by every session of the server (and other processes);
+    # WAL lets the trend queries read while an analysis is being recorded. A
+    # connection is opened per call, so Streamlit's script threads never share one.
+    def __init__(self, path: Union[str, Path]):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(SCHEMA)
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        with closing(sqlite3.connect(self.path, timeout=30)) as conn:
+            conn.execute("PRAGMA foreign_keys=ON")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            yield conn
+
+    # ---- writing ----
+    def add_many(self, entries: Iterable[Tuple[str, str, str, Dict, Optional[float]]]) -> int:
+        # entries: (user, exercise, source, summarize() output, created or None = now), in
+        # one transaction; a (user, source) already stored is skipped. Returns how many were added.
+        added = 0
+        placeholders = ", ".join("?" * (4 + len(SESSION_COLUMNS)))
+        with self._lock, self._connect() as conn, conn:
+            for user, exercise, source, summary, created in entries:
+                session = summary["session"]
+                cur = conn.execute(
+                    f"INSERT OR IGNORE INTO sessions (user, exercise, source, created, {', '.join(SESSION_COLUMNS)}) "
+                    f"VALUES ({placeholders})",
+                    (user, exercise, source, created if created is not None else time.time(),
+                     *(session[c] for c in SESSION_COLUMNS)))
+                if not cur.rowcount:
+                    continue
+                session_id = cur.lastrowid
+                conn.executemany("INSERT INTO session_joints VALUES (?, ?, ?)",
+                                 [(session_id, landmark, error) for landmark, error in summary["joints"]])
+                conn.executemany(f"INSERT INTO reps VALUES (?, {', '.join('?' * len(REP_COLUMNS))})",
+                                 [(session_id, *(r[c] for c in REP_COLUMNS)) for r in summary["reps"]])
+                added += 1
+        return added
+
+    def add(self, user: str, exercise: str, source: str, summary: Dict, created: Optional[float] = None) -> bool:
+        return self.add_many([(user, exercise, source, summary, created)]) == 1
+
+    def record(self, user: str, exercise: str, source: str, results: Dict, indices: List[int],
+               fps: float = 30.0) -> bool:
+        # Store one analysis once per user and source (e.g. the job ID); False if already stored
+        return self.add(user, exercise, source, summarize(results, indices, fps))
+
+    # ---- trend queries ----
+    def _where(self, user: str, exercise: Optional[str]) -> Tuple[str, tuple]:
+        # Both forms are answered from an index on (user[, exercise], created)
+        if exercise is None:
+            return "user = ?", (user,)
+        return "user = ? AND exercise = ?", (user, exercise)
+
+    def _rows(self, sql: str, params: tuple) -> List[Dict]:
+        with self._connect() as conn:
+            conn.row_factory = sqlite3.Row
+            return [dict(row) for row in conn.execute(sql, params)]
+
+    def recent(self, user: str, exercise: Optional[str] = None, limit: int = 30) -> List[Dict]:
+        # The latest `limit` sessions, oldest first (grade over time)
+        where, params = self._where(user, exercise)
+        rows = self._rows(f"SELECT id, created, exercise, grade, score, reps, good_reps, mean_error, rom "
+                          f"FROM sessions WHERE {where} ORDER BY created DESC LIMIT ?", (*params, limit))
+        return rows[::-1]
+
+    def worst_joints(self, user: str, exercise: Optional[str] = None, last: int = 30, top: int = 5) -> List[Dict]:
+        # Joints by mean error over the latest `last` sessions, worst first
+        where, params = self._where(user, exercise)
+        rows = self._rows(
+            f"WITH latest AS (SELECT id FROM sessions WHERE {where} ORDER BY created DESC LIMIT ?) "
+            f"SELECT landmark, AVG(error) AS error, COUNT(*) AS sessions FROM session_joints "
+            f"JOIN latest ON session_joints.session_id = latest.id "
+            f"GROUP BY landmark ORDER BY error DESC LIMIT ?", (*params, last, top))
+        for row, name in zip(rows, landmark_names([row["landmark"] for row in rows])):
+            row["joint"] = name
+        return rows
+
+    def daily(self, user: str, exercise: Optional[str] = None, days: int = 90) -> List[Dict]:
+        # One row per local calendar day of the last `days` days with sessions
+        where, params = self._where(user, exercise)
+        return self._rows(
+            f"SELECT date(created, 'unixepoch', 'localtime') AS day, COUNT(*) AS sessions, "
+            f"AVG(score) AS score, SUM(reps) AS reps FROM sessions "
+            f"WHERE {where} AND created >= ? GROUP BY day ORDER BY day", (*params, time.time() - days * 86400))
+
+    def totals(self, user: str, exercise: Optional[str] = None) -> Dict:
+        where, params = self._where(user, exercise)
+        return self._rows(f"SELECT COUNT(*) AS sessions, COALESCE(SUM(reps), 0) AS reps, MAX(created) AS last "
+                          f"FROM sessions WHERE {where}", params)[0]
+
+    def reps(self, session_id: int) -> List[Dict]:
+        return self._rows(f"SELECT {', '.join(REP_COLUMNS)} FROM reps WHERE session_id = ? ORDER BY rep",
+                          (session_id,))
+
+    def prune(self, before: float) -> int:
+        # Remove sessions created before `before` (their joints and reps go with them)
+        with self._lock, self._connect() as conn, conn:
+            return conn.execute("DELETE FROM sessions WHERE created < ?", (before,)).rowcount
@@ -0,0 +1,120 @@
+# ✅ File: sharded_extraction.py (one video's pose extraction split across processes by time segment)
+#
+# Segment i owns source frames [start, end). Its worker seeks to `overlap` frames
+# before start, runs a fresh Pose graph from there so tracking (and MediaPipe's
+# landmark smoothing) has settled by the first owned frame, and returns only the
+# owned frames. Stitched in order, the segments give a track whose frame indices
+# match a sequential run. With stride > 1 a segment also decodes up to the next
+# inferred frame past its end, so skipped frames at the seam interpolate the same
+# way as in one pass.
+
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from typing import Callable, Dict, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from utils import profiling
+from utils.pose_estimation import NUM_LANDMARKS, PoseTrack, extract_pose_track, iter_pose_chunks
+from utils.profiling import profiled
+
+Segment = Tuple[int, int, int]  # warm-up start, first owned frame, end (exclusive)
+
+def video_seconds(video_path: str) -> float:
+    # Duration from the container's frame count (0 when unknown)
+    cap = cv2.VideoCapture(video_path)
+    fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
+    frames = cap.get(cv2.CAP_PROP_FRAME_COUNT) or 0
+    cap.release()
+    return frames / fps
+
+def plan_segments(total: int, segments: int, overlap: int, stride: int = 1) -> List[Segment]:
+    # Equal slices of [0, total) on the stride grid, each with up to `overlap` frames of warm-up
+    stride = max(1, stride)
+    segments = max(1, min(segments, total // max(stride, overlap, 1) or 1))
+    bounds = [round(total * i / segments / stride) * stride for i in range(segments)] + [total]
+    plan = []
+    for start, end in zip(bounds, bounds[1:]):
+        if end > start:
+            warm = max(0, start - overlap)
+            plan.append((warm - warm % stride, start, end))
+    return plan
+
+def _extract_segment(video_path: str, segment: Segment, last: bool, params: Dict,
+                     chunk_seconds: float) -> Tuple[np.ndarray, np.ndarray, float, float]:
+    # Runs in a worker process: (owned points, owned visibility, wall seconds, CPU seconds)
+    began, cpu = time.perf_counter(), time.process_time()
+    warm, start, end = segment
+    stride = max(1, int(params.get("stride", 1)))
+    # The last segment reads to the end of the file (frame counts can be wrong)
+    stop = None if last else end + (-end) % stride + (1 if stride > 1 else 0)
+    points, visibility = [], []
+    for chunk, chunk_vis, _, _ in iter_pose_chunks(video_path, params["min_detection_confidence"],
+                                                   params["min_tracking_confidence"], stride,
+                                                   params.get("target_height"), None, chunk_seconds,
+                                                   warm, stop):
+        points.append(chunk)
+        visibility.append(chunk_vis)
+    if not points:
+        return (np.zeros((0, NUM_LANDMARKS, 3), dtype=np.float32), np.zeros((0, NUM_LANDMARKS), dtype=np.float32),
+                time.perf_counter() - began, time.process_time() - cpu)
+    points, visibility = np.concatenate(points), np.concatenate(visibility)
+    owned = slice(start - warm, None if last else end - warm)
+    return points[owned], visibility[owned], time.perf_counter() - began, time.process_time() - cpu
+
+def stitch(parts: List[Tuple[np.ndarray, np.ndarray]], plan: List[Segment]) -> Tuple[np.ndarray, np.ndarray]:
+    # A segment that comes back short is padded with missing frames so later ones keep
+    # their source indices; trailing empty segments (frame count past the real end) are dropped
+    while parts and not len(parts[-1][0]):
+        parts, plan = parts[:-1], plan[:-1]
+    points, visibility = [], []
+    for i, ((seg_points, seg_vis), (_, start, end)) in enumerate(zip(parts, plan)):
+        points.append(seg_points)
+        visibility.append(seg_vis)
+        short = (end - start) - len(seg_points)
+        if short > 0 and i < len(parts) - 1:
+            points.append(np.full((short, NUM_LANDMARKS, 3), np.nan, dtype=np.float32))
+            visibility.append(np.zeros((short, NUM_LANDMARKS), dtype=np.float32))
+    if not points:
+        return np.zeros((0, NUM_LANDMARKS, 3), dtype=np.float32), np.zeros((0, NUM_LANDMARKS), dtype=np.float32)
+    return np.concatenate(points), np.concatenate(visibility)
+
+@profiled("extract_pose_track_sharded", frames=lambda track, *a, **k: track.frames)
+def extract_pose_track_sharded(video_path: str, params: Dict, segments: int, overlap_seconds: float = 2.0,
+                               workers: Optional[int] = None, chunk_seconds: float = 1.0,
+                               on_segment: Optional[Callable[[int, int], None]] = None) -> PoseTrack:
+    # extract_pose_track(video_path, **params) with the video split into `segments`
+    # time slices extracted on `workers` processes (default: one per segment, up to
+    # the CPU count). on_segment(done, total) runs as segments finish.
+    cap = cv2.VideoCapture(video_path)
+    fps = cap.get(cv2.CAP_PROP_FPS) or 0.0
+    total = int(cap.get(cv2.CAP_PROP_FRAME_COUNT) or 0)
+    cap.release()
+    stride = max(1, int(params.get("stride", 1)))
+    plan = plan_segments(total, segments, round(overlap_seconds * (fps or 30.0)), stride)
+    if len(plan) < 2:
+        # Unknown length or too short to split
+        return extract_pose_track(video_path, params["warmup_trim"], params["min_detection_confidence"],
+                                  params["min_tracking_confidence"], stride, params.get("target_height"),
+                                  params.get("max_gap", 0), params.get("min_visibility", 0.0),
+                                  chunk_seconds=chunk_seconds)
+
+    workers = max(1, min(len(plan), workers or os.cpu_count() or 1))
+    # Spawned so workers never fork a process that already runs MediaPipe threads
+    with ProcessPoolExecutor(max_workers=workers, mp_context=get_context("spawn")) as pool:
+        futures = [pool.submit(_extract_segment, video_path, segment, i == len(plan) - 1, params, chunk_seconds)
+                   for i, segment in enumerate(plan)]
+        parts = []
+        for i, future in enumerate(futures):
+            seg_points, seg_vis, seconds, cpu_s = future.result()
+            parts.append((seg_points, seg_vis))
+            profiling.record("extract_sharded.segment", seconds, len(seg_points), segment=i,
+                             warmup=plan[i][1] - plan[i][0], cpu_s=cpu_s)
+            if on_segment is not None:
+                on_segment(i + 1, len(plan))
+    points, visibility = stitch(parts, plan)
+    return PoseTrack(points, visibility, fps, params["warmup_trim"], stride, params.get("target_height"),
+                     max_gap=params.get("max_gap", 0), min_visibility=params.get("min_visibility", 0.0))
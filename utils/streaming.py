@@ -0,0 +1,245 @@
+# ✅ File: streaming.py (live camera / RTSP / file coaching with incremental reps and form checks)
+#
+#     python -m utils.streaming 0 --exercise squat                   # webcam
+#     python -m utils.streaming rtsp://host/stream --exercise press
+#     python -m utils.streaming reference_videos/squat_perfect.mp4   # file at real-time rate
+
+import argparse
+import os
+import threading
+import time
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from utils.compare import normalize_poses
+from utils.pose_estimation import draw_pose_overlay, pose_pool
+from utils.reference_registry import ReferenceEntry
+from utils.rep_counter import RepCounter
+
+class LatestFrameReader:
+    # Decodes a camera index, stream URL or file on a background thread and
+    # keeps only the newest frame. When inference falls behind, older frames are
+    # dropped, so latency stays around one inference time instead of growing.
+    # Files are paced at their own fps (realtime=True) so they behave like a camera.
+    def __init__(self, source, realtime: bool = True, drop_frames: bool = True):
+        source = int(source) if str(source).isdigit() else source
+        self.cap = cv2.VideoCapture(source)
+        if not self.cap.isOpened():
+            raise IOError(f"Could not open video source: {source}")
+        self.is_file = isinstance(source, str) and os.path.exists(source)
+        self.fps = self.cap.get(cv2.CAP_PROP_FPS) or 30.0
+        self.realtime = realtime and self.is_file
+        self.drop_frames = drop_frames
+        self.decoded = 0
+        self.dropped = 0
+        self._latest = None
+        self._done = False
+        self._stop = threading.Event()
+        self._cond = threading.Condition()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        start = time.perf_counter()
+        try:
+            while not self._stop.is_set():
+                ok, frame = self.cap.read()
+                if not ok:
+                    break
+                if self.realtime:
+                    delay = start + self.decoded / self.fps - time.perf_counter()
+                    if delay > 0:
+                        time.sleep(delay)
+                with self._cond:
+                    if not self.drop_frames:
+                        self._cond.wait_for(lambda: self._latest is None or self._stop.is_set())
+                    if self._latest is not None:
+                        self.dropped += 1
+                    self._latest = (self.decoded, time.perf_counter(), frame)
+                    self._cond.notify_all()
+                self.decoded += 1
+        finally:
+            self.cap.release()
+            with self._cond:
+                self._done = True
+                self._cond.notify_all()
+
+    def read(self, timeout: float = 1.0) -> Optional[Tuple[int, float, np.ndarray]]:
+        # (frame_id, captured_at, frame) for the newest frame, or None on timeout / end of stream
+        with self._cond:
+            self._cond.wait_for(lambda: self._latest is not None or self._done, timeout)
+            item, self._latest = self._latest, None
+            self._cond.notify_all()
+            return item
+
+    @property
+    def finished(self) -> bool:
+        with self._cond:
+            return self._done and self._latest is None
+
+    def close(self):
+        self._stop.set()
+        with self._cond:
+            self._cond.notify_all()
+        self._thread.join(timeout=2)
+
+class StreamingComparer:
+    # Incremental compare_pose. Each frame is matched against the reference
+    # within +-window frames of a cursor, and the cursor then moves to just past the best match,
+    # so it follows the user's tempo. The comparison runs against one reference rep
+    # (ReferenceEntry.template), which wraps around so sessions of any length keep comparing.
+    def __init__(self, reference: ReferenceEntry, base_thresh: float,
+                 window: int = 4, early_ignore: int = 50):
+        self.ref = reference.template
+        self.indices = reference.indices
+        self.base_thresh = base_thresh
+        self.window = window
+        self.early_ignore = early_ignore
+        self.cursor = 0
+        self.frames = 0
+        self.flagged = 0
+        self._offsets = np.arange(-window, window + 1)
+
+    def update(self, landmarks: Optional[List[List[float]]]) -> Optional[Dict]:
+        # Returns {"error", "joint_errors", "severity"} for a detected pose, else None
+        if landmarks is None or len(self.ref) == 0:
+            return None
+        user = normalize_poses([landmarks])[0, self.indices]
+        candidates = (self.cursor + self._offsets) % len(self.ref)
+        joint_errors = np.linalg.norm(self.ref[candidates] - user, axis=-1)
+        errors = np.mean(joint_errors, axis=-1)
+        errors[np.isnan(errors)] = np.inf
+        best = int(np.argmin(errors))
+        self.cursor = (int(candidates[best]) + 1) % len(self.ref)
+
+        i = self.frames
+        self.frames += 1
+        error = float(errors[best])
+        severity = None
+        if i >= self.early_ignore and np.isfinite(error) and error > self.base_thresh and error >= 0.01:
+            severity = "high" if error > self.base_thresh * 1.5 else "medium"
+            self.flagged += 1
+        return {"error": error, "joint_errors": joint_errors[best], "severity": severity}
+
+class LiveSession:
+    # Pose in tracking mode plus the constant-memory rep counter and the streaming form comparer.
+    # process() handles one frame and returns the state shown to the user.
+    def __init__(self, exercise: str, reference: ReferenceEntry, config: Dict, pose=None):
+        params = config["extraction"]
+        live = config["live"]
+        thresholds = config["exercise_thresholds"][exercise]
+        self.owns_pose = pose is None
+        # Same settings as extraction, so live sessions and analyses share pooled graphs
+        self.pose = pose or pose_pool.get(min_detection_confidence=params["min_detection_confidence"],
+                                          min_tracking_confidence=params["min_tracking_confidence"])
+        self.warmup_trim = params["warmup_trim"]
+        self.reps = RepCounter(exercise, live["rep_warmup"])
+        self.comparer = StreamingComparer(reference, thresholds["base"])
+        self.rep_log: List[Dict] = []
+        self.detected = 0
+        self.processed = 0
+        self.last_frame_id = None
+        # The first process() call builds the graph (~100s of ms); do it before the
+        # source starts so a live feed does not drop its opening frames (pooled graphs
+        # are primed already). No reset() afterwards: it restarts the graph, and a blank
+        # frame leaves no tracking state behind anyway.
+        if not self.owns_pose:
+            self.pose.process(np.zeros((256, 256, 3), dtype=np.uint8))
+
+    def process(self, frame_id: int, frame: np.ndarray) -> Dict:
+        results = self.pose.process(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
+        self.processed += 1
+        self.last_frame_id = frame_id
+        landmarks = None
+        if results.pose_landmarks:
+            landmarks = [[p.x, p.y, p.z] for p in results.pose_landmarks.landmark]
+            self.detected += 1
+        # Same warm-up as the batch path: the first detections are ignored
+        analysed = landmarks if self.detected > self.warmup_trim else None
+        rep = self.reps.update(analysed)
+        if rep is not None:
+            self.rep_log.append(dict(rep, source_frame=frame_id))
+        form = self.comparer.update(analysed)
+        return {
+            "frame_id": frame_id,
+            "landmarks": landmarks,
+            "rep": self.reps.current,
+            "rep_completed": rep,
+            "error": form["error"] if form else None,
+            "severity": form["severity"] if form else None,
+        }
+
+    def finish(self) -> Optional[Dict]:
+        # End of stream: flush the rep counter's last sample
+        rep = self.reps.finish()
+        if rep is not None:
+            self.rep_log.append(dict(rep, source_frame=self.last_frame_id))
+        return rep
+
+    def close(self):
+        if self.owns_pose:
+            pose_pool.put(self.pose)
+
+def coach_stream(reader: LatestFrameReader, session: LiveSession,
+                 max_seconds: Optional[float] = None) -> Iterator[Tuple[np.ndarray, Dict]]:
+    # Yields (annotated frame, state) for every frame that was processed; the
+    # state also carries capture-to-result latency and dropped-frame counts.
+    start = time.perf_counter()
+    while not reader.finished:
+        if max_seconds is not None and time.perf_counter() - start > max_seconds:
+            break
+        item = reader.read()
+        if item is None:
+            continue
+        frame_id, captured_at, frame = item
+        state = session.process(frame_id, frame)
+        elapsed = time.perf_counter() - start
+        state.update({
+            "latency_ms": (time.perf_counter() - captured_at) * 1000,
+            "dropped": reader.dropped,
+            "decoded": reader.decoded,
+            "fps": session.processed / elapsed if elapsed > 0 else 0.0,
+        })
+        rep = state["rep"] if state["rep"][0] > 0 else None
+        yield draw_pose_overlay(frame, state["landmarks"], state["severity"] is not None, rep), state
+
+def main():
+    from config import CONFIG
+    from utils.reference_registry import get_registry
+
+    parser = argparse.ArgumentParser(description="Live rep counting and form feedback from a camera, stream or file")
+    parser.add_argument("source", help="Camera index, RTSP/HTTP URL or video file")
+    parser.add_argument("--exercise", default="squat", choices=list(CONFIG["exercise_thresholds"]))
+    parser.add_argument("--no-realtime", action="store_true", help="Read files as fast as possible without dropping frames")
+    parser.add_argument("--max-seconds", type=float)
+    args = parser.parse_args()
+
+    reference = get_registry(CONFIG).get(args.exercise)
+    if reference is None:
+        parser.error(f"No reference data for {args.exercise}")
+    session = LiveSession(args.exercise, reference, CONFIG)
+    reader = LatestFrameReader(args.source, realtime=not args.no_realtime, drop_frames=not args.no_realtime)
+    latencies = []
+    state = {}
+    try:
+        for _, state in coach_stream(reader, session, args.max_seconds):
+            latencies.append(state["latency_ms"])
+            rep = state["rep_completed"]
+            if rep:
+                print(f"frame {state['frame_id']:>6}  rep {rep['rep']}: {rep['quality']} "
+                      f"({rep['duration']} frames, ROM {rep['rom']:.3f})")
+        rep = session.finish()
+        if rep:
+            print(f"end of stream  rep {rep['rep']}: {rep['quality']} ({rep['duration']} frames, ROM {rep['rom']:.3f})")
+    finally:
+        reader.close()
+        session.close()
+    if latencies:
+        print(f"processed {session.processed}/{reader.decoded} frames ({reader.dropped} dropped), "
+              f"{state['fps']:.1f} fps, latency p50 {np.percentile(latencies, 50):.0f} ms / "
+              f"p95 {np.percentile(latencies, 95):.0f} ms, {session.comparer.flagged} frames flagged")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+# ✅ File: uploads.py (chunked upload spooling + age/quota janitor for session files)
+
+import hashlib
+import os
+import shutil
+import threading
+import time
+from pathlib import Path
+from typing import BinaryIO, Callable, Iterable, Optional, Tuple, Union
+
+PathLike = Union[str, Path]
+
+_janitor_lock = threading.Lock()
+_janitor_last_run = 0.0
+
+def save_upload(fileobj: BinaryIO, dest: PathLike, chunk_size: int = 1 << 20) -> Tuple[Path, str]:
+    # Copy in fixed-size chunks (never the whole file in one bytes object) and
+    # hash on the way through; the file appears under `dest` only when complete.
+    dest = Path(dest)
+    dest.parent.mkdir(parents=True, exist_ok=True)
+    partial = dest.with_name(dest.name + ".partial")
+    h = hashlib.sha256()
+    if hasattr(fileobj, "seek"):
+        fileobj.seek(0)
+    try:
+        with open(partial, "wb") as out:
+            for chunk in iter(lambda: fileobj.read(chunk_size), b""):
+                h.update(chunk)
+                out.write(chunk)
+        os.replace(partial, dest)
+    except BaseException:
+        if partial.exists():
+            partial.unlink()
+        raise
+    return dest, h.hexdigest()
+
+def touch(path: PathLike) -> None:
+    # Mark a session file as in use so the janitor treats it as fresh
+    try:
+        os.utime(path, None)
+    except FileNotFoundError:
+        pass
+
+def cleanup(roots: Iterable[PathLike], max_age_seconds: float, max_total_bytes: int,
+            in_use: Iterable[PathLike] = (), fresh_seconds: float = 0.0) -> Tuple[int, int]:
+    # Delete files older than max_age_seconds, then the oldest remaining files
+    # until the roots fit in max_total_bytes. Files in `in_use` (e.g. inputs of queued
+    # or running jobs) are never deleted, and the quota pass also spares files
+    # touched in the last fresh_seconds. Returns (files removed, bytes freed).
+    in_use = {Path(p).resolve() for p in in_use}
+    now = time.time()
+    files = []
+    for root in roots:
+        root = Path(root)
+        if not root.exists():
+            continue
+        for path in root.rglob("*"):
+            try:
+                if path.is_file():
+                    st = path.stat()
+                    files.append((st.st_mtime, st.st_size, path))
+            except FileNotFoundError:
+                continue
+
+    removed, freed = 0, 0
+    total = sum(size for _, size, _ in files)
+    for mtime, size, path in sorted(files, key=lambda f: f[0]):
+        expired = now - mtime > max_age_seconds
+        if not expired and total <= max_total_bytes:
+            break
+        if path.resolve() in in_use or (not expired and now - mtime < fresh_seconds):
+            continue
+        try:
+            path.unlink()
+        except FileNotFoundError:
+            continue
+        removed += 1
+        freed += size
+        total -= size
+
+    for root in roots:
+        root = Path(root)
+        if not root.exists():
+            continue
+        # Drop emptied session directories, deepest first
+        for d in sorted((p for p in root.rglob("*") if p.is_dir()), key=lambda p: len(p.parts), reverse=True):
+            try:
+                d.rmdir()
+            except OSError:
+                pass
+    return removed, freed
+
+def maybe_cleanup(roots: Iterable[PathLike], max_age_seconds: float, max_total_bytes: int,
+                  interval_seconds: float, in_use: Callable[[], Iterable[PathLike]] = tuple
+                  ) -> Optional[Tuple[int, int]]:
+    # Run cleanup() at most once per interval per process; reruns call this freely.
+    # in_use() is only asked for the files to spare when cleanup actually runs, and
+    # files touched within the interval are spared by the quota pass.
+    global _janitor_last_run
+    if not _janitor_lock.acquire(blocking=False):
+        return None
+    try:
+        if time.time() - _janitor_last_run < interval_seconds:
+            return None
+        _janitor_last_run = time.time()
+        return cleanup(roots, max_age_seconds, max_total_bytes, in_use(), interval_seconds)
+    finally:
+        _janitor_lock.release()
+
+def remove_session(root: PathLike) -> None:
+    shutil.rmtree(root, ignore_errors=True)
@@ -0,0 +1,201 @@
+# ✅ File: video_encoding.py (output profiles for annotated videos: codec, size, bitrate, frame skipping)
+
+import functools
+import os
+import shutil
+import subprocess
+import tempfile
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Dict, Optional, Tuple
+
+import cv2
+import numpy as np
+
+# Container extension and MIME type per codec
+CONTAINERS = {
+    "h264": (".mp4", "video/mp4"),
+    "vp8": (".webm", "video/webm"),
+    "mp4v": (".mp4", "video/mp4"),
+    "mjpg": (".avi", "video/x-msvideo"),
+}
+
+# ffmpeg encoders per codec, in order of preference; GPU H.264 encoders come
+# first when hardware encoding is enabled and are only used if a test encode works
+FFMPEG_ENCODERS = {"h264": ["libx264"], "vp8": ["libvpx"], "mp4v": ["mpeg4"], "mjpg": ["mjpeg"]}
+HW_ENCODERS = {"h264": ["h264_nvenc", "h264_qsv", "h264_vaapi", "h264_videotoolbox"]}
+VAAPI_DEVICE = "/dev/dri/renderD128"
+
+# OpenCV fourcc per codec; pip builds of OpenCV usually ship FFmpeg without an H.264 encoder
+FOURCCS = {"h264": "avc1", "vp8": "VP80", "mp4v": "mp4v", "mjpg": "MJPG"}
+
+# What create_annotated_video_opencv writes when no profile is given (with OpenCV, as before profiles)
+SOURCE_PROFILE = {"codec": "mp4v", "height": None, "bitrate": None, "frame_step": 1}
+SOURCE_ENCODING = {"ffmpeg": False, "fallback": []}
+
+@functools.lru_cache(maxsize=None)
+def _bundled_ffmpeg() -> Optional[str]:
+    # The static ffmpeg (with libx264) of the optional imageio-ffmpeg package
+    try:
+        import imageio_ffmpeg
+        return imageio_ffmpeg.get_ffmpeg_exe()
+    except (ImportError, RuntimeError):
+        return None
+
+def find_ffmpeg(configured=None) -> Optional[str]:
+    # configured: a path, None to look on PATH and then for imageio-ffmpeg's binary,
+    # or False to never use ffmpeg
+    if configured is False:
+        return None
+    if configured and os.path.exists(configured):
+        return configured
+    return shutil.which("ffmpeg") or _bundled_ffmpeg()
+
+def _hw_args(encoder: str) -> Tuple[list, list]:
+    # (input-side args, output-side args) an encoder needs besides -c:v
+    if encoder == "h264_vaapi":
+        return ["-vaapi_device", VAAPI_DEVICE], ["-vf", "format=nv12,hwupload"]
+    return [], []
+
+@functools.lru_cache(maxsize=None)
+def _ffmpeg_encoder_works(ffmpeg: str, encoder: str) -> bool:
+    # Listed encoders can still fail (no GPU, no driver), so try a tiny encode
+    pre, post = _hw_args(encoder)
+    cmd = [ffmpeg, "-hide_banner", "-loglevel", "error", *pre, "-f", "lavfi", "-i",
+           "color=black:s=256x256:d=0.2", *post, "-c:v", encoder, "-f", "null", "-"]
+    try:
+        return subprocess.run(cmd, capture_output=True, timeout=20).returncode == 0
+    except (OSError, subprocess.SubprocessError):
+        return False
+
+@functools.lru_cache(maxsize=None)
+def _opencv_fourcc_works(fourcc: str, ext: str) -> bool:
+    with tempfile.TemporaryDirectory() as tmp:
+        writer = cv2.VideoWriter(os.path.join(tmp, f"probe{ext}"), cv2.VideoWriter_fourcc(*fourcc), 30, (64, 64))
+        ok = writer.isOpened()
+        writer.release()
+    return ok
+
+@functools.lru_cache(maxsize=None)
+def resolve_encoder(codec: str, ffmpeg: Optional[str] = None, hardware: bool = True,
+                    fallback: Tuple[str, ...] = ("vp8", "mp4v")) -> Dict:
+    # First working (backend, encoder) for `codec`, then for each fallback codec.
+    # Probed once per process.
+    for candidate in (codec,) + tuple(c for c in fallback if c != codec):
+        ext, mime = CONTAINERS[candidate]
+        if ffmpeg:
+            encoders = (HW_ENCODERS.get(candidate, []) if hardware else []) + FFMPEG_ENCODERS[candidate]
+            for encoder in encoders:
+                if _ffmpeg_encoder_works(ffmpeg, encoder):
+                    return {"backend": "ffmpeg", "codec": candidate, "encoder": encoder, "ext": ext, "mime": mime}
+        fourcc = FOURCCS[candidate]
+        if _opencv_fourcc_works(fourcc, ext):
+            return {"backend": "opencv", "codec": candidate, "encoder": fourcc, "ext": ext, "mime": mime}
+    raise RuntimeError(f"No working encoder for {codec} or fallbacks {fallback}")
+
+def encoder_for(profile: Dict, encoding: Optional[Dict] = None) -> Dict:
+    encoding = encoding or {}
+    return resolve_encoder(profile["codec"], find_ffmpeg(encoding.get("ffmpeg")),
+                           encoding.get("hardware", True), tuple(encoding.get("fallback", ("vp8", "mp4v"))))
+
+def output_size(width: int, height: int, target_height: Optional[int]) -> Tuple[int, int]:
+    # Downscale to target_height keeping the aspect ratio; even sizes for 4:2:0 encoders
+    if target_height and height > target_height:
+        width, height = width * target_height / height, target_height
+    return max(2, int(round(width / 2)) * 2), max(2, int(round(height / 2)) * 2)
+
+class VideoEncoder:
+    # Writes BGR frames with the encoder resolve_encoder picked. The ffmpeg backend pipes
+    # raw frames to an ffmpeg process, which honours bitrate/preset, can use GPU
+    # encoders and writes fast-start MP4 for progressive playback. The OpenCV backend
+    # uses cv2.VideoWriter, which has no bitrate control.
+    def __init__(self, path: str, fps: float, size: Tuple[int, int], choice: Dict, profile: Dict,
+                 ffmpeg: Optional[str] = None):
+        self.path = path
+        self.size = size
+        self.choice = choice
+        self.frames = 0
+        self._proc = None
+        self._writer = None
+        if choice["backend"] == "ffmpeg":
+            encoder = choice["encoder"]
+            pre, post = _hw_args(encoder)
+            cmd = [ffmpeg, "-hide_banner", "-loglevel", "error", "-y", *pre,
+                   "-f", "rawvideo", "-pix_fmt", "bgr24", "-s", f"{size[0]}x{size[1]}", "-r", f"{fps:.6f}",
+                   "-i", "-", "-an", *post, "-c:v", encoder]
+            if encoder == "libx264" and profile.get("crf") is not None:
+                # Constant quality, with the bitrate as a cap
+                cmd += ["-crf", str(profile["crf"])]
+                if profile.get("bitrate"):
+                    cmd += ["-maxrate", str(profile["bitrate"]), "-bufsize", str(profile["bitrate"])]
+            elif profile.get("bitrate"):
+                cmd += ["-b:v", str(profile["bitrate"])]
+            if encoder == "libx264" and profile.get("preset"):
+                cmd += ["-preset", profile["preset"]]
+            if not post:
+                cmd += ["-pix_fmt", "yuv420p"]
+            if choice["ext"] == ".mp4":
+                cmd += ["-movflags", "+faststart"]
+            self._proc = subprocess.Popen(cmd + [path], stdin=subprocess.PIPE, stderr=subprocess.PIPE)
+        else:
+            self._writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*choice["encoder"]), fps, size)
+
+    def write(self, frame: np.ndarray) -> None:
+        if frame.shape[1] != self.size[0] or frame.shape[0] != self.size[1]:
+            frame = cv2.resize(frame, self.size, interpolation=cv2.INTER_AREA)
+        if self._proc is not None:
+            self._proc.stdin.write(np.ascontiguousarray(frame).tobytes())
+        else:
+            self._writer.write(frame)
+        self.frames += 1
+
+    def close(self) -> None:
+        if self._proc is not None:
+            self._proc.stdin.close()
+            err = self._proc.stderr.read()
+            if self._proc.wait() != 0:
+                raise RuntimeError(f"ffmpeg failed: {err.decode(errors='replace').strip()}")
+        elif self._writer is not None:
+            self._writer.release()
+
+class BackgroundRenderer:
+    # Renders run on a small thread pool after the preview has been shown. Jobs are keyed
+    # (e.g. by output path), so Streamlit reruns poll the running job instead of
+    # starting another one. A job that succeeds is dropped as soon as it finishes (its
+    # output is in the cache); a failed one stays until it is resubmitted or forget()
+    # is called, so the failure can be reported.
+    def __init__(self, workers: int = 1):
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="render")
+        self._jobs: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+
+    def submit(self, key: str, fn: Callable, *args, **kwargs) -> Future:
+        with self._lock:
+            job = self._jobs.get(key)
+            if job is not None and not (job.done() and job.exception() is not None):
+                return job
+            job = self._jobs[key] = self._pool.submit(fn, *args, **kwargs)
+        # Outside the lock: a job that is already done runs the callback right here
+        job.add_done_callback(lambda f, key=key: self._finished(key, f))
+        return job
+
+    def _finished(self, key: str, job: Future) -> None:
+        if job.cancelled() or job.exception() is None:
+            with self._lock:
+                if self._jobs.get(key) is job:
+                    del self._jobs[key]
+
+    def get(self, key: str) -> Optional[Future]:
+        with self._lock:
+            return self._jobs.get(key)
+
+    def forget(self, key: str) -> None:
+        with self._lock:
+            self._jobs.pop(key, None)
+
+def describe(stats: Dict) -> str:
+    # One-line size / time summary of a render's "output" stats
+    out = stats["output"]
+    bitrate = f", ≤{out['bitrate']}" if out.get("bitrate") else ""
+    return (f"{out['codec'].upper()} ({out['encoder']}{bitrate}) {out['width']}×{out['height']} @ {out['fps']:.0f} fps"
+            f" · {out['bytes'] / 1e6:.1f} MB · rendered in {stats['total']['wall_s']:.1f}s")
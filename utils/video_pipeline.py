@@ -0,0 +1,129 @@
+# ✅ File: video_pipeline.py (threaded decode -> process -> encode with bounded queues)
+
+import queue
+import threading
+import time
+from typing import Callable, Dict
+
+import numpy as np
+
+_DONE = object()
+
+class StageStats:
+    def __init__(self, name: str):
+        self.name = name
+        self.frames = 0
+        self.busy = 0.0
+
+    def as_dict(self) -> Dict[str, float]:
+        return {
+            "frames": self.frames,
+            "busy_s": round(self.busy, 4),
+            "fps": round(self.frames / self.busy, 2) if self.busy > 0 else 0.0,
+        }
+
+def run_frame_pipeline(cap, process: Callable[[int, np.ndarray], np.ndarray],
+                       write: Callable[[np.ndarray], None], queue_size: int = 8,
+                       frame_step: int = 1) -> Dict[str, Dict[str, float]]:
+    # A decoder thread feeds `process` (run on the calling thread) and an encoder
+    # thread drains its output. Queues are bounded, so a slow stage back-pressures
+    # the others and at most ~2 * queue_size frames are in flight. Frame order is
+    # preserved because every stage is a single FIFO consumer. With frame_step > 1
+    # only every Nth frame is retrieved; frame ids stay source-frame indices.
+    decoded = queue.Queue(maxsize=queue_size)
+    processed = queue.Queue(maxsize=queue_size)
+    stop = threading.Event()
+    errors = []
+    stats = {name: StageStats(name) for name in ("decode", "process", "encode")}
+
+    def put(q, item):
+        while not stop.is_set():
+            try:
+                q.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def get(q):
+        while True:
+            try:
+                return q.get(timeout=0.1)
+            except queue.Empty:
+                if stop.is_set():
+                    return _DONE
+
+    def decoder():
+        try:
+            frame_id = 0
+            while not stop.is_set():
+                start = time.perf_counter()
+                if frame_id % frame_step:
+                    grabbed = cap.grab()
+                    stats["decode"].busy += time.perf_counter() - start
+                    if not grabbed:
+                        break
+                    frame_id += 1
+                    continue
+                ret, frame = cap.read()
+                stats["decode"].busy += time.perf_counter() - start
+                if not ret:
+                    break
+                stats["decode"].frames += 1
+                if not put(decoded, (frame_id, frame)):
+                    return
+                frame_id += 1
+        except Exception as e:
+            errors.append(e)
+            stop.set()
+        finally:
+            put(decoded, _DONE)
+
+    def encoder():
+        try:
+            while True:
+                frame = get(processed)
+                if frame is _DONE:
+                    break
+                start = time.perf_counter()
+                write(frame)
+                stats["encode"].busy += time.perf_counter() - start
+                stats["encode"].frames += 1
+        except Exception as e:
+            errors.append(e)
+            stop.set()
+
+    wall_start = time.perf_counter()
+    threads = [threading.Thread(target=decoder, daemon=True), threading.Thread(target=encoder, daemon=True)]
+    for t in threads:
+        t.start()
+    try:
+        while True:
+            item = get(decoded)
+            if item is _DONE:
+                break
+            frame_id, frame = item
+            start = time.perf_counter()
+            frame = process(frame_id, frame)
+            stats["process"].busy += time.perf_counter() - start
+            stats["process"].frames += 1
+            if not put(processed, frame):
+                break
+    except Exception:
+        stop.set()
+        raise
+    finally:
+        put(processed, _DONE)
+        for t in threads:
+            t.join()
+    if errors:
+        raise errors[0]
+
+    wall = time.perf_counter() - wall_start
+    report = {name: s.as_dict() for name, s in stats.items()}
+    report["total"] = {
+        "frames": stats["encode"].frames,
+        "wall_s": round(wall, 4),
+        "fps": round(stats["encode"].frames / wall, 2) if wall > 0 else 0.0,
+    }
+    return report